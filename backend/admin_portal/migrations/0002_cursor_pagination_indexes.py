@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_portal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['uploaded_at', 'id'], name='ap_grade_uploaded_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['created_at', 'id'], name='ap_match_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['created_at', 'id'], name='ap_org_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=models.Index(fields=['created_at', 'id'], name='ap_statement_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'id'], name='ap_student_created_id_idx'),
+        ),
+    ]
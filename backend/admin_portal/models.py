@@ -48,6 +48,10 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='ap_student_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.given_names} {self.last_name} ({self.student_id})"
@@ -95,6 +99,10 @@ class Grade(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['uploaded_at', 'id'], name='ap_grade_uploaded_id_idx'),
+        ]
     
     def clean(self):
         valid_grades = ['A+', 'A', 'A-', 'B+', 'B', 'B-', 'C+', 'C', 'C-', 'D+', 'D', 'D-']
@@ -120,6 +128,10 @@ class Statement(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['student', 'area_of_law']
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='ap_statement_created_id_idx'),
+        ]
 
 class Organization(models.Model):
     name = models.CharField(max_length=255)
@@ -137,6 +149,10 @@ class Organization(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='ap_org_created_id_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -163,6 +179,10 @@ class Match(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = ['student', 'organization', 'area_of_law']
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='ap_match_created_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student} - {self.organization} ({self.area_of_law})"
@@ -1,13 +1,14 @@
 from rest_framework import serializers
+from backend.sail.fieldsets import SparseFieldsetSerializerMixin
 from .models import Student, Grade, Statement, Organization, Match
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
-class GradeSerializer(serializers.ModelSerializer):
+class GradeSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.__str__', read_only=True)
     
     class Meta:
@@ -15,7 +16,7 @@ class GradeSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('uploaded_at',)
 
-class StatementSerializer(serializers.ModelSerializer):
+class StatementSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.__str__', read_only=True)
     graded_by_name = serializers.CharField(source='graded_by.get_full_name', read_only=True)
     
@@ -24,13 +25,13 @@ class StatementSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('created_at',)
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = '__all__'
         read_only_fields = ('created_at', 'updated_at')
 
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.__str__', read_only=True)
     organization_name = serializers.CharField(source='organization.name', read_only=True)
     approved_by_name = serializers.CharField(source='approved_by.get_full_name', read_only=True)
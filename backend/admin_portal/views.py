@@ -12,6 +12,8 @@ from .serializers import (
     OrganizationSerializer, MatchSerializer, DashboardStatsSerializer
 )
 from .utils import process_csv_file, process_pdf_file
+from backend.sail.conditional import ConditionalGetMixin
+from backend.sail.fieldsets import SparseFieldsetViewMixin
 import pandas as pd
 import csv
 from django.http import JsonResponse
@@ -30,7 +32,15 @@ class BaseAPIView(APIView):
             response.update(data)
         return Response(response, status=status_code)
 
-class StudentViewSet(viewsets.ModelViewSet):
+class PaginatedActionsMixin:
+    """Lets list-style @actions page through the default cursor pagination"""
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+class StudentViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, PaginatedActionsMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()  # Fixed typo
     serializer_class = StudentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -43,24 +53,22 @@ class StudentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def unmatched(self, request):
-        queryset = self.get_unmatched_students()
-        serializer = self.get_serializer(queryset, many=True)
-        return self.get_success_response('Retrieved unmatched students', {'data': serializer.data})
+        return self.paginated_response(self.get_unmatched_students())
     
     @action(detail=False, methods=['get'])
     def pending_approval(self, request):
         """Get students with pending matches"""
         queryset = self.get_queryset().filter(matches__status='PENDING').distinct()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
 
-class GradeViewSet(viewsets.ModelViewSet):
+class GradeViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Grade.objects.all()  # Fixed typo
     serializer_class = GradeSerializer
+    cursor_ordering = ('-uploaded_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['student__last_name', 'student__given_names', 'student__student_id']
 
-class StatementViewSet(viewsets.ModelViewSet):
+class StatementViewSet(SparseFieldsetViewMixin, PaginatedActionsMixin, viewsets.ModelViewSet):
     queryset = Statement.objects.all()  # Fixed typo
     serializer_class = StatementSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -70,11 +78,9 @@ class StatementViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def ungraded(self, request):
         """Get statements that haven't been graded yet"""
-        queryset = self.get_queryset().filter(grade__isnull=True)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(self.get_queryset().filter(grade__isnull=True))
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, PaginatedActionsMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()  # Fixed typo
     serializer_class = OrganizationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -84,11 +90,9 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def available_positions(self, request):
         """Get organizations with available positions"""
-        queryset = self.get_queryset().filter(available_positions__gt=0)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(self.get_queryset().filter(available_positions__gt=0))
 
-class MatchViewSet(viewsets.ModelViewSet):
+class MatchViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Match.objects.all()  # Fixed typo
     serializer_class = MatchSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -145,17 +149,14 @@ class DashboardStatisticsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        total_students = Student.objects.count()
-        matched_students = Student.objects.filter(is_matched=True).count()
-        pending_matches = Student.objects.filter(is_matched=False).count()
-        needs_approval = Student.objects.filter(needs_approval=True).count()
-
-        return Response({
-            'total_students': total_students,
-            'matched_students': matched_students,
-            'pending_matches': pending_matches,
-            'needs_approval': needs_approval,
-        })
+        counts = Student.objects.aggregate(
+            total_students=Count('id'),
+            matched_students=Count('id', filter=Q(is_matched=True)),
+            pending_matches=Count('id', filter=Q(is_matched=False)),
+            needs_approval=Count('id', filter=Q(needs_approval=True)),
+        )
+
+        return Response(counts)
 
 class ImportCSVView(BaseAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -7,7 +7,7 @@ Register models for the Django admin interface.
 from django.contrib import admin
 from .models import (
     StudentProfile, Statement, StudentGrade,
-    OrganizationProfile, FacultyProfile, MatchingRound
+    OrganizationProfile, FacultyProfile, MatchingRound, Match
 )
 
 @admin.register(OrganizationProfile)
@@ -30,7 +30,7 @@ class StatementAdmin(admin.ModelAdmin):
 
 @admin.register(StudentGrade)
 class StudentGradeAdmin(admin.ModelAdmin):
-    list_display = ('id', 'student_profile')
+    list_display = ('id', 'student_profile', 'gpa')
 
 @admin.register(FacultyProfile)
 class FacultyProfileAdmin(admin.ModelAdmin):
@@ -38,4 +38,9 @@ class FacultyProfileAdmin(admin.ModelAdmin):
 
 @admin.register(MatchingRound)
 class MatchingRoundAdmin(admin.ModelAdmin):
-    list_display = ('id', 'round_number', 'status', 'matched_count', 'total_students')
\ No newline at end of file
+    list_display = ('id', 'round_number', 'status', 'matched_count', 'total_students')
+
+@admin.register(Match)
+class MatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'matching_round', 'student_profile', 'organization_profile', 'match_score', 'status')
+    list_filter = ('status', 'matching_round')
\ No newline at end of file
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class SailConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.sail'
-    verbose_name = 'SAIL'
\ No newline at end of file
+    verbose_name = 'SAIL'
+
+    def ready(self):
+        # Connect the dashboard counter signal receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,65 @@
+"""
+File: backend/sail/cache.py
+Purpose: Generation-versioned cache for derived dashboard data
+
+Cached values are keyed by a global data generation. Every write that can
+change them (import logs, matching runs, profile saves; see signals.py)
+bumps the generation once its transaction commits, so entries computed
+from older data are simply never looked up again and expire on their own.
+"""
+
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'sail:generation'
+
+# Entries for old generations are never read again; this only bounds their lifetime
+ENTRY_TIMEOUT = 60 * 60
+
+
+def current_generation() -> int:
+    """The current data generation, initialized on first use"""
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Seed with the clock so a lost counter never reuses an old generation
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_now():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_generation():
+    """
+    Invalidate every generation-cached value once the current transaction
+    commits (immediately outside a transaction), so a reader can never cache
+    pre-commit data under the new generation
+    """
+    transaction.on_commit(bump_now)
+
+
+def generation_cached(name: str):
+    """
+    Cache a function's result per data generation and arguments. Results
+    must be picklable; callers get a fresh copy on every call.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = f"sail:{name}:{current_generation()}:{args!r}:{sorted(kwargs.items())!r}"
+            value = cache.get(key)
+            if value is None:
+                value = func(*args, **kwargs)
+                cache.set(key, value, timeout=ENTRY_TIMEOUT)
+            return value
+        wrapper.uncached = func
+        return wrapper
+    return decorator
@@ -0,0 +1,132 @@
+"""
+backend/sail/conditional.py
+----------------------------------
+Conditional GET for polled read endpoints.
+
+Responses carry a weak ETag (and a Last-Modified where the data has a
+modification time) computed from a cheap version of the data behind them:
+the global data generation (see cache.py) together with the row count and
+latest ``updated_at`` of the queryset being served. A client repeating a
+request with a matching If-None-Match / If-Modified-Since gets
+``304 Not Modified`` before anything is serialized.
+
+The generation covers writes that bypass ``updated_at`` (queryset
+updates, bulk imports and matching runs); the count and timestamp cover
+tables outside the generation cache. Clients should prefer the ETag, as
+If-Modified-Since alone can miss such writes.
+"""
+
+import hashlib
+from functools import partial, wraps
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import current_generation
+
+
+def make_etag(request, *version):
+    """
+    Weak ETag for the response to this request given the version of its
+    data. The full path (fields, expand, cursor...), the accepted media type
+    and the user are part of it, since each changes the representation.
+    """
+    key = repr((
+        request.get_full_path(), request.META.get('HTTP_ACCEPT', ''),
+        getattr(request.user, 'pk', None), version,
+    ))
+    return f'W/"{hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+def queryset_version(queryset, modified_field='updated_at'):
+    """(row count, latest modification time) of a queryset, in one query"""
+    version = queryset.order_by().aggregate(count=Count('pk'), modified=Max(modified_field))
+    return version['count'], version['modified']
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    A 304 Not Modified response when the request's validators still match
+    the current ones, otherwise None. Only applies to GET and HEAD.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def generation_conditional(view):
+    """
+    Conditional GET for a function view whose data all comes from the
+    generation cache. Apply below @api_view so authentication and
+    permission checks still run first.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        etag = make_etag(request, current_generation())
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+
+    return wrapper
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin answering list and retrieve with 304 Not Modified when the
+    served rows have not changed since the client's copy. Custom GET actions
+    can do the same through conditional_response().
+    """
+
+    # Timestamp column bumped on every save of the viewset's model
+    modified_field = 'updated_at'
+
+    def get_validators(self, queryset):
+        count, modified = queryset_version(queryset, self.modified_field)
+        return make_etag(self.request, current_generation(), count, modified), modified
+
+    def conditional_response(self, queryset, build_response):
+        """
+        Return 304 if the client already has the current representation of
+        ``queryset``, otherwise call ``build_response()`` and attach the
+        validators to its result.
+        """
+        etag, modified = self.get_validators(queryset)
+        response = not_modified(self.request, etag, modified)
+        if response is not None:
+            return response
+        response = build_response()
+        if response.status_code == 200:
+            set_validators(response, etag, modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional_response(queryset, partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # Malformed lookup: let get_object() answer with its 404
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(queryset, partial(super().retrieve, request, *args, **kwargs))
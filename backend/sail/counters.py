@@ -0,0 +1,172 @@
+"""
+File: backend/sail/counters.py
+Purpose: Materialized dashboard counters
+
+Counts shown on the admin dashboard live in DashboardCounter rows so that
+reading them does not scan the profile tables. Signal receivers (see
+signals.py) apply each save or delete as a delta; bulk writes that bypass
+signals run inside deferred_counters() and are followed by a full
+reconcile_counters(), which also runs periodically to correct any drift.
+
+Keys:
+    students.<name>         one per STUDENT_COUNTERS entry
+    <table>.total           organizations and faculty
+    <table>.new.<date>      profiles created per local day, kept for
+                            NEW_WINDOW_DAYS days
+    area.<area id>          StudentAreaRanking rows per area of law
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache import bump_generation
+from .models import (
+    DashboardCounter, StudentProfile, OrganizationProfile, FacultyProfile, StudentAreaRanking
+)
+
+# Student counters as the field values a profile must have to be counted
+STUDENT_COUNTERS = {
+    'total': {},
+    'matched': {'is_matched': True},
+    'pending': {'is_active': True, 'is_matched': False},
+    'approval_needed': {'admin_approval_needed': True},
+    'declined': {'is_active': False, 'is_matched': False},
+    'approved': {'is_matched': True, 'admin_approval_needed': False},
+    'active': {'is_active': True},
+}
+STUDENT_COUNTER_FIELDS = ['is_active', 'is_matched', 'admin_approval_needed']
+
+# Tables whose totals and daily creations are counted, by key prefix
+COUNTED_TABLES = {
+    'students': StudentProfile,
+    'organizations': OrganizationProfile,
+    'faculty': FacultyProfile,
+}
+
+# Days of daily creation counts summed into the "new" figures
+NEW_WINDOW_DAYS = 7
+
+_state = threading.local()
+
+
+def counters_deferred() -> bool:
+    """Whether signal receivers should leave the counters alone"""
+    return getattr(_state, 'deferred', 0) > 0
+
+
+@contextmanager
+def deferred_counters():
+    """
+    Skip incremental counter updates and cache invalidation for the writes
+    inside the block, then recount everything and invalidate once when it
+    exits. Bulk import and matching paths use this, since their bulk
+    statements do not send per-row signals.
+    """
+    _state.deferred = getattr(_state, 'deferred', 0) + 1
+    try:
+        yield
+    finally:
+        _state.deferred -= 1
+        if not _state.deferred:
+            reconcile_counters()
+            bump_generation()
+
+
+def window_days(today=None):
+    """Local dates of the "new" window, oldest first"""
+    today = today or timezone.localdate()
+    return [today - timedelta(days=n) for n in range(NEW_WINDOW_DAYS - 1, -1, -1)]
+
+
+def new_key(prefix: str, day) -> str:
+    return f"{prefix}.new.{day.isoformat()}"
+
+
+def student_counts(values) -> dict:
+    """Student counter keys a profile with these field values contributes 1 to"""
+    return {
+        f"students.{name}": 1
+        for name, spec in STUDENT_COUNTERS.items()
+        if all(values[field] == value for field, value in spec.items())
+    }
+
+
+def created_key(prefix: str, created_at):
+    """Daily creation key for a timestamp, or None when outside the window"""
+    day = timezone.localdate(created_at)
+    return new_key(prefix, day) if day >= window_days()[0] else None
+
+
+def apply_deltas(deltas: dict):
+    """Add the non-zero deltas to their counters, creating missing rows"""
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        if not DashboardCounter.objects.filter(key=key).update(value=F('value') + delta):
+            _, created = DashboardCounter.objects.get_or_create(key=key, defaults={'value': delta})
+            if not created:
+                DashboardCounter.objects.filter(key=key).update(value=F('value') + delta)
+
+
+def count_all() -> dict:
+    """Every counter recomputed from the source tables"""
+    counts = StudentProfile.objects.aggregate(**{
+        f"students.{name}": Count('id', filter=Q(**spec))
+        for name, spec in STUDENT_COUNTERS.items()
+    })
+    since = timezone.make_aware(datetime.combine(window_days()[0], time.min))
+    for prefix, model in COUNTED_TABLES.items():
+        if prefix != 'students':
+            counts[f"{prefix}.total"] = model.objects.count()
+        daily = (
+            model.objects.filter(created_at__gte=since)
+            .annotate(day=TruncDate('created_at'))
+            .values('day').annotate(count=Count('id'))
+        )
+        counts.update((new_key(prefix, row['day']), row['count']) for row in daily)
+
+    rankings = StudentAreaRanking.objects.values('area_id').annotate(count=Count('id'))
+    counts.update((f"area.{row['area_id']}", row['count']) for row in rankings)
+    return counts
+
+
+def reconcile_counters() -> int:
+    """
+    Rewrite all counters from the source tables, dropping keys that fell
+    out of the window. Returns the number of counters that had drifted.
+    """
+    counts = count_all()
+    with transaction.atomic():
+        current = dict(DashboardCounter.objects.select_for_update().values_list('key', 'value'))
+        drifted = sum(1 for key in counts.keys() | current.keys() if counts.get(key, 0) != current.get(key, 0))
+        DashboardCounter.objects.exclude(key__in=list(counts)).delete()
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(key=key, value=value) for key, value in counts.items()],
+            update_conflicts=True, unique_fields=['key'], update_fields=['value', 'updated_at'],
+        )
+        if drifted:
+            bump_generation()
+    return drifted
+
+
+def read_counters() -> dict:
+    """
+    Current counter values needed by the dashboard, in one query. The
+    counters are rebuilt first when they have never been computed.
+    """
+    keys = [f"students.{name}" for name in STUDENT_COUNTERS]
+    keys += [f"{prefix}.total" for prefix in COUNTED_TABLES if prefix != 'students']
+    keys += [new_key(prefix, day) for prefix in COUNTED_TABLES for day in window_days()]
+    query = DashboardCounter.objects.filter(Q(key__in=keys) | Q(key__startswith='area.'))
+
+    counters = dict(query.values_list('key', 'value'))
+    if 'students.total' not in counters:
+        reconcile_counters()
+        counters = dict(query.values_list('key', 'value'))
+    return counters
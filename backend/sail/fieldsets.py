@@ -0,0 +1,131 @@
+"""
+backend/sail/fieldsets.py
+----------------------------------
+Sparse fieldsets for read endpoints.
+
+Responses carry every field unless a GET request names the fields it
+needs with ``?fields=a,b``; relation-backed fields can be named there or
+added to the selection with ``?expand=x,y``. The view narrows its
+queryset to match: ``only()`` the columns behind the selected fields,
+and select/prefetch only the relations they read.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+
+def query_param_set(request, name):
+    """Comma-separated query parameter as a set of names, None when absent"""
+    value = request.query_params.get(name) if request is not None else None
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Serializer side of sparse fieldsets: drops the fields a GET request did
+    not ask for, and builds the queryset that loads just what is left.
+    """
+
+    # Relation-backed fields, kept in a ?fields= selection only when named
+    # or expanded, mapped to the lookups that load them (a reverse
+    # one-to-one or forward foreign key name is select_related, anything
+    # else prefetch_related)
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_field_names()
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    def selected_field_names(self):
+        request = self.context.get('request')
+        names = set(self.fields)
+        if request is None or request.method != 'GET':
+            return names
+
+        fields = query_param_set(request, 'fields')
+        if fields is None:
+            return names
+        expand = query_param_set(request, 'expand') or set()
+        return (names & (fields | {'id'})) | (names & set(self.expandable_fields) & expand)
+
+    def narrow_queryset(self, queryset, extra_columns=()):
+        """
+        Restrict a queryset to the columns and relations the selected fields
+        read. Falls back to loading every column when a field's source is
+        not a model attribute (e.g. a SerializerMethodField), since its
+        reads cannot be known.
+        """
+        opts = queryset.model._meta
+        columns = {opts.pk.name, *extra_columns}
+        select, prefetch = [], []
+        load_all_columns = False
+
+        def relate(lookup):
+            if isinstance(lookup, Prefetch):
+                prefetch.append(lookup)
+                return
+            try:
+                relation = opts.get_field(lookup)
+            except FieldDoesNotExist:
+                prefetch.append(lookup)
+                return
+            if relation.one_to_one or relation.many_to_one:
+                select.append(lookup)
+                columns.update(
+                    f"{lookup}__{field.name}" for field in relation.related_model._meta.concrete_fields
+                )
+                if relation.concrete:
+                    columns.add(lookup)
+            else:
+                prefetch.append(lookup)
+
+        for name, field in self.fields.items():
+            if name in self.expandable_fields:
+                for lookup in self.expandable_fields[name]:
+                    relate(lookup)
+                continue
+            if field.source == '*':
+                load_all_columns = True
+                continue
+            try:
+                model_field = opts.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                load_all_columns = True
+                continue
+            if not model_field.concrete or model_field.many_to_many:
+                prefetch.append(model_field.name)
+            elif model_field.is_relation and len(field.source_attrs) > 1:
+                # Read through a related object (e.g. 'student.__str__'): fetch
+                # the related rows in one extra query instead of one per row
+                columns.add(model_field.name)
+                prefetch.append(model_field.name)
+            else:
+                columns.add(model_field.name)
+
+        # select_related() with no arguments would follow every foreign key
+        if select:
+            queryset = queryset.select_related(*select)
+        queryset = queryset.prefetch_related(*prefetch)
+        return queryset if load_all_columns else queryset.only(*columns)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset side of sparse fieldsets: narrows get_queryset() to the fields
+    the serializer kept for this request. The serializer class must use
+    SparseFieldsetSerializerMixin.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        ordering = getattr(self, 'cursor_ordering', None) or getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return self.get_serializer().narrow_queryset(
+            queryset, extra_columns=[field.lstrip('-') for field in ordering]
+        )
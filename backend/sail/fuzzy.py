@@ -0,0 +1,89 @@
+"""
+File: backend/sail/fuzzy.py
+Purpose: Trigram similarity lookup of students and organizations
+
+Student names and emails and organization names are compared with
+pg_trgm similarity. Each lookup is a single query: the ``%`` operator
+selects rows above pg_trgm.similarity_threshold (0.3 by default) through
+the GIN trigram indexes of migration 0012, and the candidates come back
+best first with their score in ``similarity``.
+
+pg_trgm ships with PostgreSQL's contrib package. On servers without it
+the migration skips the indexes and lookups fall back to case-insensitive
+containment, scored 0 so that importers never act on them.
+"""
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
+from django.db.models import CharField, Func, Q, Value
+from django.db.models.functions import Greatest
+
+from .models import OrganizationProfile, StudentProfile
+
+_enabled = {}
+
+
+class FullName(Func):
+    """first_name || ' ' || last_name, as indexed by student_name_trgm_idx"""
+    template = "(%(expressions)s)"
+    arg_joiner = " || ' ' || "
+    output_field = CharField()
+
+
+def trigram_enabled() -> bool:
+    """Whether pg_trgm is installed in the current database"""
+    name = connection.settings_dict['NAME']
+    if name not in _enabled:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _enabled[name] = cursor.fetchone() is not None
+    return _enabled[name]
+
+
+def student_matches(queryset, text: str):
+    """Students of a queryset whose name or email resembles text, best first"""
+    queryset = queryset.annotate(full_name=FullName('first_name', 'last_name'))
+    if not trigram_enabled():
+        return (
+            queryset.filter(Q(full_name__icontains=text) | Q(email__icontains=text))
+            .annotate(similarity=Value(0.0)).order_by('last_name', 'first_name', 'id')
+        )
+    return (
+        queryset.filter(Q(full_name__trigram_similar=text) | Q(email__trigram_similar=text))
+        .annotate(similarity=Greatest(
+            TrigramSimilarity('full_name', text), TrigramSimilarity('email', text)
+        ))
+        .order_by('-similarity', 'id')
+    )
+
+
+def organization_matches(queryset, text: str):
+    """Organizations of a queryset whose name resembles text, best first"""
+    if not trigram_enabled():
+        return queryset.filter(name__icontains=text).annotate(similarity=Value(0.0)).order_by('name', 'id')
+    return (
+        queryset.filter(name__trigram_similar=text)
+        .annotate(similarity=TrigramSimilarity('name', text))
+        .order_by('-similarity', 'id')
+    )
+
+
+def similar_students(text: str, limit: int = 5):
+    """Top students by name or email similarity, each with a ``similarity`` score"""
+    return list(student_matches(StudentProfile.objects.all(), text)[:limit])
+
+
+def similar_organizations(text: str, limit: int = 5):
+    """Top organizations by name similarity, each with a ``similarity`` score"""
+    return list(organization_matches(OrganizationProfile.objects.all(), text)[:limit])
+
+
+def unique_match(candidates):
+    """
+    The one candidate at or above settings.FUZZY_MATCH_MIN_SCORE, or None
+    when there is none or more than one (an ambiguous near-duplicate is
+    left for an admin to resolve)
+    """
+    close = [c for c in candidates if c.similarity >= settings.FUZZY_MATCH_MIN_SCORE]
+    return close[0] if len(close) == 1 else None
@@ -0,0 +1,55 @@
+"""
+File: backend/sail/grades.py
+Purpose: Numeric grade points from the gradescore.csv scale
+
+StudentGrade keeps the letter grades as they appear on transcripts. The
+letter -> points scale is read from settings.GRADESCORE_CSV once per
+process, and every StudentGrade stores the points of its courses and
+their mean (its GPA, scaled to 0-1) next to the letters, recomputed when
+the letters are saved. Matching and ordering by academic standing read
+those numeric columns instead of parsing letters.
+"""
+
+import csv
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Graded courses of a StudentGrade, in course_points order
+GRADE_FIELDS = (
+    'constitutional_law', 'contracts', 'criminal_law', 'property_law', 'torts',
+    'lrw_case_brief', 'lrw_multiple_case', 'lrw_short_memo',
+)
+
+
+@lru_cache(maxsize=None)
+def grade_scale() -> Dict[str, float]:
+    """Points per letter grade, as listed in gradescore.csv"""
+    scale = {}
+    with open(settings.GRADESCORE_CSV, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            letter = (row.get('Grade') or '').strip().upper()
+            if not letter:
+                continue
+            if letter in scale:
+                logger.warning(f"Grade {letter} is listed twice in {settings.GRADESCORE_CSV}; using the last score")
+            scale[letter] = float(row['Score'])
+    return scale
+
+
+def course_points(letters: Iterable[Optional[str]]) -> List[Optional[float]]:
+    """Points of each letter grade; None for blank or unknown grades"""
+    scale = grade_scale()
+    return [scale.get(letter.strip().upper()) if letter else None for letter in letters]
+
+
+def normalized_gpa(points: Iterable[Optional[float]]) -> Optional[float]:
+    """Mean of the known course points as a share of the top grade, None without any"""
+    known = [p for p in points if p is not None]
+    if not known:
+        return None
+    return sum(known) / len(known) / max(grade_scale().values())
@@ -0,0 +1,171 @@
+"""
+File: backend/sail/management/commands/explain_hot_queries.py
+Purpose: EXPLAIN ANALYZE the application's hot queries and flag
+         sequential scans on large tables
+
+    python manage.py explain_hot_queries
+    python manage.py explain_hot_queries --seed 20000 --strict
+
+With --seed, a synthetic dataset of that many students (and matching
+organizations, rankings, grades and imports) is created first and rolled
+back afterwards, so the plans reflect a realistically sized database
+without touching real data.
+"""
+
+import json
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from ...models import (
+    AreaOfLaw, ImportLog, OrganizationProfile, PDFExtraction, StudentAreaRanking,
+    StudentGrade, StudentProfile
+)
+from ...services.dashboard import activity_feed_query
+
+# Share of seeded students already matched, as in a later matching round
+SEED_MATCHED_FRACTION = 0.9
+
+
+def hot_queries():
+    """(name, queryset) for the queries run on every import, page and matching run"""
+    sample_ids = list(StudentProfile.objects.values_list('student_id', flat=True)[:50])
+    to_match = StudentProfile.objects.filter(is_active=True, is_matched=False)
+    return [
+        ('student lookup by ID (imports, PDF grades)',
+         StudentProfile.objects.filter(student_id__in=sample_ids)),
+        ('students to match',
+         to_match.values_list('id', 'location_preferences', 'work_preferences')),
+        ('organizations with open positions',
+         OrganizationProfile.objects.filter(is_active=True, filled_positions__lt=F('available_positions'))
+         .values_list('id', 'location', 'work_modes', 'available_positions', 'filled_positions')),
+        ('rankings of students to match',
+         StudentAreaRanking.objects.filter(student_profile__in=to_match.values('id'))
+         .values_list('student_profile_id', 'area_id', 'rank').order_by()),
+        ('grades of students to match',
+         StudentGrade.objects.filter(student_profile__in=to_match.values('id'))),
+        ('recent activity feed', activity_feed_query(5)),
+        ('student list page', StudentProfile.objects.order_by('-created_at', '-id')[:100]),
+        ('import log page', ImportLog.objects.order_by('-import_datetime', '-id')[:100]),
+        ('PDF extraction cache lookup',
+         PDFExtraction.objects.filter(sha256__in=[uuid.uuid4().hex * 2 for _ in range(20)])),
+    ]
+
+
+def seq_scans(plan):
+    """Relations read by Seq Scan nodes anywhere in a JSON plan tree"""
+    scans = []
+    if plan.get('Node Type') == 'Seq Scan':
+        scans.append(plan['Relation Name'])
+    for child in plan.get('Plans', []):
+        scans.extend(seq_scans(child))
+    return scans
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN ANALYZE on the hot queries and flag sequential scans on large tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=0, metavar='STUDENTS',
+            help="Explain against this many synthetic students, rolled back afterwards",
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help="Only flag sequential scans of tables with at least this many rows (default: 1000)",
+        )
+        parser.add_argument('--plans', action='store_true', help="Print the full plan of every query")
+        parser.add_argument('--strict', action='store_true', help="Exit with an error if any scan is flagged")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("explain_hot_queries needs PostgreSQL")
+
+        with transaction.atomic():
+            if options['seed']:
+                self.seed(options['seed'])
+            flagged = self.explain_all(options['min_rows'], options['plans'])
+            # Discard the seeded rows
+            transaction.set_rollback(True)
+
+        if flagged:
+            message = f"{len(flagged)} queries read large tables sequentially: {', '.join(flagged)}"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No sequential scans of large tables"))
+
+    def explain_all(self, min_rows, show_plans):
+        flagged = []
+        for name, queryset in hot_queries():
+            result = json.loads(queryset.explain(analyze=True, format='json'))[0]
+            plan = result['Plan']
+            large = sorted({
+                table for table in seq_scans(plan) if self.table_rows(table) >= min_rows
+            })
+            line = f"{name}: {result['Execution Time']:.2f} ms, {plan['Node Type']}"
+            if large:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(f"{line}; Seq Scan on {', '.join(large)}"))
+            else:
+                self.stdout.write(line)
+            if show_plans:
+                self.stdout.write(queryset.explain(analyze=True))
+        return flagged
+
+    def table_rows(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def seed(self, n_students):
+        """Bulk-insert a synthetic dataset and refresh planner statistics"""
+        tag = uuid.uuid4().hex[:8]
+        areas = [AreaOfLaw(name=f"Seed {tag} area {i}") for i in range(10)]
+        AreaOfLaw.objects.bulk_create(areas)
+
+        matched = int(n_students * SEED_MATCHED_FRACTION)
+        students = StudentProfile.objects.bulk_create([
+            StudentProfile(
+                student_id=f"{tag}{i:07d}", first_name="Seed", last_name=str(i),
+                location_preferences=['Toronto'], work_preferences=['Remote'],
+                is_matched=i < matched,
+            )
+            for i in range(n_students)
+        ], batch_size=5000)
+        StudentAreaRanking.objects.bulk_create([
+            StudentAreaRanking(student_profile=student, area=areas[(i + rank) % len(areas)], rank=rank)
+            for i, student in enumerate(students) for rank in range(1, 4)
+        ], batch_size=5000)
+        grades = [StudentGrade(student_profile=student, torts='B+') for student in students]
+        for grade in grades:
+            grade.compute_grade_points()
+        StudentGrade.objects.bulk_create(grades, batch_size=5000)
+
+        # Most organizations are full by the time matching is re-run
+        n_orgs = max(n_students // 20, 1)
+        OrganizationProfile.objects.bulk_create([
+            OrganizationProfile(
+                name=f"Seed {tag} org {j}", location='Toronto', work_modes=['Remote'],
+                available_positions=2, filled_positions=2 if j % 10 else 1,
+            )
+            for j in range(n_orgs)
+        ], batch_size=5000)
+        ImportLog.objects.bulk_create(
+            [ImportLog(file_name=f"seed-{tag}-{k}.csv", import_type='csv') for k in range(n_students // 10)],
+            batch_size=5000,
+        )
+        PDFExtraction.objects.bulk_create(
+            [PDFExtraction(sha256=uuid.uuid4().hex * 2, text="") for _ in range(n_students // 2)],
+            batch_size=5000,
+        )
+
+        with connection.cursor() as cursor:
+            for model in (StudentProfile, StudentAreaRanking, StudentGrade, OrganizationProfile,
+                          ImportLog, PDFExtraction):
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+        self.stdout.write(f"Seeded {n_students} students and {n_orgs} organizations (rolled back on exit)")
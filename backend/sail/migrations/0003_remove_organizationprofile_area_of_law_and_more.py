@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:26
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0002_areaoflaw_importlog_systemsetting_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='organizationprofile',
+            name='area_of_law',
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='areas_of_law',
+            field=models.ManyToManyField(related_name='organizations', to='sail.areaoflaw'),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='description',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='is_active',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='requirements',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='website',
+            field=models.URLField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='organizationprofile',
+            name='work_modes',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, null=True, size=None),
+        ),
+        migrations.CreateModel(
+            name='Externship',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('externship_type', models.CharField(choices=[('STANDARD', 'Standard Externship'), ('SELF_PROPOSED', 'Self-Proposed Externship')], max_length=20)),
+                ('supervisor_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('supervisor_email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('supervisor_phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('is_approved', models.BooleanField(default=False)),
+                ('area_of_law', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='sail.areaoflaw')),
+                ('organization_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='externships', to='sail.organizationprofile')),
+                ('student_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='externships', to='sail.studentprofile')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('match_score', models.FloatField(default=0)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('APPROVED', 'Approved'), ('REJECTED', 'Rejected')], default='PENDING', max_length=20)),
+                ('area_of_law', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='sail.areaoflaw')),
+                ('matching_round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='sail.matchinground')),
+                ('organization_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='sail.organizationprofile')),
+                ('student_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='sail.studentprofile')),
+            ],
+            options={
+                'ordering': ['-match_score'],
+                'unique_together': {('matching_round', 'student_profile')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0003_remove_organizationprofile_area_of_law_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchinground',
+            name='algorithm',
+            field=models.CharField(choices=[('greedy', 'Greedy (best score first)'), ('optimal', 'Optimal assignment (maximum total score)')], default='greedy', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='matchinground',
+            name='statistics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
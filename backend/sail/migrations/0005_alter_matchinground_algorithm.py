@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0004_matchinground_algorithm_statistics'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchinground',
+            name='algorithm',
+            field=models.CharField(choices=[('greedy', 'Greedy (best score first)'), ('optimal', 'Optimal assignment (maximum total score)'), ('stable', 'Stable matching (student-proposing deferred acceptance)')], default='greedy', max_length=20),
+        ),
+    ]
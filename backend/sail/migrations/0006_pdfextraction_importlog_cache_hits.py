@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:55
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0005_alter_matchinground_algorithm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PDFExtraction',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('text', models.TextField()),
+                ('student_info', models.JSONField(blank=True, null=True)),
+                ('grades', models.JSONField(blank=True, default=dict)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='cache_hits',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0007_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importlog',
+            name='import_datetime',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='organizationprofile',
+            index=models.Index(fields=['-updated_at'], name='organization_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['-updated_at'], name='student_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0008_activity_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organizationprofile',
+            index=models.Index(fields=['created_at', 'id'], name='organization_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=models.Index(fields=['created_at', 'id'], name='statement_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentgrade',
+            index=models.Index(fields=['created_at', 'id'], name='grade_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['created_at', 'id'], name='student_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0009_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organizationprofile',
+            index=models.Index(condition=models.Q(('filled_positions__lt', models.F('available_positions')), ('is_active', True)), fields=['id'], name='organization_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['student_id'], name='student_student_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_matched', False)), fields=['id'], name='student_unmatched_idx'),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# search_vector is recomputed by BEFORE triggers whenever a searched column
+# is written, so bulk inserts and upserts that bypass save() keep it current.
+# Everything uses the 'english' configuration that RankedSearchFilter parses
+# queries with, so names and query terms are stemmed alike.
+STATEMENT_TRIGGER = """
+CREATE FUNCTION sail_statement_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.area_of_law, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sail_statement_search_vector
+    BEFORE INSERT OR UPDATE OF content, area_of_law ON sail_statement
+    FOR EACH ROW EXECUTE FUNCTION sail_statement_search_vector();
+
+UPDATE sail_statement SET content = content;
+"""
+
+STUDENT_TRIGGER = """
+CREATE FUNCTION sail_studentprofile_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english',
+            coalesce(NEW.first_name, '') || ' ' || coalesce(NEW.last_name, '') || ' ' ||
+            coalesce(NEW.student_id, '')), 'A') ||
+        setweight(to_tsvector('english',
+            coalesce(array_to_string(NEW.statements_of_interest, ' '), '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sail_studentprofile_search_vector
+    BEFORE INSERT OR UPDATE OF first_name, last_name, student_id, statements_of_interest
+    ON sail_studentprofile
+    FOR EACH ROW EXECUTE FUNCTION sail_studentprofile_search_vector();
+
+UPDATE sail_studentprofile SET student_id = student_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0010_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statement',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            STATEMENT_TRIGGER,
+            reverse_sql="""
+                DROP TRIGGER sail_statement_search_vector ON sail_statement;
+                DROP FUNCTION sail_statement_search_vector();
+            """,
+        ),
+        migrations.RunSQL(
+            STUDENT_TRIGGER,
+            reverse_sql="""
+                DROP TRIGGER sail_studentprofile_search_vector ON sail_studentprofile;
+                DROP FUNCTION sail_studentprofile_search_vector();
+            """,
+        ),
+        migrations.AddIndex(
+            model_name='statement',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='statement_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='student_search_idx'),
+        ),
+    ]
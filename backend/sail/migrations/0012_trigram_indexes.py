@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Trigram indexes for backend.sail.fuzzy. pg_trgm is part of PostgreSQL's
+# contrib package, so the extension and its indexes are only created where
+# the server provides it; fuzzy lookups fall back to unindexed containment
+# elsewhere. The student name expression must stay identical to
+# fuzzy.FullName for the planner to use the index.
+TRIGRAM_INDEXES = """
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS student_name_trgm_idx ON sail_studentprofile
+            USING gin ((first_name || ' ' || last_name) gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS student_email_trgm_idx ON sail_studentprofile
+            USING gin (email gin_trgm_ops);
+        CREATE INDEX IF NOT EXISTS organization_name_trgm_idx ON sail_organizationprofile
+            USING gin (name gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0011_full_text_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            TRIGRAM_INDEXES,
+            reverse_sql="""
+                DROP INDEX IF EXISTS student_name_trgm_idx;
+                DROP INDEX IF EXISTS student_email_trgm_idx;
+                DROP INDEX IF EXISTS organization_name_trgm_idx;
+            """,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0012_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchinground',
+            name='checkpoint',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='matchinground',
+            name='task_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+# Frozen copies of grades.GRADE_FIELDS and the gradescore.csv scale at the
+# time of this migration, so the backfill does not change with later code
+GRADE_FIELDS = (
+    'constitutional_law', 'contracts', 'criminal_law', 'property_law', 'torts',
+    'lrw_case_brief', 'lrw_multiple_case', 'lrw_short_memo',
+)
+GRADE_SCALE = {
+    'A+': 5.0, 'A': 4.75, 'A-': 4.5, 'B+': 4.0, 'B': 3.75, 'B-': 3.5,
+    'C+': 3.25, 'C': 3.0, 'C-': 2.75,
+}
+TOP_GRADE = max(GRADE_SCALE.values())
+
+
+def backfill_grade_points(apps, schema_editor):
+    StudentGrade = apps.get_model('sail', 'StudentGrade')
+    batch = []
+    for grades in StudentGrade.objects.only(*GRADE_FIELDS).iterator(chunk_size=2000):
+        letters = [getattr(grades, field) for field in GRADE_FIELDS]
+        grades.course_points = [GRADE_SCALE.get(letter.strip().upper()) if letter else None for letter in letters]
+        known = [points for points in grades.course_points if points is not None]
+        grades.gpa = sum(known) / len(known) / TOP_GRADE if known else None
+        batch.append(grades)
+        if len(batch) == 2000:
+            StudentGrade.objects.bulk_update(batch, ['course_points', 'gpa'])
+            batch = []
+    StudentGrade.objects.bulk_update(batch, ['course_points', 'gpa'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sail', '0013_matching_run_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentgrade',
+            name='course_points',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), blank=True, editable=False, null=True, size=8),
+        ),
+        migrations.AddField(
+            model_name='studentgrade',
+            name='gpa',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='studentgrade',
+            index=models.Index(fields=['gpa'], name='grade_gpa_idx'),
+        ),
+        migrations.RunPython(backfill_grade_points, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,10 @@ Defines database schema and relationships
 import uuid
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+
+from .grades import GRADE_FIELDS, course_points as letter_points, normalized_gpa
 
 class BaseModel(models.Model):
     """
@@ -74,11 +78,39 @@ class StudentProfile(BaseModel):
     admin_approval_needed = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
 
+    # Full-text search document (names, then statements of interest),
+    # maintained by a database trigger (migration 0011)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Import and PDF grade lookups (not unique: imports report duplicate IDs)
+            models.Index(fields=['student_id'], name='student_student_id_idx'),
+            # Recent activity feed
+            models.Index(fields=['-updated_at'], name='student_updated_at_idx'),
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='student_created_id_idx'),
+            # Students still to be matched
+            models.Index(
+                fields=['id'], name='student_unmatched_idx',
+                condition=models.Q(is_active=True, is_matched=False),
+            ),
+            # Ranked ?q= search
+            GinIndex(fields=['search_vector'], name='student_search_idx'),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
     
     def save(self, *args, **kwargs):
-        # Convert between array and text fields to maintain compatibility
+        self.sync_preference_fields()
+        super().save(*args, **kwargs)
+
+    def sync_preference_fields(self):
+        """
+        Convert between array and text fields to maintain compatibility.
+        Bulk writes skip save(), so they call this directly.
+        """
         if self.location_preferences and not self.location_preferences_text:
             self.location_preferences_text = ';'.join(self.location_preferences)
         elif self.location_preferences_text and not self.location_preferences:
@@ -88,8 +120,6 @@ class StudentProfile(BaseModel):
             self.work_preferences_text = ';'.join(self.work_preferences)
         elif self.work_preferences_text and not self.work_preferences:
             self.work_preferences = [pref.strip() for pref in self.work_preferences_text.split(';')]
-        
-        super().save(*args, **kwargs)
 
 class StudentAreaRanking(BaseModel):
     """
@@ -115,6 +145,18 @@ class Statement(BaseModel):
     area_of_law = models.CharField(max_length=128, blank=True, null=True)
     statement_grade = models.IntegerField(null=True, blank=True)
 
+    # Full-text search document (area of law, then content), maintained by
+    # a database trigger (migration 0011)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='statement_created_id_idx'),
+            # Ranked ?q= search
+            GinIndex(fields=['search_vector'], name='statement_search_idx'),
+        ]
+
     def __str__(self):
         return f"Statement for {self.student_profile} in {self.area_of_law}"
 
@@ -134,9 +176,38 @@ class StudentGrade(BaseModel):
     lrw_multiple_case = models.CharField(max_length=5, blank=True, null=True)
     lrw_short_memo = models.CharField(max_length=5, blank=True, null=True)
 
+    # Points per course in GRADE_FIELDS order and their mean scaled to 0-1,
+    # from the gradescore.csv scale (see grades.py)
+    course_points = ArrayField(models.FloatField(null=True), size=len(GRADE_FIELDS),
+                               blank=True, null=True, editable=False)
+    gpa = models.FloatField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='grade_created_id_idx'),
+            # Ordering by academic standing
+            models.Index(fields=['gpa'], name='grade_gpa_idx'),
+        ]
+
     def __str__(self):
         return f"Grades for {self.student_profile}"
 
+    def save(self, *args, **kwargs):
+        self.compute_grade_points()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(GRADE_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'course_points', 'gpa'}
+        super().save(*args, **kwargs)
+
+    def compute_grade_points(self):
+        """
+        Recompute course_points and gpa from the letter grades.
+        Bulk writes skip save(), so they call this directly.
+        """
+        self.course_points = letter_points(getattr(self, field) for field in GRADE_FIELDS)
+        self.gpa = normalized_gpa(self.course_points)
+
 class SelfProposedExternship(BaseModel):
     """
     Details for self-proposed externships
@@ -161,10 +232,29 @@ class OrganizationProfile(BaseModel):
     phone = models.CharField(max_length=20, blank=True, null=True)
     website = models.URLField(blank=True, null=True)
     requirements = models.TextField(blank=True, null=True)
+    # Work arrangements offered (In-Person, Hybrid, Remote)
+    work_modes = ArrayField(
+        models.CharField(max_length=50),
+        null=True,
+        blank=True
+    )
     available_positions = models.IntegerField(default=1)
     filled_positions = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Recent activity feed
+            models.Index(fields=['-updated_at'], name='organization_updated_at_idx'),
+            # Cursor pagination
+            models.Index(fields=['created_at', 'id'], name='organization_created_id_idx'),
+            # Organizations with positions left to fill
+            models.Index(
+                fields=['id'], name='organization_open_idx',
+                condition=models.Q(is_active=True, filled_positions__lt=models.F('available_positions')),
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -179,20 +269,59 @@ class FacultyProfile(BaseModel):
         return self.full_name
 
 class MatchingRound(BaseModel):
+    ALGORITHM_CHOICES = [
+        ('greedy', 'Greedy (best score first)'),
+        ('optimal', 'Optimal assignment (maximum total score)'),
+        ('stable', 'Stable matching (student-proposing deferred acceptance)'),
+    ]
+
     round_number = models.IntegerField(default=1)
+    # pending, queued, running, cancelling, cancelled, completed or failed
     status = models.CharField(max_length=20, default='pending')
+    algorithm = models.CharField(max_length=20, choices=ALGORITHM_CHOICES, default='greedy')
     matched_count = models.IntegerField(default=0)
     total_students = models.IntegerField(default=0)
+    # Solver summary from the last run (scores, utilization, timings)
+    statistics = models.JSONField(default=dict, blank=True)
+    # Celery task of the latest background run
+    task_id = models.CharField(max_length=255, blank=True, null=True)
+    # Progress of an unfinished run: the last phase completed, its partial
+    # statistics and, once solved, the assignment that was about to be saved
+    checkpoint = models.JSONField(null=True, blank=True)
 
     def __str__(self):
         return f"MatchingRound #{self.round_number} - {self.status}"
 
+class Match(BaseModel):
+    """
+    A student placed with an organization by a matching round
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('APPROVED', 'Approved'),
+        ('REJECTED', 'Rejected'),
+    ]
+
+    matching_round = models.ForeignKey(MatchingRound, on_delete=models.CASCADE, related_name='matches')
+    student_profile = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='matches')
+    organization_profile = models.ForeignKey(OrganizationProfile, on_delete=models.CASCADE, related_name='matches')
+    area_of_law = models.ForeignKey(AreaOfLaw, on_delete=models.SET_NULL, null=True, blank=True)
+    match_score = models.FloatField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+
+    class Meta:
+        unique_together = ('matching_round', 'student_profile')
+        ordering = ['-match_score']
+
+    def __str__(self):
+        return f"{self.student_profile} -> {self.organization_profile} ({self.match_score:.3f})"
+
 class ImportLog(BaseModel):
     """
     Log of file imports with error details
     """
     file_name = models.CharField(max_length=200)
-    import_datetime = models.DateTimeField(auto_now_add=True)
+    import_datetime = models.DateTimeField(auto_now_add=True, db_index=True)
     import_type = models.CharField(max_length=50, choices=[
         ('csv', 'CSV Import'),
         ('pdf', 'PDF Grades'),
@@ -200,11 +329,41 @@ class ImportLog(BaseModel):
     imported_by = models.CharField(max_length=150, blank=True, null=True)
     success_count = models.IntegerField(default=0)
     error_count = models.IntegerField(default=0)
+    # PDFs served from the extraction cache instead of being parsed again
+    cache_hits = models.IntegerField(default=0)
     errors = models.TextField(blank=True, null=True)  # Stores JSON or text
     
     def __str__(self):
         return f"{self.import_type} - {self.file_name} ({self.import_datetime.strftime('%Y-%m-%d %H:%M')})"
 
+class PDFExtraction(BaseModel):
+    """
+    Content-addressed cache of text and grades extracted from a PDF, keyed
+    by the SHA-256 of the file bytes. Least recently used entries are
+    evicted beyond settings.PDF_CACHE_MAX_ENTRIES.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    text = models.TextField()
+    student_info = models.JSONField(null=True, blank=True)
+    grades = models.JSONField(default=dict, blank=True)
+    hit_count = models.IntegerField(default=0)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"PDF extraction {self.sha256[:12]} ({self.hit_count} hits)"
+
+class DashboardCounter(models.Model):
+    """
+    Materialized dashboard count, maintained incrementally by signals and
+    periodically reconciled against the source tables (see counters.py)
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
 class SystemSetting(BaseModel):
     """
     System-wide settings stored as key-value pairs with categories
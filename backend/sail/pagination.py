@@ -0,0 +1,31 @@
+"""
+backend/sail/pagination.py
+----------------------------------
+Default API pagination.
+"""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+from .search import SEARCH_RANK
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first, on the indexed (created_at, id) pair.
+
+    Pages are fetched with a range condition on the ordering columns instead
+    of an OFFSET, and no COUNT(*) is run, so every page costs the same
+    however large the table grows. Clients pick a page size with
+    ?page_size=, capped at settings.API_MAX_PAGE_SIZE. Views whose models
+    are ordered by another timestamp set ``cursor_ordering``; ranked search
+    results (see search.py) are paged best match first.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if SEARCH_RANK in queryset.query.annotations:
+            return (f'-{SEARCH_RANK}', '-id')
+        return getattr(view, 'cursor_ordering', None) or super().get_ordering(request, queryset, view)
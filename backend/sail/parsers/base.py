@@ -1,11 +1,26 @@
 # backend/sail/parsers/base.py
+import re
+import codecs
+import numpy as np
 import pandas as pd
 import logging
-from typing import List, Dict, Any, Tuple, Optional
-from ..models import ImportLog
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+from ..cache import bump_generation
+from ..models import ImportLog, AreaOfLaw
 
 logger = logging.getLogger(__name__)
 
+# Rows per DataFrame chunk when streaming CSV files
+CSV_CHUNK_SIZE = 5000
+
+# Bytes read up front to detect a CSV file's encoding
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# What undecodable bytes are read as
+REPLACEMENT_CHARACTER = '\ufffd'
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
 class BaseParser:
     """Base parser with common functionality for all import types"""
 
@@ -16,6 +31,7 @@ class BaseParser:
         self.imported_by = imported_by
         self.success_count = 0
         self.error_count = 0
+        self.cache_hits = 0
         self.errors = []
 
     def log_error(self, message: str, row_index: int = None, data: Dict = None):
@@ -29,6 +45,19 @@ class BaseParser:
         self.error_count += 1
         logger.error(f"Import error: {message}")
 
+    def log_warning(self, message: str, row_index: int = None, data: Dict = None):
+        """
+        Record something the importer should check, such as a fuzzy name
+        match, in the import log without counting it as an error
+        """
+        self.errors.append({
+            'message': message,
+            'row_index': row_index,
+            'data': data,
+            'level': 'warning'
+        })
+        logger.warning(f"Import warning: {message}")
+
     def create_import_log(self) -> ImportLog:
         """Create an import log entry"""
         import json
@@ -38,9 +67,12 @@ class BaseParser:
             imported_by=self.imported_by,
             success_count=self.success_count,
             error_count=self.error_count,
+            cache_hits=self.cache_hits,
             errors=json.dumps(self.errors)
         )
         log.save()
+        # The import may have written rows in bulk, without per-row signals
+        bump_generation()
         return log
 
     def validate_email(self, email: str) -> bool:
@@ -48,9 +80,7 @@ class BaseParser:
         if not email:
             return True  # Empty emails are allowed
 
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+        return bool(re.match(EMAIL_PATTERN, email))
 
 
 class CSVParser(BaseParser):
@@ -58,23 +88,72 @@ class CSVParser(BaseParser):
 
     def __init__(self, file_path: str, import_type: str, imported_by: str = None):
         super().__init__(file_path, import_type, imported_by)
+        self.df = None
 
-    def read_csv(self) -> pd.DataFrame:
-        """Read a CSV file into a DataFrame with flexible handling"""
+    def row_data(self, index) -> Dict:
+        """Raw values of a row of the DataFrame being imported, for error reports"""
+        return self.df.loc[index].to_dict()
+
+    def detect_encoding(self) -> str:
+        """
+        Pick the file encoding from a sample of its first bytes: UTF-8 (with
+        or without BOM) when the sample decodes cleanly, latin1 otherwise
+        """
+        with open(self.file_path, 'rb') as f:
+            sample = f.read(ENCODING_SAMPLE_BYTES)
+
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
         try:
-            # Try different encodings and delimiters for robustness
-            df = pd.read_csv(self.file_path, encoding='utf-8')
-            return df
+            # Incremental decoding tolerates a character cut off at the end of the sample
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
         except UnicodeDecodeError:
-            try:
-                df = pd.read_csv(self.file_path, encoding='latin1')
-                return df
-            except Exception as e:
-                self.log_error(f"Failed to read CSV: {str(e)}")
-                return pd.DataFrame()
+            return 'latin1'
+
+    def iter_csv(self, chunksize: int = CSV_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Stream the CSV file as DataFrames of at most chunksize rows, so memory
+        stays flat however large the file is. Cells are read as strings so
+        every chunk sees the same types, and row indexes run on across chunks.
+        Bytes that do not decode in the detected encoding (which is guessed
+        from the start of the file only) are replaced rather than failing
+        halfway through the file, and each row they were replaced in is
+        reported as an import error.
+        """
+        encoding = self.detect_encoding()
+        try:
+            with pd.read_csv(
+                self.file_path,
+                encoding=encoding,
+                encoding_errors='replace',
+                dtype=str,
+                chunksize=chunksize,
+            ) as reader:
+                for chunk in reader:
+                    self.log_replaced_bytes(chunk, encoding)
+                    yield chunk
         except Exception as e:
             self.log_error(f"Failed to read CSV: {str(e)}")
-            return pd.DataFrame()
+
+    def log_replaced_bytes(self, df: pd.DataFrame, encoding: str):
+        """Report the rows of a chunk holding U+FFFD replacement characters"""
+        replaced = pd.Series(False, index=df.index)
+        for column in df.columns:
+            replaced |= df[column].str.contains(REPLACEMENT_CHARACTER, regex=False, na=False)
+        if REPLACEMENT_CHARACTER in ''.join(map(str, df.columns)):
+            self.log_error(f"Header has bytes that are not valid {encoding}; they were replaced")
+        for index in df.index[replaced.to_numpy()].tolist():
+            self.log_error(
+                f"Row {index} has bytes that are not valid {encoding}; they were replaced",
+                index,
+                {"row": df.loc[index].to_dict()}
+            )
+
+    def read_csv(self) -> pd.DataFrame:
+        """Read a whole CSV file into a DataFrame"""
+        chunks = list(self.iter_csv())
+        return pd.concat(chunks) if chunks else pd.DataFrame()
 
     def get_column_map(self, df: pd.DataFrame, column_patterns: Dict[str, List[str]]) -> Dict[str, str]:
         """
@@ -101,4 +180,88 @@ class CSVParser(BaseParser):
             if not found:
                 self.log_error(f"Could not find column for {internal_name}")
 
-        return column_map
\ No newline at end of file
+        return column_map
+
+    def text_column(self, df: pd.DataFrame, column_map: Dict[str, str], key: str,
+                    drop_blank: bool = False) -> pd.Series:
+        """
+        Mapped column as an object Series of str, with missing cells (or an
+        unmapped column) as None. drop_blank also turns whitespace-only
+        cells into None.
+        """
+        if key not in column_map:
+            return pd.Series([None] * len(df), index=df.index, dtype=object)
+        values = df[column_map[key]]
+        text = values.astype(str).astype(object)
+        return self.set_none(text, values.isna() | (drop_blank & self.blank(text)))
+
+    def set_none(self, values: pd.Series, mask: pd.Series) -> pd.Series:
+        """Copy of an object Series with the masked cells set to None"""
+        values = values.copy()
+        values[mask] = None
+        return values
+
+    def split_column(self, values: pd.Series, sep: str = ';') -> List[Optional[List[str]]]:
+        """
+        Split separated cells into lists of stripped, non-empty items in one
+        pass over the column. Missing cells stay None.
+        """
+        values = values.reset_index(drop=True)
+        parts = values.str.split(sep).explode().str.strip()
+        keep = (parts.notna() & (parts != '')).to_numpy()
+        items = parts.to_numpy()[keep]
+        bounds = np.searchsorted(parts.index.to_numpy()[keep], np.arange(len(values) + 1))
+        return [
+            None if text is None else items[bounds[i]:bounds[i + 1]].tolist()
+            for i, text in enumerate(values.tolist())
+        ]
+
+    def valid_emails(self, values: pd.Series) -> pd.Series:
+        """Boolean mask of cells that are missing, empty or a valid email"""
+        values = values.fillna('')
+        return (values == '') | values.str.match(EMAIL_PATTERN)
+
+    def blank(self, values: pd.Series) -> pd.Series:
+        """Boolean mask of cells that are missing or whitespace only"""
+        return values.fillna('').str.strip() == ''
+
+    def length_errors(self, model, columns: Dict[str, pd.Series]) -> List[Optional[str]]:
+        """
+        Check text columns against the model fields' max_length so over-long
+        values are reported per row instead of failing a bulk write.
+
+        Returns:
+            Per row, an error message for the first over-long field or None
+        """
+        errors = [None] * len(next(iter(columns.values())))
+        for name, values in columns.items():
+            limit = model._meta.get_field(name).max_length
+            if not limit:
+                continue
+            for i in np.flatnonzero((values.str.len() > limit).to_numpy()):
+                errors[i] = errors[i] or (
+                    f"value too long for {model.__name__}.{name} (max {limit} characters)"
+                )
+        return errors
+
+    def resolve_areas(self, names) -> Dict[str, AreaOfLaw]:
+        """
+        Look up AreaOfLaw rows by name in one query, creating missing ones in bulk
+
+        Returns:
+            Dict mapping area name to AreaOfLaw
+        """
+        names = set(names)
+        if not names:
+            return {}
+
+        areas = {area.name: area for area in AreaOfLaw.objects.filter(name__in=names)}
+        missing = names - areas.keys()
+        if missing:
+            AreaOfLaw.objects.bulk_create(
+                [AreaOfLaw(name=name) for name in missing], ignore_conflicts=True
+            )
+            areas.update(
+                (area.name, area) for area in AreaOfLaw.objects.filter(name__in=missing)
+            )
+        return areas
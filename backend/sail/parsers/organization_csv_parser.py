@@ -1,10 +1,23 @@
 # backend/sail/parsers/organization_csv_parser.py
 import pandas as pd
+from dataclasses import dataclass
+from itertools import chain
 from typing import Dict, List, Any, Optional, Tuple
 from django.db import transaction
 
 from .base import CSVParser
-from ..models import OrganizationProfile, AreaOfLaw
+from ..fuzzy import similar_organizations, unique_match
+from ..models import OrganizationProfile
+
+
+@dataclass
+class OrganizationRecord:
+    """One validated CSV row, ready to be written"""
+    index: int
+    name: str
+    fields: Dict[str, Any]
+    areas: Optional[List[str]] = None
+
 
 class OrganizationCSVParser(CSVParser):
     """Parser for organization data from CSV files"""
@@ -22,21 +35,30 @@ class OrganizationCSVParser(CSVParser):
             'phone': ['phone', 'phone number', 'contact phone'],
             'website': ['website', 'url', 'site'],
             'requirements': ['requirements', 'prerequisites', 'qualifications'],
+            'work_modes': ['work mode', 'work arrangement', 'work type'],
             'positions': ['positions', 'available positions', 'openings'],
             'is_active': ['active', 'is active', 'status']
         }
 
-    def parse(self) -> Tuple[List[OrganizationProfile], List[Dict]]:
+    def parse(self, return_objects: bool = True) -> Tuple[List[OrganizationProfile], List[Dict]]:
         """
         Parse the CSV file and create/update organization records
 
+        The file is streamed in chunks of CSV_CHUNK_SIZE rows; each chunk is
+        validated column-wise and written before the next is read.
+
+        Args:
+            return_objects: Collect the saved organizations for the result.
+                Pass False for very large files to keep memory flat.
+
         Returns:
             Tuple containing:
                 - List of created/updated OrganizationProfile objects
                 - List of error dictionaries
         """
-        df = self.read_csv()
-        if df.empty:
+        chunks = self.iter_csv()
+        df = next(chunks, None)
+        if df is None or df.empty:
             return [], self.errors
 
         # Get column mappings
@@ -47,90 +69,161 @@ class OrganizationCSVParser(CSVParser):
             self.log_error("Missing required column: 'name'")
             return [], self.errors
 
-        # Process each row
         created_or_updated = []
+        areas = {}
+        for df in chain([df], chunks):
+            saved = self.import_chunk(df, column_map, areas)
+            self.success_count += len(saved)
+            if return_objects:
+                created_or_updated.extend(saved)
 
-        for index, row in df.iterrows():
-            try:
-                with transaction.atomic():
-                    # Extract name with safeguards
-                    org_name = str(row[column_map['name']])
+        # Create import log
+        self.create_import_log()
+
+        return created_or_updated, self.errors
+
+    def import_chunk(self, df: pd.DataFrame, column_map: Dict[str, str],
+                     areas: Dict[str, Any]) -> List[OrganizationProfile]:
+        """
+        Validate and write one DataFrame chunk. Areas of law resolved for
+        earlier chunks are reused from areas, which is updated in place.
+        """
+        self.df = df
+        records = self.build_records(df, column_map)
+
+        names = {name for record in records if record.areas for name in record.areas}
+        areas.update(self.resolve_areas(names - areas.keys()))
 
-                    # Skip empty rows
-                    if pd.isna(org_name) or org_name.strip() == '':
-                        continue
+        # Process each row
+        saved = []
 
-                    # Get or create organization
-                    org, created = OrganizationProfile.objects.get_or_create(
-                        name=org_name
+        for record in records:
+            try:
+                with transaction.atomic():
+                    # Same name, else a near-identical one, else a new organization
+                    org = (
+                        OrganizationProfile.objects.filter(name=record.name).first()
+                        or self.similar_organization(record)
+                        or OrganizationProfile(name=record.name)
                     )
 
-                    # Update fields
-                    if 'description' in column_map and not pd.isna(row[column_map['description']]):
-                        org.description = str(row[column_map['description']])
-
-                    if 'location' in column_map and not pd.isna(row[column_map['location']]):
-                        org.location = str(row[column_map['location']])
-
-                    # Handle email with validation
-                    if 'email' in column_map and not pd.isna(row[column_map['email']]):
-                        email = str(row[column_map['email']])
-                        if not self.validate_email(email):
-                            self.log_error(
-                                f"Invalid email format: {email}",
-                                index,
-                                {"organization": org_name}
-                            )
-                        else:
-                            org.email = email
-
-                    # Handle other fields
-                    for field, column in [
-                        ('phone', 'phone'),
-                        ('website', 'website'),
-                        ('requirements', 'requirements'),
-                    ]:
-                        if column in column_map and not pd.isna(row[column_map[column]]):
-                            setattr(org, field, str(row[column_map[column]]))
-
-                    # Handle positions as integer
-                    if 'positions' in column_map and not pd.isna(row[column_map['positions']]):
-                        try:
-                            positions = int(row[column_map['positions']])
-                            org.available_positions = positions
-                        except ValueError:
-                            self.log_error(
-                                f"Invalid positions value: {row[column_map['positions']]}",
-                                index,
-                                {"organization": org_name}
-                            )
-
-                    # Handle is_active as boolean
-                    if 'is_active' in column_map and not pd.isna(row[column_map['is_active']]):
-                        value = str(row[column_map['is_active']]).lower()
-                        org.is_active = value in ['true', 'yes', 'y', '1', 'active']
-
-                    # Save organization first
+                    for field, value in record.fields.items():
+                        setattr(org, field, value)
                     org.save()
 
-                    # Handle areas of law
-                    if 'areas_of_law' in column_map and not pd.isna(row[column_map['areas_of_law']]):
-                        areas_text = str(row[column_map['areas_of_law']])
-                        area_names = [area.strip() for area in areas_text.split(';') if area.strip()]
-
-                        # Clear existing areas and add new ones
-                        org.areas_of_law.clear()
-                        for area_name in area_names:
-                            area, _ = AreaOfLaw.objects.get_or_create(name=area_name)
-                            org.areas_of_law.add(area)
+                    # Replace areas of law when the row lists them
+                    if record.areas is not None:
+                        org.areas_of_law.set([areas[name] for name in record.areas])
 
-                    created_or_updated.append(org)
-                    self.success_count += 1
+                    saved.append(org)
 
             except Exception as e:
-                self.log_error(f"Error processing row {index}: {str(e)}", index, {"row": row.to_dict()})
+                self.log_error(
+                    f"Error processing row {record.index}: {str(e)}",
+                    record.index,
+                    {"row": self.row_data(record.index)}
+                )
 
-        # Create import log
-        self.create_import_log()
+        return saved
 
-        return created_or_updated, self.errors
\ No newline at end of file
+    def similar_organization(self, record: OrganizationRecord) -> Optional[OrganizationProfile]:
+        """
+        The one existing organization whose name nearly matches the row's,
+        so spelling variants update it instead of creating a duplicate
+        """
+        org = unique_match(similar_organizations(record.name, limit=2))
+        if org:
+            self.log_warning(
+                f"Row {record.index}: matched '{record.name}' to existing organization "
+                f"'{org.name}' ({org.similarity:.2f})",
+                record.index,
+                {"organization": record.name, "matched_id": str(org.pk), "matched_name": org.name,
+                 "similarity": round(org.similarity, 4)}
+            )
+        return org
+
+    def build_records(self, df: pd.DataFrame, column_map: Dict[str, str]) -> List[OrganizationRecord]:
+        """
+        Turn the DataFrame into OrganizationRecords with column-level pandas
+        operations, logging row-level validation errors in row order.
+        Rows without a name are skipped.
+        """
+        def column(key):
+            return self.text_column(df, column_map, key)
+
+        names = column('name')
+        has_name = ~self.blank(names)
+
+        text_fields = {
+            field: column(field).tolist()
+            for field in ['description', 'location', 'phone', 'website', 'requirements']
+        }
+
+        emails = column('email')
+        valid_email = self.valid_emails(emails)
+
+        work_modes = self.split_column(column('work_modes'))
+        areas = self.split_column(column('areas_of_law'))
+
+        # Positions as whole, non-negative numbers; anything else is reported
+        if 'positions' in column_map:
+            raw_positions = df[column_map['positions']]
+            numeric = pd.to_numeric(raw_positions, errors='coerce')
+            bad = raw_positions.notna() & ~(numeric.notna() & (numeric % 1 == 0) & (numeric >= 0))
+            positions = [None if bad_row or pd.isna(n) else int(n) for n, bad_row in zip(numeric.tolist(), bad)]
+            bad_positions = bad.tolist()
+            raw_positions = raw_positions.tolist()
+        else:
+            bad_positions = positions = raw_positions = [None] * len(df)
+
+        # is_active as boolean
+        active_text = column('is_active')
+        is_active = active_text.str.lower().isin(['true', 'yes', 'y', '1', 'active']).tolist()
+        has_active = active_text.notna().tolist()
+
+        names, has_name = names.tolist(), has_name.tolist()
+        emails, valid_email = emails.tolist(), valid_email.tolist()
+
+        records = []
+        for i, index in enumerate(df.index.tolist()):
+            # Skip empty rows
+            if not has_name[i]:
+                continue
+            org_name = names[i]
+
+            fields = {field: values[i] for field, values in text_fields.items() if values[i] is not None}
+
+            # Handle email with validation
+            if emails[i] is not None:
+                if not valid_email[i]:
+                    self.log_error(
+                        f"Invalid email format: {emails[i]}",
+                        index,
+                        {"organization": org_name}
+                    )
+                else:
+                    fields['email'] = emails[i]
+
+            if work_modes[i] is not None:
+                fields['work_modes'] = work_modes[i]
+
+            if bad_positions[i]:
+                self.log_error(
+                    f"Invalid positions value: {raw_positions[i]}",
+                    index,
+                    {"organization": org_name}
+                )
+            elif positions[i] is not None:
+                fields['available_positions'] = positions[i]
+
+            if has_active[i]:
+                fields['is_active'] = is_active[i]
+
+            records.append(OrganizationRecord(
+                index=index,
+                name=org_name,
+                fields=fields,
+                areas=areas[i],
+            ))
+
+        return records
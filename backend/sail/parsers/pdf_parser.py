@@ -5,28 +5,104 @@ Purpose: Parser for extracting grade information from PDF files
 
 import re
 import io
+import os
+import hashlib
 import logging
+import zipfile
+from functools import reduce
+from operator import or_
 from typing import Dict, List, Any, Optional, Tuple
 import pdfplumber
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
 
 from .base import BaseParser
-from ..models import StudentProfile, StudentGrade
+from ..fuzzy import similar_students, unique_match
+from ..grades import GRADE_FIELDS
+from ..models import StudentProfile, StudentGrade, PDFExtraction
 
 logger = logging.getLogger(__name__)
 
+NO_STUDENT_INFO = "Could not find student ID or name in PDF"
+
+
+def content_digest(content: bytes) -> str:
+    """SHA-256 hex digest of a file's bytes, the key of the extraction cache"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def cached_extractions(digests) -> Dict[str, Dict[str, Any]]:
+    """
+    Look up cached PDF extractions in one query and mark them as recently
+    used. Returns {digest: {'text', 'student_info', 'grades'}} for the hits.
+    """
+    entries = {
+        entry.sha256: {'text': entry.text, 'student_info': entry.student_info, 'grades': entry.grades}
+        for entry in PDFExtraction.objects.filter(sha256__in=set(digests))
+    }
+    if entries:
+        PDFExtraction.objects.filter(sha256__in=list(entries)).update(
+            last_used_at=timezone.now(), hit_count=F('hit_count') + 1
+        )
+    return entries
+
+
+def store_extractions(entries: List[Dict[str, Any]]):
+    """
+    Add freshly extracted PDFs ({'sha256', 'text', 'student_info', 'grades'})
+    to the cache, then evict the least recently used entries beyond
+    settings.PDF_CACHE_MAX_ENTRIES
+    """
+    if not entries:
+        return
+    PDFExtraction.objects.bulk_create(
+        [
+            PDFExtraction(
+                sha256=entry['sha256'], text=entry['text'],
+                student_info=entry['student_info'], grades=entry['grades'],
+            )
+            for entry in entries
+        ],
+        ignore_conflicts=True,
+    )
+
+    excess = PDFExtraction.objects.count() - settings.PDF_CACHE_MAX_ENTRIES
+    if excess > 0:
+        stale = PDFExtraction.objects.order_by('last_used_at').values_list('pk', flat=True)[:excess]
+        PDFExtraction.objects.filter(pk__in=list(stale)).delete()
+
+
+def similar_student(parser: BaseParser, file_name: str, first_name: str,
+                    last_name: str) -> Optional[StudentProfile]:
+    """
+    The one student whose name nearly matches, for names with no exact
+    match. The match is recorded as a warning in the parser's import log.
+    """
+    student = unique_match(similar_students(f"{first_name} {last_name}", limit=2))
+    if student:
+        parser.log_warning(
+            f"{file_name}: matched '{first_name} {last_name}' to similar name "
+            f"'{student.first_name} {student.last_name}' ({student.similarity:.2f})",
+            data={'file_name': file_name, 'matched_id': str(student.pk),
+                  'matched_student_id': student.student_id, 'similarity': round(student.similarity, 4)}
+        )
+    return student
+
+
 class PDFGradeParser(BaseParser):
     """Parser for student grade data from PDF files"""
 
     def __init__(self, file_path: str, imported_by: str = None):
         super().__init__(file_path, 'pdf', imported_by)
 
-    def extract_text_from_pdf(self) -> str:
-        """Extract all text from a PDF file"""
+    def extract_text_from_pdf(self, source=None) -> str:
+        """Extract all text from a PDF file (or an open file-like source)"""
         try:
-            with pdfplumber.open(self.file_path) as pdf:
+            with pdfplumber.open(source or self.file_path) as pdf:
                 text = ""
                 for page in pdf.pages:
-                    text += page.extract_text() + "\n"
+                    text += (page.extract_text() or "") + "\n"
                 return text
         except Exception as e:
             self.log_error(f"Failed to extract text from PDF: {str(e)}")
@@ -46,7 +122,7 @@ class PDFGradeParser(BaseParser):
         name_match = re.search(r'(?:Name|Student)[\s:]+([A-Za-z\s,.-]+)', text, re.IGNORECASE)
 
         if not id_match and not name_match:
-            self.log_error("Could not find student ID or name in PDF")
+            self.log_error(NO_STUDENT_INFO)
             return None
 
         student_info = {}
@@ -101,6 +177,39 @@ class PDFGradeParser(BaseParser):
 
         return grades
 
+    def extract(self) -> Optional[Dict[str, Any]]:
+        """
+        Text, student info and grades of the PDF. Files whose bytes were
+        extracted before are served from the content-hash cache without
+        running pdfplumber again.
+        """
+        try:
+            with open(self.file_path, 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            self.log_error(f"Failed to extract text from PDF: {str(e)}")
+            return None
+        digest = content_digest(content)
+
+        cached = cached_extractions([digest]).get(digest)
+        if cached:
+            self.cache_hits += 1
+            if not cached['student_info']:
+                self.log_error(NO_STUDENT_INFO)
+            return cached
+
+        text = self.extract_text_from_pdf(io.BytesIO(content))
+        if not text:
+            return None
+        extraction = {
+            'sha256': digest,
+            'text': text,
+            'student_info': self.parse_student_info(text),
+            'grades': self.parse_grades(text),
+        }
+        store_extractions([extraction])
+        return extraction
+
     def parse(self) -> Tuple[List[StudentGrade], List[Dict]]:
         """
         Parse the PDF file and update student grade records
@@ -110,12 +219,11 @@ class PDFGradeParser(BaseParser):
                 - List of created/updated StudentGrade objects
                 - List of error dictionaries
         """
-        text = self.extract_text_from_pdf()
-        if not text:
+        extraction = self.extract()
+        if not extraction:
             return [], self.errors
 
-        # Parse student information
-        student_info = self.parse_student_info(text)
+        student_info = extraction['student_info']
         if not student_info:
             return [], self.errors
 
@@ -134,15 +242,21 @@ class PDFGradeParser(BaseParser):
                     first_name=student_info['first_name'],
                     last_name=student_info['last_name']
                 )
-            except (StudentProfile.DoesNotExist, StudentProfile.MultipleObjectsReturned):
+            except StudentProfile.DoesNotExist:
+                # Tolerate OCR and spelling slips in the name
+                student = similar_student(
+                    self, self.file_name, student_info['first_name'], student_info['last_name']
+                )
+            except StudentProfile.MultipleObjectsReturned:
+                pass
+            if not student:
                 error_msg = f"Could not uniquely identify student: {student_info.get('first_name', '')} {student_info.get('last_name', '')}"
                 self.log_error(error_msg)
 
         if not student:
             return [], self.errors
 
-        # Parse grades
-        grades_data = self.parse_grades(text)
+        grades_data = extraction['grades']
         if not grades_data:
             self.log_error(f"No grades found for student {student.student_id}")
             return [], self.errors
@@ -166,3 +280,195 @@ class PDFGradeParser(BaseParser):
         except Exception as e:
             self.log_error(f"Error saving grades: {str(e)}")
             return [], self.errors
+
+
+def extract_pdf_entry(zip_path: str, member: str) -> Dict[str, Any]:
+    """
+    Extract student info and grades from one PDF inside a ZIP archive.
+
+    Runs as a Celery task, so it does no database work
+    and returns only JSON-serializable data.
+    """
+    parser = PDFGradeParser(member)
+    digest, text, student_info, grades = None, None, None, {}
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            content = archive.read(member)
+        digest = content_digest(content)
+        text = parser.extract_text_from_pdf(io.BytesIO(content))
+        if text:
+            student_info = parser.parse_student_info(text)
+            grades = parser.parse_grades(text)
+    except Exception as e:
+        parser.log_error(f"Failed to read PDF from archive: {str(e)}")
+
+    return {
+        'file_name': member,
+        'sha256': digest,
+        'text': text,
+        'student_info': student_info,
+        'grades': grades,
+        'errors': parser.errors,
+        'cache_hit': False,
+    }
+
+
+def cached_entry(member: str, digest: str, extraction: Dict[str, Any]) -> Dict[str, Any]:
+    """Result of extract_pdf_entry for a PDF whose extraction is already known"""
+    errors = extraction.get('errors')
+    if errors is None:
+        errors = [] if extraction['student_info'] else [{'message': NO_STUDENT_INFO}]
+    return {
+        'file_name': member,
+        'sha256': digest,
+        'text': extraction['text'],
+        'student_info': extraction['student_info'],
+        'grades': extraction['grades'],
+        'errors': errors,
+        'cache_hit': True,
+    }
+
+
+def extract_cached_pdf_entry(zip_path: str, member: str) -> Dict[str, Any]:
+    """extract_pdf_entry that first looks the PDF's bytes up in the extraction cache"""
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            digest = content_digest(archive.read(member))
+    except Exception:
+        return extract_pdf_entry(zip_path, member)
+
+    cached = cached_extractions([digest]).get(digest)
+    if cached:
+        return cached_entry(member, digest, cached)
+    return extract_pdf_entry(zip_path, member)
+
+
+class PDFBatchGradeParser(BaseParser):
+    """
+    Parser for a ZIP archive of grade PDFs
+
+    Each PDF is extracted by its own extract_pdf_grades_task (see
+    start_pdf_batch); the chord callback then matches the results to
+    students and writes them back in bulk, with a single ImportLog for the
+    whole archive.
+    """
+
+    def __init__(self, file_path: str, imported_by: str = None):
+        super().__init__(file_path, 'pdf', imported_by)
+
+    def pdf_members(self) -> List[str]:
+        """Names of the PDF files in the archive, skipping macOS resource forks"""
+        with zipfile.ZipFile(self.file_path) as archive:
+            return [
+                info.filename for info in archive.infolist()
+                if not info.is_dir()
+                and info.filename.lower().endswith('.pdf')
+                and not info.filename.startswith('__MACOSX/')
+                and not os.path.basename(info.filename).startswith('._')
+            ]
+
+    def find_students(self, results: List[Dict[str, Any]]) -> Dict[str, StudentProfile]:
+        """
+        Resolve the students of all extracted PDFs, keyed by file name.
+
+        All student IDs are looked up in one student_id__in query; PDFs
+        whose ID is missing or unknown fall back to a single name query,
+        then to a trigram lookup for names with no exact match.
+        """
+        infos = {r['file_name']: r['student_info'] for r in results if r['student_info']}
+
+        by_id = {}
+        ids = {info['student_id'] for info in infos.values() if 'student_id' in info}
+        for student in StudentProfile.objects.filter(student_id__in=ids):
+            by_id.setdefault(student.student_id, []).append(student)
+
+        found, by_name = {}, {}
+        for file_name, info in infos.items():
+            matches = by_id.get(info.get('student_id'), [])
+            if len(matches) == 1:
+                found[file_name] = matches[0]
+                continue
+            if 'student_id' in info:
+                self.log_error(
+                    f"{file_name}: No student found with ID: {info['student_id']}",
+                    data={'file_name': file_name}
+                )
+            if 'first_name' in info and 'last_name' in info:
+                by_name[file_name] = (info['first_name'], info['last_name'])
+
+        if by_name:
+            students = {}
+            query = reduce(or_, (Q(first_name=first, last_name=last) for first, last in set(by_name.values())))
+            for student in StudentProfile.objects.filter(query):
+                students.setdefault((student.first_name, student.last_name), []).append(student)
+            for file_name, name in by_name.items():
+                matches = students.get(name, [])
+                if not matches:
+                    matches = [student for student in [similar_student(self, file_name, *name)] if student]
+                if len(matches) == 1:
+                    found[file_name] = matches[0]
+                else:
+                    self.log_error(
+                        f"{file_name}: Could not uniquely identify student: {name[0]} {name[1]}",
+                        data={'file_name': file_name}
+                    )
+        return found
+
+    def save_results(self, results: List[Dict[str, Any]]) -> List[StudentGrade]:
+        """
+        Write extracted grades back with one StudentGrade upsert
+
+        Returns:
+            List of created/updated StudentGrade objects
+        """
+        for result in results:
+            for error in result['errors']:
+                self.log_error(f"{result['file_name']}: {error['message']}", data={'file_name': result['file_name']})
+
+        self.cache_hits = sum(1 for result in results if result.get('cache_hit'))
+        store_extractions([
+            result for result in results if not result.get('cache_hit') and result.get('text')
+        ])
+
+        students = self.find_students(results)
+
+        grades_by_student = {}
+        for result in results:
+            student = students.get(result['file_name'])
+            if not student:
+                continue
+            if not result['grades']:
+                self.log_error(
+                    f"{result['file_name']}: No grades found for student {student.student_id}",
+                    data={'file_name': result['file_name']}
+                )
+                continue
+            # Later PDFs for the same student win field by field
+            grades_by_student.setdefault(student, {}).update(result['grades'])
+            self.success_count += 1
+
+        if not grades_by_student:
+            return []
+
+        current = {
+            grades.student_profile_id: grades
+            for grades in StudentGrade.objects.filter(student_profile__in=list(grades_by_student))
+        }
+        upserts = []
+        for student, values in grades_by_student.items():
+            grades = current.get(student.pk) or StudentGrade(student_profile=student)
+            for field, value in values.items():
+                setattr(grades, field, value)
+            grades.compute_grade_points()
+            upserts.append(grades)
+
+        try:
+            StudentGrade.objects.bulk_create(
+                upserts, update_conflicts=True, unique_fields=['student_profile'],
+                update_fields=list(GRADE_FIELDS) + ['course_points', 'gpa', 'updated_at']
+            )
+        except Exception as e:
+            self.log_error(f"Error saving grades: {str(e)}")
+            self.success_count = 0
+            return []
+        return upserts
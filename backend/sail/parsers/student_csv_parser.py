@@ -4,11 +4,37 @@ Purpose: Parser for importing student data from CSV files
 """
 
 import pandas as pd
+from dataclasses import dataclass
+from itertools import chain
 from typing import Dict, List, Any, Optional, Tuple
 from django.db import transaction
 
 from .base import CSVParser
-from ..models import StudentProfile, AreaOfLaw, StudentAreaRanking, SelfProposedExternship
+from ..counters import deferred_counters
+from ..models import StudentProfile, StudentAreaRanking, SelfProposedExternship
+
+# Students written per bulk statement batch
+BULK_CHUNK_SIZE = 500
+
+# StudentProfile fields a CSV row can set
+PROFILE_FIELDS = [
+    'first_name', 'last_name', 'email', 'backup_email', 'program',
+    'statements_of_interest', 'location_preferences', 'location_preferences_text',
+    'work_preferences', 'work_preferences_text', 'updated_at',
+]
+
+SELF_PROPOSED_FIELDS = ['organization', 'supervisor', 'supervisor_email', 'updated_at']
+
+
+@dataclass
+class StudentRecord:
+    """One validated CSV row, ready to be written"""
+    index: int
+    student_id: str
+    fields: Dict[str, Any]
+    areas: List[Tuple[str, int]]
+    self_proposed: Optional[Dict[str, str]] = None
+
 
 class StudentCSVParser(CSVParser):
     """Parser for student data from CSV files"""
@@ -41,17 +67,30 @@ class StudentCSVParser(CSVParser):
             'self_prop_email': ['supervisor email', 'self-proposed email'],
         }
 
-    def parse(self) -> Tuple[List[StudentProfile], List[Dict]]:
+    def parse(self, return_objects: bool = True) -> Tuple[List[StudentProfile], List[Dict]]:
         """
         Parse the CSV file and create/update student records
 
+        The file is streamed in chunks of CSV_CHUNK_SIZE rows and each chunk
+        goes through the whole pipeline before the next is read: rows are
+        turned into typed records with column-level pandas operations, areas
+        of law and existing profiles are resolved in one query each, and
+        students are written in batches of BULK_CHUNK_SIZE with bulk
+        statements. A batch that fails is split and retried so errors are
+        still reported against their rows.
+
+        Args:
+            return_objects: Collect the saved profiles for the result. Pass
+                False for very large files to keep memory flat.
+
         Returns:
             Tuple containing:
                 - List of created/updated StudentProfile objects
                 - List of error dictionaries
         """
-        df = self.read_csv()
-        if df.empty:
+        chunks = self.iter_csv()
+        df = next(chunks, None)
+        if df is None or df.empty:
             return [], self.errors
 
         # Get column mappings
@@ -66,132 +105,257 @@ class StudentCSVParser(CSVParser):
             self.log_error(f"Missing required columns: {missing_names}")
             return [], self.errors
 
-        # Process each row
         created_or_updated = []
+        areas = {}
+        # Bulk writes skip the per-row counter signals; recount once at the end
+        with deferred_counters():
+            for df in chain([df], chunks):
+                saved = self.import_chunk(df, column_map, areas)
+                self.success_count += len(saved)
+                if return_objects:
+                    created_or_updated.extend(saved)
 
-        for index, row in df.iterrows():
-            try:
-                with transaction.atomic():
-                    # Extract basic info with safeguards
-                    student_id = str(row[column_map['student_id']])
+        # Create import log
+        self.create_import_log()
 
-                    # Skip empty rows
-                    if pd.isna(student_id) or student_id.strip() == '':
-                        continue
+        return created_or_updated, self.errors
 
-                    # Get or create student profile
-                    student, created = StudentProfile.objects.get_or_create(
-                        student_id=student_id
+    def import_chunk(self, df: pd.DataFrame, column_map: Dict[str, str],
+                     areas: Dict[str, Any]) -> List[StudentProfile]:
+        """
+        Validate and write one DataFrame chunk. Areas of law resolved for
+        earlier chunks are reused from areas, which is updated in place.
+        """
+        self.df = df
+        records = self.build_records(df, column_map)
+
+        names = {name for record in records for name, _ in record.areas}
+        areas.update(self.resolve_areas(names - areas.keys()))
+
+        existing = {}
+        for student in StudentProfile.objects.filter(
+            student_id__in={record.student_id for record in records}
+        ):
+            existing.setdefault(student.student_id, []).append(student)
+
+        # Rows sharing a student ID are applied in file order to one profile
+        groups = {}
+        for record in records:
+            matches = existing.get(record.student_id, [])
+            if len(matches) > 1:
+                self.log_error(
+                    f"Error processing row {record.index}: {len(matches)} existing "
+                    f"students with ID {record.student_id}",
+                    record.index,
+                    {"row": self.row_data(record.index)}
+                )
+                continue
+            groups.setdefault(record.student_id, []).append(record)
+
+        saved = []
+        items = list(groups.items())
+        for start in range(0, len(items), BULK_CHUNK_SIZE):
+            saved.extend(self.save_chunk(items[start:start + BULK_CHUNK_SIZE], areas, existing))
+        return saved
+
+    def save_chunk(self, chunk, areas, existing) -> List[StudentProfile]:
+        """
+        Save a chunk in one transaction. If it fails, the chunk is split in
+        half and retried until the failing students are isolated, and their
+        rows are reported with the database error.
+        """
+        try:
+            with transaction.atomic():
+                return self.save_students(chunk, areas, existing)
+        except Exception as e:
+            if len(chunk) > 1:
+                middle = len(chunk) // 2
+                return (self.save_chunk(chunk[:middle], areas, existing)
+                        + self.save_chunk(chunk[middle:], areas, existing))
+            for record in chunk[0][1]:
+                self.log_error(
+                    f"Error processing row {record.index}: {str(e)}",
+                    record.index,
+                    {"row": self.row_data(record.index)}
+                )
+            return []
+
+    def build_records(self, df: pd.DataFrame, column_map: Dict[str, str]) -> List[StudentRecord]:
+        """
+        Turn the DataFrame into StudentRecords. All cleaning and validation
+        runs once per column with pandas string operations; the final loop
+        only assembles records and logs row-level errors in row order.
+        Rows without a student ID are skipped.
+        """
+        def column(key, drop_blank=False):
+            return self.text_column(df, column_map, key, drop_blank)
+
+        ids = column('student_id')
+        has_id = ~self.blank(ids)
+
+        fields = {
+            field: column(field)
+            for field in ['first_name', 'last_name', 'email', 'backup_email', 'program']
+        }
+
+        # Area rankings keep their column number as the rank; blank cells are skipped
+        areas = [column(f'area_{i}', drop_blank=True) for i in range(1, 6)]
+        duplicate = pd.Series(False, index=df.index)
+        for i in range(len(areas)):
+            for j in range(i + 1, len(areas)):
+                duplicate |= areas[i].notna() & (areas[i] == areas[j])
+
+        statements = [column(f'statement_{i}', drop_blank=True).tolist() for i in range(1, 6)]
+
+        locations = column('location_pref')
+        work = column('work_pref')
+
+        proposal = {
+            'organization': column('self_prop_org'),
+            'supervisor': column('self_prop_sup'),
+            'supervisor_email': column('self_prop_email'),
+        }
+        has_proposal = pd.concat(proposal.values(), axis=1).notna().any(axis=1)
+        valid_email = self.valid_emails(proposal['supervisor_email'])
+        proposal['supervisor_email'] = self.set_none(proposal['supervisor_email'], ~valid_email)
+
+        # Over-long values would fail a whole bulk chunk, so reject their rows up front
+        profile_too_long = self.length_errors(StudentProfile, fields)
+        proposal_too_long = self.length_errors(
+            SelfProposedExternship, {field: self.set_none(values, ~has_proposal) for field, values in proposal.items()}
+        )
+
+        ids, has_id, duplicate = ids.tolist(), has_id.tolist(), duplicate.tolist()
+        fields = {field: values.tolist() for field, values in fields.items()}
+        areas = [values.tolist() for values in areas]
+        location_lists, locations = self.split_column(locations), locations.tolist()
+        work_lists, work = self.split_column(work), work.tolist()
+        has_proposal, valid_email = has_proposal.tolist(), valid_email.tolist()
+        raw_emails = column('self_prop_email').tolist()
+        proposal = {field: values.tolist() for field, values in proposal.items()}
+
+        records = []
+        for i, index in enumerate(df.index.tolist()):
+            # Skip empty rows
+            if not has_id[i]:
+                continue
+            student_id = ids[i]
+
+            area_ranks = [(names[i], rank) for rank, names in enumerate(areas, 1) if names[i] is not None]
+            if duplicate[i]:
+                self.log_error(
+                    "Duplicate area of law rankings found",
+                    index,
+                    {"student_id": student_id, "areas": [name for name, _ in area_ranks]}
+                )
+                # The rankings' unique constraint would reject the row on save
+                self.log_error(
+                    f"Error processing row {index}: Duplicate area of law rankings",
+                    index,
+                    {"row": self.row_data(index)}
+                )
+                continue
+
+            record_fields = {field: values[i] for field, values in fields.items() if values[i] is not None}
+
+            row_statements = [values[i] for values in statements if values[i] is not None]
+            if row_statements:
+                record_fields['statements_of_interest'] = row_statements
+
+            if locations[i] is not None:
+                record_fields['location_preferences'] = location_lists[i]
+                record_fields['location_preferences_text'] = locations[i]
+
+            if work[i] is not None:
+                record_fields['work_preferences'] = work_lists[i]
+                record_fields['work_preferences_text'] = work[i]
+
+            self_proposed = None
+            if has_proposal[i]:
+                self_proposed = {field: values[i] for field, values in proposal.items() if values[i] is not None}
+                if not valid_email[i]:
+                    self.log_error(
+                        f"Invalid supervisor email format: {raw_emails[i]}",
+                        index,
+                        {"student_id": student_id}
                     )
 
-                    # Update basic fields
-                    for field, column in [
-                        ('first_name', 'first_name'),
-                        ('last_name', 'last_name'),
-                        ('email', 'email'),
-                        ('backup_email', 'backup_email'),
-                        ('program', 'program'),
-                    ]:
-                        if column in column_map and not pd.isna(row[column_map[column]]):
-                            setattr(student, field, row[column_map[column]])
-
-                    # Process area rankings
-                    area_ranks = []
-                    for i in range(1, 6):
-                        area_key = f'area_{i}'
-                        if area_key in column_map and not pd.isna(row[column_map[area_key]]):
-                            area_name = str(row[column_map[area_key]])
-                            if area_name.strip():
-                                area, _ = AreaOfLaw.objects.get_or_create(name=area_name)
-                                area_ranks.append((area, i))
-
-                    # Validate rankings (no duplicates)
-                    area_names = [area.name for area, _ in area_ranks]
-                    if len(area_names) != len(set(area_names)):
-                        self.log_error(
-                            "Duplicate area of law rankings found",
-                            index,
-                            {"student_id": student_id, "areas": area_names}
-                        )
-
-                    # Save student first to enable foreign key relationships
-                    student.save()
-
-                    # Clear existing rankings and create new ones
-                    StudentAreaRanking.objects.filter(student_profile=student).delete()
-                    for area, rank in area_ranks:
-                        StudentAreaRanking.objects.create(
-                            student_profile=student,
-                            area=area,
-                            rank=rank
-                        )
-
-                    # Store statements of interest
-                    statements = []
-                    for i in range(1, 6):
-                        stmt_key = f'statement_{i}'
-                        if stmt_key in column_map and not pd.isna(row[column_map[stmt_key]]):
-                            stmt = str(row[column_map[stmt_key]])
-                            if stmt.strip():
-                                statements.append(stmt)
-
-                    # Store statements as array
-                    if statements:
-                        student.statements_of_interest = statements
-
-                    # Handle location preferences
-                    if 'location_pref' in column_map and not pd.isna(row[column_map['location_pref']]):
-                        locs = str(row[column_map['location_pref']])
-                        student.location_preferences = [loc.strip() for loc in locs.split(';') if loc.strip()]
-                        student.location_preferences_text = locs
-
-                    # Handle work preferences
-                    if 'work_pref' in column_map and not pd.isna(row[column_map['work_pref']]):
-                        prefs = str(row[column_map['work_pref']])
-                        student.work_preferences = [pref.strip() for pref in prefs.split(';') if pref.strip()]
-                        student.work_preferences_text = prefs
-
-                    # Handle self-proposed externship
-                    has_self_proposed = False
-                    for field in ['self_prop_org', 'self_prop_sup', 'self_prop_email']:
-                        if field in column_map and not pd.isna(row[column_map[field]]):
-                            has_self_proposed = True
-                            break
-
-                    if has_self_proposed:
-                        self_prop, _ = SelfProposedExternship.objects.get_or_create(
-                            student_profile=student
-                        )
-
-                        # Update self-proposed fields
-                        if 'self_prop_org' in column_map and not pd.isna(row[column_map['self_prop_org']]):
-                            self_prop.organization = str(row[column_map['self_prop_org']])
-
-                        if 'self_prop_sup' in column_map and not pd.isna(row[column_map['self_prop_sup']]):
-                            self_prop.supervisor = str(row[column_map['self_prop_sup']])
-
-                        if 'self_prop_email' in column_map and not pd.isna(row[column_map['self_prop_email']]):
-                            email = str(row[column_map['self_prop_email']])
-                            if not self.validate_email(email):
-                                self.log_error(
-                                    f"Invalid supervisor email format: {email}",
-                                    index,
-                                    {"student_id": student_id}
-                                )
-                            else:
-                                self_prop.supervisor_email = email
-
-                        self_prop.save()
-
-                    # Save student with all changes
-                    student.save()
-                    created_or_updated.append(student)
-                    self.success_count += 1
-
-            except Exception as e:
-                self.log_error(f"Error processing row {index}: {str(e)}", index, {"row": row.to_dict()})
+            too_long = profile_too_long[i] or proposal_too_long[i]
+            if too_long:
+                self.log_error(
+                    f"Error processing row {index}: {too_long}",
+                    index,
+                    {"row": self.row_data(index)}
+                )
+                continue
+
+            records.append(StudentRecord(
+                index=index,
+                student_id=student_id,
+                fields=record_fields,
+                areas=area_ranks,
+                self_proposed=self_proposed,
+            ))
+
+        return records
+
+    def save_students(self, chunk, areas, existing) -> List[StudentProfile]:
+        """
+        Write a chunk of (student_id, records) groups with bulk statements
 
-        # Create import log
-        self.create_import_log()
+        Profiles and self-proposed externships are upserted with
+        INSERT ... ON CONFLICT DO UPDATE, so new and existing rows share one
+        statement each instead of going through bulk_update's CASE chains.
 
-        return created_or_updated, self.errors
+        Returns:
+            The saved StudentProfile once per record, matching the row-by-row
+            import's result list
+        """
+        saved, students, existing_students = [], [], []
+        rankings, proposals = [], {}
+
+        for student_id, group in chunk:
+            matches = existing.get(student_id)
+            student = matches[0] if matches else StudentProfile(student_id=student_id)
+            for record in group:
+                for field, field_value in record.fields.items():
+                    setattr(student, field, field_value)
+                if record.self_proposed is not None:
+                    proposals.setdefault(student, {}).update(record.self_proposed)
+            student.sync_preference_fields()
+            students.append(student)
+            if matches:
+                existing_students.append(student)
+
+            # Each row replaces the rankings, so the last row's areas win
+            rankings.extend(
+                StudentAreaRanking(student_profile=student, area=areas[name], rank=rank)
+                for name, rank in group[-1].areas
+            )
+            saved.extend([student] * len(group))
+
+        StudentProfile.objects.bulk_create(
+            students, update_conflicts=True, unique_fields=['id'], update_fields=PROFILE_FIELDS
+        )
+
+        # Clear existing rankings and create new ones
+        StudentAreaRanking.objects.filter(student_profile__in=existing_students).delete()
+        StudentAreaRanking.objects.bulk_create(rankings)
+
+        if proposals:
+            current = {
+                proposal.student_profile_id: proposal
+                for proposal in SelfProposedExternship.objects.filter(student_profile__in=list(proposals))
+            }
+            upserts = []
+            for student, values in proposals.items():
+                proposal = current.get(student.pk) or SelfProposedExternship(student_profile=student)
+                for field, field_value in values.items():
+                    setattr(proposal, field, field_value)
+                upserts.append(proposal)
+            SelfProposedExternship.objects.bulk_create(
+                upserts, update_conflicts=True, unique_fields=['student_profile'],
+                update_fields=SELF_PROPOSED_FIELDS
+            )
+
+        return saved
@@ -0,0 +1,51 @@
+"""
+backend/sail/search.py
+----------------------------------
+Ranked full-text and fuzzy search for list endpoints.
+
+``?q=`` is parsed as a web-style query (quoted phrases, ``or``, ``-word``)
+and matched against the model's trigger-maintained ``search_vector``
+column through its GIN index. Matches are ranked with ts_rank, which
+weighs names and areas of law above prose, and listed best first.
+
+``?fuzzy=`` finds near-matches of names (and student emails) by trigram
+similarity instead, for misspelled or partially remembered names; see
+fuzzy.py.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+from rest_framework.filters import BaseFilterBackend
+
+# Annotation holding each match's rank; pagination orders by it when present
+SEARCH_RANK = 'search_rank'
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    search_param = 'q'
+    search_config = 'english'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = request.query_params.get(self.search_param, '').strip()
+        if not terms:
+            return queryset
+        query = SearchQuery(terms, search_type='websearch', config=self.search_config)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(**{SEARCH_RANK: SearchRank(F('search_vector'), query)})
+            .order_by(f'-{SEARCH_RANK}', '-id')
+        )
+
+
+class FuzzySearchFilter(BaseFilterBackend):
+    """
+    Trigram similarity lookup; the view's ``fuzzy_matches(queryset, text)``
+    (one of the fuzzy.py matchers) selects and scores the rows
+    """
+    search_param = 'fuzzy'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return view.fuzzy_matches(queryset, text).annotate(**{SEARCH_RANK: F('similarity')})
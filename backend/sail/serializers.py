@@ -6,6 +6,8 @@ DRF serializers for advanced usage.
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from .fieldsets import SparseFieldsetSerializerMixin
 from .models import (
     StudentProfile, MatchingRound, OrganizationProfile,
     FacultyProfile, Statement, StudentGrade, ImportLog,
@@ -52,7 +54,7 @@ class ImportLogSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'file_name', 'import_datetime', 'import_datetime_formatted',
             'import_type', 'imported_by', 'success_count', 'error_count',
-            'errors', 'errors_list'
+            'cache_hits', 'errors', 'errors_list'
         )
     
     def get_import_datetime_formatted(self, obj):
@@ -88,12 +90,13 @@ class StudentGradeSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'student_profile', 
             'constitutional_law', 'contracts', 'criminal_law', 'property_law', 'torts',
-            'lrw_case_brief', 'lrw_multiple_case', 'lrw_short_memo'
+            'lrw_case_brief', 'lrw_multiple_case', 'lrw_short_memo',
+            'course_points', 'gpa'
         )
 
 # Use existing serializers (with possible updates)
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     statements = serializers.SerializerMethodField()
     grades = serializers.SerializerMethodField()
     area_rankings = StudentAreaRankingSerializer(many=True, read_only=True)
@@ -109,10 +112,27 @@ class StudentProfileSerializer(serializers.ModelSerializer):
             'statements', 'grades', 'area_rankings', 'self_proposed_externship',
             'created_at', 'updated_at'
         )
+
+    expandable_fields = {
+        'statements': ['statements'],
+        'grades': ['grades'],
+        'area_rankings': [
+            Prefetch('area_rankings', queryset=StudentAreaRanking.objects.select_related('area')),
+        ],
+        'self_proposed_externship': ['self_proposed'],
+    }
     
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """
+        Load everything the serializer reads up front, so listing any number
+        of students costs a constant number of queries
+        """
+        return cls().narrow_queryset(queryset)
+
     def get_statements(self, obj):
-        statements = Statement.objects.filter(student_profile=obj)
-        return StatementSerializer(statements, many=True).data
+        # .all() reads the prefetched statements instead of querying again
+        return StatementSerializer(obj.statements.all(), many=True).data
     
     def get_grades(self, obj):
         try:
@@ -126,15 +146,19 @@ class StudentProfileSerializer(serializers.ModelSerializer):
         except (SelfProposedExternship.DoesNotExist, AttributeError):
             return None
 
-class OrganizationProfileSerializer(serializers.ModelSerializer):
+class OrganizationProfileSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = OrganizationProfile
         fields = (
-            'id', 'name', 'area_of_law', 'location',
+            'id', 'name', 'areas_of_law', 'location',
             'available_positions', 'filled_positions',
             'created_at', 'updated_at'
         )
 
+    expandable_fields = {
+        'areas_of_law': ['areas_of_law'],
+    }
+
 class FacultyProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = FacultyProfile
@@ -147,7 +171,11 @@ class FacultyProfileSerializer(serializers.ModelSerializer):
 class MatchingRoundSerializer(serializers.ModelSerializer):
     class Meta:
         model = MatchingRound
-        fields = ('id', 'round_number', 'status', 'matched_count', 'total_students')
+        fields = (
+            'id', 'round_number', 'status', 'algorithm',
+            'matched_count', 'total_students', 'statistics'
+        )
+        read_only_fields = ('statistics',)
 
 # Authentication serializers
 
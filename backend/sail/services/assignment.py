@@ -0,0 +1,185 @@
+"""
+File: backend/sail/services/assignment.py
+Purpose: Capacity-constrained assignment solvers over scored candidate pairs
+
+Every solver takes the CandidatePairs of a run, their float scores and the
+per-organization open capacity, and returns an int32 array holding the
+organization index assigned to each student (-1 when unassigned).
+"""
+
+from collections import deque
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+
+def greedy_assignment(pairs, scores: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """Assign pairs in descending score order while the organization has room"""
+    assignment = np.full(pairs.n_students, -1, dtype=np.int32)
+    remaining = capacity.astype(np.int64).copy()
+    open_slots = int(remaining.sum())
+
+    order = np.argsort(-scores, kind='stable')
+    assigned = 0
+    for s, o in zip(pairs.student[order].tolist(), pairs.org[order].tolist()):
+        if assignment[s] >= 0 or remaining[o] <= 0:
+            continue
+        assignment[s] = o
+        remaining[o] -= 1
+        assigned += 1
+        if assigned == pairs.n_students or assigned == open_slots:
+            break
+    return assignment
+
+
+def optimal_assignment(pairs, scores: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """
+    Maximize the total fit score subject to per-organization capacity.
+
+    Each organization is expanded into one column per open position (capped
+    at its number of candidate students) and every candidate pair becomes an
+    edge to each of its organization's positions. Each student also gets a
+    private "unassigned" column, so a full matching always exists, and the
+    sparse problem is solved as a minimum-cost full bipartite matching
+    (scipy's LAPJVsp) with cost = offset - score.
+    """
+    assignment = np.full(pairs.n_students, -1, dtype=np.int32)
+
+    slots = np.minimum(capacity, np.bincount(pairs.org, minlength=pairs.n_orgs)).astype(np.int64)
+    reps = slots[pairs.org]
+    if not reps.any():
+        return assignment
+
+    # Only students with at least one usable edge take part
+    rows = np.unique(pairs.student[reps > 0])
+    row_of = np.full(pairs.n_students, -1, dtype=np.int64)
+    row_of[rows] = np.arange(len(rows))
+
+    slot_start = np.cumsum(slots) - slots
+    slot_org = np.repeat(np.arange(pairs.n_orgs), slots)
+    n_slots = len(slot_org)
+
+    edge_rows = np.repeat(row_of[pairs.student], reps)
+    edge_cols = np.repeat(slot_start[pairs.org] - (np.cumsum(reps) - reps), reps) + np.arange(reps.sum())
+    offset = float(scores.max()) + 1.0
+    edge_cost = offset - np.repeat(scores.astype(np.float64), reps)
+
+    graph = csr_matrix(
+        (
+            np.concatenate([edge_cost, np.full(len(rows), offset)]),
+            (np.concatenate([edge_rows, np.arange(len(rows))]),
+             np.concatenate([edge_cols, n_slots + np.arange(len(rows))])),
+        ),
+        shape=(len(rows), n_slots + len(rows)),
+    )
+    row_ind, col_ind = min_weight_full_bipartite_matching(graph)
+
+    placed = col_ind < n_slots
+    assignment[rows[row_ind[placed]]] = slot_org[col_ind[placed]]
+    return assignment
+
+
+def repair_assignment(pairs, scores: np.ndarray, capacity: np.ndarray, assignment: np.ndarray,
+                      free: np.ndarray, pinned: np.ndarray = None) -> np.ndarray:
+    """
+    Place free students into an existing assignment along augmenting paths.
+
+    Free students are placed best candidate score first, each along the
+    shortest augmenting path a breadth-first search finds: a candidate
+    organization with room, else a full one holding a student who can move
+    on to one of their own candidates with room, and so on. Only the
+    students on the path move, so the rest of the assignment stays put; a
+    student with no path stays unassigned. Within a step, better-scoring
+    organizations are tried first.
+
+    Only students with candidate pairs can be placed or moved, so pairs need
+    only cover the rows the repair may touch. Pinned students never move.
+
+    Args:
+        capacity: int[n_orgs] positions the assignment may fill per organization
+        assignment: int32[n_students] current organization per student, -1 = none
+        free: Student indices to place
+        pinned: bool[n_students] students whose placement is fixed
+
+    Returns:
+        int32[n_students] repaired assignment (the input is not modified)
+    """
+    placed = assignment[assignment >= 0]
+    remaining = (capacity.astype(np.int64) - np.bincount(placed, minlength=pairs.n_orgs)).tolist()
+    held = [set() for _ in range(pairs.n_orgs)]
+    for s in np.flatnonzero(assignment >= 0).tolist():
+        held[assignment[s]].add(s)
+
+    order = np.lexsort((-scores, pairs.student))
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(pairs.student, minlength=pairs.n_students))]).tolist()
+    list_orgs = pairs.org[order].tolist()
+    best = np.full(pairs.n_students, -np.inf)
+    np.maximum.at(best, pairs.student, scores)
+    movable = np.ones(pairs.n_students, dtype=bool) if pinned is None else ~pinned
+
+    free = np.asarray(free, dtype=np.int64)
+    free = free[assignment[free] < 0]
+    result = assignment.astype(np.int32).tolist()
+    open_slots = sum(max(r, 0) for r in remaining)
+    # Organizations a failed search went through lead to no open position
+    # until the assignment changes again, so later searches skip them
+    dead = set()
+    for s in free[np.argsort(-best[free], kind='stable')].tolist():
+        if not open_slots:
+            break
+        # reached[o] = student whose move into o extends the path
+        reached = {}
+        queue, seen, target = deque([s]), {s}, -1
+        while queue and target < 0:
+            t = queue.popleft()
+            for o in list_orgs[ptr[t]:ptr[t + 1]]:
+                if o in reached or o in dead:
+                    continue
+                reached[o] = t
+                if remaining[o] > 0:
+                    target = o
+                    break
+                for u in held[o]:
+                    if u not in seen and movable[u]:
+                        seen.add(u)
+                        queue.append(u)
+        if target < 0:
+            dead.update(reached)
+            continue
+
+        # Shift every student on the path into the organization it reached
+        remaining[target] -= 1
+        open_slots -= 1
+        dead.clear()
+        o = target
+        while o >= 0:
+            t = reached[o]
+            previous = result[t]
+            held[o].add(t)
+            result[t] = o
+            if previous >= 0:
+                held[previous].discard(t)
+            o = previous
+    return np.array(result, dtype=np.int32)
+
+
+SOLVERS = {
+    'greedy': greedy_assignment,
+    'optimal': optimal_assignment,
+}
+
+
+def assignment_statistics(pairs, scores: np.ndarray, assignment: np.ndarray,
+                          capacity: np.ndarray) -> dict:
+    """Summary figures for a solved assignment"""
+    assigned = np.flatnonzero(assignment >= 0)
+    assigned_scores = scores[pairs.find(assigned, assignment[assigned])]
+    total_capacity = int(capacity.sum())
+    return {
+        'assigned': int(assigned.size),
+        'unassigned': int(assignment.size - assigned.size),
+        'total_score': round(float(assigned_scores.sum()), 4),
+        'mean_score': round(float(assigned_scores.mean()), 4) if assigned.size else 0.0,
+        'capacity_utilization': round(assigned.size / total_capacity, 4) if total_capacity else 0.0,
+    }
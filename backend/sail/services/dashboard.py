@@ -3,44 +3,57 @@ File: backend/sail/services/dashboard.py
 Purpose: Services for generating dashboard statistics and metrics
 """
 
-from django.db.models import Count, Q, Avg, Sum, F
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Concat
 from django.utils import timezone
 from datetime import timedelta
-from ..models import (
-    StudentProfile, OrganizationProfile, FacultyProfile,
-    Statement, ImportLog, MatchingRound, AreaOfLaw, StudentAreaRanking
-)
+from ..models import StudentProfile, OrganizationProfile, ImportLog, AreaOfLaw
+from ..counters import read_counters, new_key, window_days
+from ..cache import generation_cached
 
+@generation_cached('dashboard_stats')
 def get_dashboard_stats():
     """
     Calculate statistics for the admin dashboard.
+
+    Counts are read from the materialized dashboard counters (see
+    counters.py) rather than the profile tables, so a call costs two small
+    queries however large the cohort is, and repeated calls are served from
+    the generation cache until the next write.
     
     Returns:
         dict: Dictionary containing statistics and metrics
     """
-    now = timezone.now()
-    
-    # Student stats
-    total_students = StudentProfile.objects.count()
-    matched_students = StudentProfile.objects.filter(is_matched=True).count()
-    pending_matches = StudentProfile.objects.filter(is_active=True, is_matched=False).count()
-    approval_needed = StudentProfile.objects.filter(admin_approval_needed=True).count()
+    counters = read_counters()
+
+    def new_count(prefix):
+        return sum(counters.get(new_key(prefix, day), 0) for day in window_days())
+
+    total_students = counters.get('students.total', 0)
+    matched_students = counters.get('students.matched', 0)
+    pending_matches = counters.get('students.pending', 0)
+    approval_needed = counters.get('students.approval_needed', 0)
     
     # Matches by status (for bar chart)
     match_status_counts = {
         'Pending': pending_matches,
         'Matched': matched_students,
-        'Declined': StudentProfile.objects.filter(is_active=False, is_matched=False).count(),
-        'Approved': StudentProfile.objects.filter(is_matched=True, admin_approval_needed=False).count(),
+        'Declined': counters.get('students.declined', 0),
+        'Approved': counters.get('students.approved', 0),
     }
     
     # Matches by area of law (for bar chart)
     # Get the top 5 areas of law by count of students who ranked them
-    top_areas = StudentAreaRanking.objects.values('area__name') \
-        .annotate(count=Count('student_profile')) \
-        .order_by('-count')[:5]
-        
-    area_matches = {area['area__name']: area['count'] for area in top_areas}
+    top_areas = sorted(
+        ((key.split('.', 1)[1], count) for key, count in counters.items()
+         if key.startswith('area.') and count > 0),
+        key=lambda area: -area[1]
+    )[:5]
+    names = {
+        str(area_id): name for area_id, name in
+        AreaOfLaw.objects.filter(id__in=[area_id for area_id, _ in top_areas]).values_list('id', 'name')
+    } if top_areas else {}
+    area_matches = {names[area_id]: count for area_id, count in top_areas if area_id in names}
     
     # If we don't have enough real data, add some sample areas to demonstrate
     if len(area_matches) < 5:
@@ -77,20 +90,20 @@ def get_dashboard_stats():
         # Legacy stats format (keeping for backward compatibility)
         'students': {
             'total': total_students,
-            'active': StudentProfile.objects.filter(is_active=True).count(),
-            'new': StudentProfile.objects.filter(created_at__gte=now-timedelta(days=7)).count(),
+            'active': counters.get('students.active', 0),
+            'new': new_count('students'),
             'growth_rate': 0,
             'growth_type': 'increase',
         },
         'organizations': {
-            'total': OrganizationProfile.objects.count(),
-            'new': OrganizationProfile.objects.filter(created_at__gte=now-timedelta(days=7)).count(),
+            'total': counters.get('organizations.total', 0),
+            'new': new_count('organizations'),
             'growth_rate': 0,
             'growth_type': 'increase',
         },
         'faculty': {
-            'total': FacultyProfile.objects.count(),
-            'new': FacultyProfile.objects.filter(created_at__gte=now-timedelta(days=7)).count(),
+            'total': counters.get('faculty.total', 0),
+            'new': new_count('faculty'),
             'growth_rate': 0,
             'growth_type': 'increase',
         },
@@ -103,6 +116,73 @@ def get_dashboard_stats():
         }
     }
 
+# Columns of the activity feed query, in the same order for every table
+ACTIVITY_COLUMNS = ['kind', 'item_id', 'actor', 'target', 'detail', 'created', 'date']
+
+def activity_feed_query(limit=5):
+    """
+    Student profiles, organization profiles and imports as one UNION ALL
+    query that selects only the feed's columns; each branch takes its
+    newest rows from the updated_at / import_datetime index and the
+    database orders and limits the combined feed.
+    """
+    students = StudentProfile.objects.annotate(
+        kind=Value('student'),
+        item_id=F('id'),
+        actor=Concat('first_name', Value(' '), 'last_name'),
+        target=Value('Student Profile'),
+        detail=Value(''),
+        created=F('created_at'),
+        date=F('updated_at'),
+    ).values(*ACTIVITY_COLUMNS).order_by('-updated_at')[:limit]
+
+    organizations = OrganizationProfile.objects.annotate(
+        kind=Value('org'),
+        item_id=F('id'),
+        actor=F('name'),
+        target=Value('Organization Profile'),
+        detail=Value(''),
+        created=F('created_at'),
+        date=F('updated_at'),
+    ).values(*ACTIVITY_COLUMNS).order_by('-updated_at')[:limit]
+
+    imports = ImportLog.objects.annotate(
+        kind=Value('import'),
+        item_id=F('id'),
+        actor=Coalesce('imported_by', Value('System')),
+        target=F('file_name'),
+        detail=F('import_type'),
+        created=F('import_datetime'),
+        date=F('import_datetime'),
+    ).values(*ACTIVITY_COLUMNS).order_by('-import_datetime')[:limit]
+
+    return students.union(organizations, imports, all=True).order_by('-date')[:limit]
+
+@generation_cached('recent_activity')
+def recent_activity_items(limit=5):
+    """
+    Newest activity items, without the relative date labels (which depend
+    on the time of the request, so are added by get_recent_activity)
+    """
+    rows = activity_feed_query(limit)
+
+    day_ago = timezone.now() - timedelta(days=1)
+    actions = {
+        'student': lambda row: 'created profile' if row['created'] >= day_ago else 'updated profile',
+        'org': lambda row: 'joined platform' if row['created'] >= day_ago else 'updated profile',
+        'import': lambda row: f"imported {row['detail']}",
+    }
+    return [
+        {
+            'id': f"{row['kind']}-{row['item_id']}",
+            'user': row['actor'],
+            'action': actions[row['kind']](row),
+            'target': row['target'],
+            'date': row['date'],
+        }
+        for row in rows
+    ]
+
 def get_recent_activity(limit=5):
     """
     Get recent system activity for the dashboard.
@@ -113,56 +193,13 @@ def get_recent_activity(limit=5):
     Returns:
         list: List of recent activity items
     """
-    recent_activity = []
-    
-    # Get recent student profile creations/updates
-    recent_students = StudentProfile.objects.order_by('-updated_at')[:limit]
-    for student in recent_students:
-        is_new = student.created_at >= (timezone.now() - timedelta(days=1))
-        activity_type = 'created profile' if is_new else 'updated profile'
-        recent_activity.append({
-            'id': f'student-{student.id}',
-            'user': f'{student.first_name} {student.last_name}',
-            'action': activity_type,
-            'target': 'Student Profile',
-            'date': student.updated_at
-        })
-    
-    # Get recent organization updates
-    recent_orgs = OrganizationProfile.objects.order_by('-updated_at')[:limit]
-    for org in recent_orgs:
-        is_new = org.created_at >= (timezone.now() - timedelta(days=1))
-        activity_type = 'joined platform' if is_new else 'updated profile'
-        recent_activity.append({
-            'id': f'org-{org.id}',
-            'user': org.name,
-            'action': activity_type,
-            'target': 'Organization Profile',
-            'date': org.updated_at
-        })
-    
-    # Get recent imports
-    recent_imports = ImportLog.objects.order_by('-import_datetime')[:limit]
-    for import_log in recent_imports:
-        recent_activity.append({
-            'id': f'import-{import_log.id}',
-            'user': import_log.imported_by or 'System',
-            'action': f"imported {import_log.import_type}",
-            'target': import_log.file_name,
-            'date': import_log.import_datetime
-        })
-    
-    # Sort by date (newest first) and limit to requested amount
-    sorted_activity = sorted(
-        recent_activity, 
-        key=lambda x: x['date'], 
-        reverse=True
-    )[:limit]
+    sorted_activity = recent_activity_items(limit)
+    now = timezone.now()
     
     # Format dates as strings
     for activity in sorted_activity:
         # Calculate relative time
-        time_diff = timezone.now() - activity['date']
+        time_diff = now - activity['date']
         hours_diff = time_diff.total_seconds() / 3600
         
         if hours_diff < 1:
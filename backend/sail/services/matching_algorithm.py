@@ -3,31 +3,389 @@ File: backend/sail/services/matching_algorithm.py
 Purpose: Implementation of the student-organization matching algorithm
 """
 
-from ..models import StudentProfile, OrganizationProfile, MatchingRound
+import logging
+import time
+from collections import Counter
+from datetime import timedelta
 
-def run_matching(round_number):
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..cache import bump_generation
+from ..counters import deferred_counters
+from ..models import StudentProfile, OrganizationProfile, MatchingRound, Match
+from .matching_engine import (
+    cohort_snapshot, load_matching_data, generate_candidates, score_candidates, get_matching_weights,
+    matched_area_ids
+)
+from .assignment import SOLVERS, assignment_statistics, repair_assignment
+from .stable_matching import stable_assignment, stability_certificate
+
+logger = logging.getLogger(__name__)
+
+# Phases of a matching run, in order
+PHASES = ('load', 'score', 'assign', 'persist')
+
+# Round statuses while a run is queued or in progress
+ACTIVE_ROUND_STATUSES = ('queued', 'running', 'cancelling')
+
+# An active round untouched for longer than a task may run has lost its
+# worker (killed by the time limit, out of memory, restarted)
+STALE_RUN_AFTER = timedelta(seconds=settings.CELERY_TASK_TIME_LIMIT)
+
+
+class MatchingCancelled(Exception):
+    """A run stopped at a phase boundary because its round was cancelled"""
+
+
+def update_round(matching_round, **fields):
+    """
+    Write fields of a round without saving the whole instance (a concurrent
+    cancel request must not be overwritten), touching updated_at so ETags
+    of the round change
+    """
+    return MatchingRound.objects.filter(pk=matching_round.pk).update(updated_at=timezone.now(), **fields)
+
+
+def stale_runs():
+    """Rounds left active by a run whose worker no longer exists"""
+    return Q(status__in=ACTIVE_ROUND_STATUSES, updated_at__lt=timezone.now() - STALE_RUN_AFTER)
+
+
+def claim_round(matching_round):
     """
-    Basic example: find all unmatched students, pair them with an organization
-    that has available_positions > filled_positions.
+    Mark a round 'queued' for a new run unless another run of it is active;
+    a stale run does not hold the round. Returns whether the round was claimed.
+    """
+    return bool(MatchingRound.objects.filter(
+        Q(pk=matching_round.pk) & (~Q(status__in=ACTIVE_ROUND_STATUSES) | stale_runs())
+    ).update(status='queued', checkpoint=None, updated_at=timezone.now()))
+
+
+def save_assignment(matching_round, data, pairs, scores, assignment, statistics=None):
+    """
+    Write a run's assignment back in one transaction: Match rows, student
+    matched flags and organization fill counts, all as bulk statements.
+    """
+    student_idx = np.flatnonzero(assignment >= 0)
+    org_idx = assignment[student_idx]
+    pair_idx = pairs.find(student_idx, org_idx)
+    area_ids = matched_area_ids(data, pairs, pair_idx)
+
+    matches = [
+        Match(
+            matching_round=matching_round,
+            student_profile_id=data.student_ids[s],
+            organization_profile_id=data.org_ids[o],
+            area_of_law_id=area_id,
+            match_score=float(score),
+        )
+        for s, o, score, area_id in zip(
+            student_idx.tolist(), org_idx.tolist(), scores[pair_idx].tolist(), area_ids
+        )
+    ]
+
+    filled = np.bincount(org_idx, minlength=data.n_orgs)
+    with deferred_counters(), transaction.atomic():
+        Match.objects.bulk_create(matches, batch_size=1000)
+        StudentProfile.objects.filter(
+            id__in=list(data.student_ids[student_idx])
+        ).update(is_matched=True)
+        # One UPDATE per distinct fill increment rather than one per organization
+        for count in np.unique(filled[filled > 0]).tolist():
+            OrganizationProfile.objects.filter(
+                id__in=list(data.org_ids[filled == count])
+            ).update(filled_positions=F('filled_positions') + count)
+
+        matching_round.matched_count = len(matches)
+        matching_round.total_students = data.n_students
+        matching_round.statistics = statistics or {}
+        matching_round.status = 'completed'
+        matching_round.checkpoint = None
+        # Leave fields other processes write (task_id) alone
+        matching_round.save(update_fields=[
+            'matched_count', 'total_students', 'statistics', 'status', 'checkpoint', 'algorithm', 'updated_at',
+        ])
+        bump_generation()
+    return matches
+
+
+def run_matching(round_number, algorithm=None, progress=None):
+    """
+    Match all active, unmatched students to organizations with open positions.
+
+    Students and organizations are loaded once; only pairs sharing a ranked
+    area of law are scored, with the ``weight_*`` system settings. The round's
+    ``algorithm`` then assigns students: 'greedy' takes pairs best-score-first,
+    'optimal' maximizes the total score under organization capacities, and
+    'stable' runs student-proposing deferred acceptance and records a
+    stability certificate in the round statistics.
+
+    The run goes through PHASES in order. Before each phase it stops with
+    MatchingCancelled if the round's status has been set to 'cancelling',
+    and after each phase but the last the round's checkpoint records the
+    partial statistics (and, once solved, the assignment about to be saved).
+    A run that raises leaves the round 'failed' with its last checkpoint.
+
+    Args:
+        round_number: Matching round to run (created if missing)
+        algorithm: Overrides and updates the round's configured algorithm
+        progress: Called as progress(phase, **details) as each phase starts
     """
     matching_round, _ = MatchingRound.objects.get_or_create(round_number=round_number)
+    if algorithm:
+        if algorithm not in dict(MatchingRound.ALGORITHM_CHOICES):
+            raise ValueError(f"Unknown matching algorithm: {algorithm}")
+        matching_round.algorithm = algorithm
+    statistics = {'algorithm': matching_round.algorithm}
 
-    # fetch all unmatched students
-    students = StudentProfile.objects.filter(is_matched=False)
-    total = students.count()
-    matched_count = 0
-
-    for student in students:
-        org = OrganizationProfile.objects.filter(filled_positions__lt=models.F('available_positions')).first()
-        if org:
-            student.is_matched = True
-            org.filled_positions += 1
-            org.save()
-            student.save()
-            matched_count += 1
-
-    matching_round.matched_count = matched_count
-    matching_round.total_students = total
-    matching_round.status = 'completed'
-    matching_round.save()
+    def start(phase, **details):
+        if MatchingRound.objects.filter(pk=matching_round.pk, status='cancelling').exists():
+            update_round(matching_round, status='cancelled')
+            raise MatchingCancelled(f"Matching round {round_number} cancelled before {phase}")
+        if progress:
+            progress(phase, **details)
+
+    def checkpoint(phase, **extra):
+        update_round(matching_round, checkpoint={'phase': phase, 'statistics': statistics, **extra})
+
+    try:
+        start('load')
+        update_round(matching_round, status='running', algorithm=matching_round.algorithm)
+        started = time.perf_counter()
+        data = cohort_snapshot()
+        statistics.update({'students': data.n_students, 'organizations': data.n_orgs})
+        checkpoint('load')
+
+        start('score', students=data.n_students, organizations=data.n_orgs)
+        pairs, scores = score_candidates(data, get_matching_weights())
+        scored = time.perf_counter()
+        statistics.update({
+            'candidate_pairs': len(pairs),
+            'pruning_ratio': round(pairs.pruning_ratio, 4),
+            'score_seconds': round(scored - started, 3),
+        })
+        checkpoint('score')
+
+        start('assign', candidate_pairs=len(pairs))
+        if matching_round.algorithm == 'stable':
+            assignment = stable_assignment(pairs, scores, data.org_capacity)
+        else:
+            assignment = SOLVERS[matching_round.algorithm](pairs, scores, data.org_capacity)
+        solved = time.perf_counter()
+
+        statistics.update(assignment_statistics(pairs, scores, assignment, data.org_capacity))
+        if matching_round.algorithm == 'stable':
+            statistics.update(stability_certificate(pairs, scores, data.org_capacity, assignment))
+        statistics['solve_seconds'] = round(solved - scored, 3)
+        student_idx = np.flatnonzero(assignment >= 0)
+        checkpoint('assign', assignment=[
+            [str(data.student_ids[s]), str(data.org_ids[o])]
+            for s, o in zip(student_idx.tolist(), assignment[student_idx].tolist())
+        ])
+
+        start('persist', matched=len(student_idx))
+        save_assignment(matching_round, data, pairs, scores, assignment, statistics)
+    except MatchingCancelled:
+        raise
+    except Exception:
+        update_round(matching_round, status='failed')
+        raise
+
+    logger.info(
+        f"Matching round {round_number} ({matching_round.algorithm}): "
+        f"{matching_round.matched_count}/{data.n_students} students across {data.n_orgs} "
+        f"organizations, {len(pairs)} candidate pairs ({pairs.pruning_ratio:.1%} pruned) "
+        f"in {time.perf_counter() - started:.2f}s"
+    )
     return matching_round
+
+
+def rematch_round(round_number, students=(), organizations=()):
+    """
+    Repair a completed round's assignment after late changes instead of
+    running it again.
+
+    ``students`` and ``organizations`` are the ids of profiles changed since
+    the round ran: withdrawn or deactivated, new grades or statements, other
+    areas of law, more or fewer positions. Matches of inactive students and
+    organizations are dropped, organizations left with fewer positions than
+    matches release their lowest-scoring unapproved students, and a changed
+    student keeps their placement while it is still a candidate pair (with
+    the new score). Every student left without a placement, and every
+    student still waiting from the round, is then placed by
+    repair_assignment() along augmenting paths, which moves an existing
+    match only when that opens a position for someone unplaced. Approved
+    matches never move.
+
+    Only the rows of changed and waiting students, of students held by
+    changed organizations and of students held where those rows have
+    candidates are scored; other matches keep their stored score. Only the
+    Match rows that differ are written.
+
+    Returns:
+        Summary of the repair, also stored as ``statistics['rematch']``
+    """
+    started = time.perf_counter()
+    students, organizations = set(map(str, students)), set(map(str, organizations))
+
+    with deferred_counters(), transaction.atomic():
+        matching_round = MatchingRound.objects.select_for_update().get(round_number=round_number)
+        if matching_round.status != 'completed':
+            raise ValueError(
+                f"Matching round {round_number} is {matching_round.status}, not completed; "
+                f"only a completed assignment can be repaired"
+            )
+
+        round_matches = Match.objects.filter(matching_round=matching_round)
+        previous = {
+            str(student_id): (match_id, str(org_id), status, score)
+            for match_id, student_id, org_id, status, score in round_matches.values_list(
+                'id', 'student_profile_id', 'organization_profile_id', 'status', 'match_score'
+            )
+        }
+        # Resolve the population to ids once; the loader's per-table queries
+        # then look students and organizations up by primary key
+        student_ids = StudentProfile.objects.filter(is_active=True).filter(
+            Q(id__in=round_matches.values('student_profile_id'))
+            | Q(id__in=students) | Q(is_matched=False)
+        ).values_list('id', flat=True)
+        org_ids = OrganizationProfile.objects.filter(is_active=True).filter(
+            Q(id__in=round_matches.values('organization_profile_id'))
+            | Q(id__in=organizations) | Q(filled_positions__lt=F('available_positions'))
+        ).values_list('id', flat=True)
+        data = load_matching_data(
+            StudentProfile.objects.filter(id__in=list(student_ids)),
+            OrganizationProfile.objects.filter(id__in=list(org_ids)),
+        )
+        student_index = {str(sid): i for i, sid in enumerate(data.student_ids)}
+        org_index = {str(oid): j for j, oid in enumerate(data.org_ids)}
+
+        # The previous assignment, without inactive students and organizations
+        assignment = np.full(data.n_students, -1, dtype=np.int32)
+        stored_score = np.zeros(data.n_students, dtype=np.float32)
+        pinned = np.zeros(data.n_students, dtype=bool)
+        for student_id, (_, org_id, status, score) in previous.items():
+            s, o = student_index.get(student_id), org_index.get(org_id)
+            if s is not None and o is not None:
+                assignment[s], stored_score[s], pinned[s] = o, score, status == 'APPROVED'
+
+        # filled_positions already counts this round's matches
+        held_before = Counter(org_id for _, org_id, _, _ in previous.values())
+        round_held = np.array([held_before[str(oid)] for oid in data.org_ids], dtype=np.int32)
+        capacity = np.maximum(data.org_positions - (data.org_filled - round_held), 0)
+
+        # Rows to rescore, widened by one hop so augmenting paths can move
+        # the students held where they have candidates
+        changed_rows = np.array(
+            [student_index[sid] for sid in students if sid in student_index], dtype=np.int64
+        )
+        changed_cols = np.array(
+            [org_index[oid] for oid in organizations if oid in org_index], dtype=np.int64
+        )
+        rows = np.union1d(changed_rows, np.flatnonzero(assignment < 0))
+        rows = np.union1d(rows, np.flatnonzero(np.isin(assignment, changed_cols)))
+        reached = np.unique(generate_candidates(data, rows).org)
+        rows = np.union1d(rows, np.flatnonzero(np.isin(assignment, reached)))
+        pairs, scores = score_candidates(data, get_matching_weights(), rows)
+
+        # Rescored placements that are no longer candidate pairs are released
+        held = np.flatnonzero(assignment >= 0)
+        pair_idx = pairs.find(held, assignment[held])
+        rescored = held[pair_idx >= 0]
+        stored_score[rescored] = scores[pair_idx[pair_idx >= 0]]
+        lost = held[(pair_idx < 0) & np.isin(held, rows) & ~pinned[held]]
+        assignment[lost] = -1
+
+        # Organizations over their positions release their weakest students
+        released = []
+        for o in np.flatnonzero(np.bincount(assignment[assignment >= 0], minlength=data.n_orgs) > capacity):
+            members = np.flatnonzero((assignment == o) & ~pinned)
+            excess = int((assignment == o).sum() - capacity[o])
+            weakest = members[np.argsort(stored_score[members], kind='stable')][:excess]
+            assignment[weakest] = -1
+            released.extend(weakest.tolist())
+
+        free = np.flatnonzero(assignment < 0)
+        assignment = repair_assignment(pairs, scores, capacity, assignment, free, pinned)
+
+        # Write only the differences
+        placed = np.flatnonzero(assignment >= 0)
+        pair_idx = pairs.find(placed, assignment[placed])
+        # Placements that were not rescored keep their stored score and area
+        area_ids = [None] * len(placed)
+        rescored = np.flatnonzero(pair_idx >= 0)
+        for i, area_id in zip(rescored.tolist(), matched_area_ids(data, pairs, pair_idx[rescored])):
+            area_ids[i] = area_id
+        current = {}
+        for s, o, p, area_id in zip(placed.tolist(), assignment[placed].tolist(), pair_idx.tolist(), area_ids):
+            score = float(scores[p]) if p >= 0 else float(stored_score[s])
+            current[str(data.student_ids[s])] = (str(data.org_ids[o]), score, area_id)
+
+        created, updated, moved = [], [], 0
+        for student_id, (org_id, score, area_id) in current.items():
+            if student_id not in previous:
+                created.append(Match(
+                    matching_round=matching_round, student_profile_id=student_id,
+                    organization_profile_id=org_id, area_of_law_id=area_id, match_score=score,
+                ))
+                continue
+            match_id, old_org, status, old_score = previous[student_id]
+            if old_org != org_id:
+                moved += 1
+                updated.append(Match(
+                    id=match_id, organization_profile_id=org_id, area_of_law_id=area_id,
+                    match_score=score, status='PENDING', updated_at=timezone.now(),
+                ))
+            elif area_id is not None and score != old_score:
+                updated.append(Match(
+                    id=match_id, organization_profile_id=org_id, area_of_law_id=area_id,
+                    match_score=score, status=status, updated_at=timezone.now(),
+                ))
+        removed = [student_id for student_id in previous if student_id not in current]
+
+        Match.objects.filter(id__in=[previous[sid][0] for sid in removed]).delete()
+        Match.objects.bulk_update(
+            updated, ['organization_profile', 'area_of_law', 'match_score', 'status', 'updated_at']
+        )
+        Match.objects.bulk_create(created, batch_size=1000)
+        if removed:
+            StudentProfile.objects.filter(id__in=removed).update(is_matched=False)
+        if created:
+            StudentProfile.objects.filter(id__in=[m.student_profile_id for m in created]).update(is_matched=True)
+
+        # One UPDATE per distinct change in fill count
+        held_after = Counter(org_id for org_id, _, _ in current.values())
+        deltas = {}
+        for org_id in held_before.keys() | held_after.keys():
+            delta = held_after[org_id] - held_before[org_id]
+            if delta:
+                deltas.setdefault(delta, []).append(org_id)
+        for delta, org_ids in deltas.items():
+            OrganizationProfile.objects.filter(id__in=org_ids).update(
+                filled_positions=F('filled_positions') + delta
+            )
+
+        summary = {
+            'changed_students': len(students),
+            'changed_organizations': len(organizations),
+            'rescored_students': int(len(rows)),
+            'placed': len(created),
+            'moved': moved,
+            'removed': len(removed),
+            'released': len(released),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        matching_round.matched_count = len(current)
+        matching_round.statistics = {**matching_round.statistics, 'rematch': summary}
+        matching_round.save(update_fields=['matched_count', 'statistics', 'updated_at'])
+
+    logger.info(
+        f"Matching round {round_number} repaired: {summary['placed']} placed, {summary['moved']} moved, "
+        f"{summary['removed']} removed, {summary['rescored_students']} students rescored "
+        f"in {summary['seconds']:.3f}s"
+    )
+    return summary
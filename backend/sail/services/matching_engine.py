@@ -0,0 +1,545 @@
+"""
+File: backend/sail/services/matching_engine.py
+Purpose: Vectorized student x organization fit scoring for matching runs
+
+Loads every active student and organization once through flat ``values_list``
+queries into a CohortSnapshot, which encodes areas of law as integer columns
+and locations and work preferences as bitsets, and scores
+student/organization pairs with NumPy. The snapshot of the default cohort is
+built once per data generation and can be shared between processes as
+memory-mapped files (see cohort_snapshot()).
+
+Only pairs that share a ranked area of law are ever scored: an inverted index
+from area to the organizations offering it turns each student's ranked areas
+into their candidate organizations, so scoring cost follows real overlaps
+rather than n_students x n_orgs.
+"""
+
+import logging
+import os
+import re
+import shutil
+from dataclasses import dataclass, fields
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Avg, F
+
+from ..cache import current_generation
+from ..grades import GRADE_FIELDS
+from ..models import (
+    StudentProfile, OrganizationProfile, StudentAreaRanking,
+    StudentGrade, Statement, SystemSetting
+)
+
+logger = logging.getLogger(__name__)
+
+# Weights used when the matching settings have not been initialised
+DEFAULT_WEIGHTS = {
+    'gpa': 0.3,
+    'statement': 0.4,
+    'preferences': 0.3,
+}
+
+# How the preference weight is shared between its components; same proportions
+# as the matching.ipynb prototype (area 0.15, location 0.10, work mode 0.05)
+PREFERENCE_SPLIT = {
+    'area': 0.5,
+    'location': 1 / 3,
+    'work_mode': 1 / 6,
+}
+
+MAX_RANKED_AREAS = 5
+
+# Area score for a shared area, by the rank the student gave it (1st..5th)
+RANK_WEIGHTS = np.array([1.0, 0.8, 0.6, 0.4, 0.2], dtype=np.float32)
+
+# Component score used when a student or organization states no preference
+NEUTRAL_SCORE = 0.5
+
+STATEMENT_MAX_GRADE = 25.0
+
+LOCATION_ALIASES = {
+    'gta': 'toronto',
+    'greater toronto area': 'toronto',
+}
+
+
+# Interned id tables, stored as fixed-width strings in saved snapshots
+ID_FIELDS = ('student_ids', 'org_ids', 'area_ids')
+ID_DTYPE = 'U36'
+
+# Process-local snapshot of the default cohort, keyed by data generation
+_snapshots = {}
+
+# Saved snapshots kept in COHORT_SNAPSHOT_DIR: the current generation and
+# the one before it, which other processes may still be loading
+KEPT_SNAPSHOTS = 2
+
+
+@dataclass
+class CohortSnapshot:
+    """
+    Students and organizations of one matching run, encoded as arrays.
+
+    Profiles are referred to by their index in the id tables; a bitset row
+    holds one bit per column (location, work mode or area of law) in
+    np.packbits order.
+    """
+
+    student_ids: np.ndarray          # object[n_students] of StudentProfile ids
+    org_ids: np.ndarray              # object[n_orgs] of OrganizationProfile ids
+    area_ids: List                   # AreaOfLaw ids, indexed by area column
+    ranked_areas: np.ndarray         # int16[n_students, 5], area column per rank, -1 = none
+    gpa: np.ndarray                  # float32[n_students], 0-1, NaN = no grades
+    course_points: np.ndarray        # float32[n_students, n_courses], GRADE_FIELDS order, NaN = no grade
+    statement: np.ndarray            # float32[n_students], 0-1, NaN = not graded
+    student_locations: np.ndarray    # uint8[n_students, location bitset bytes]
+    student_work: np.ndarray         # uint8[n_students, work mode bitset bytes]
+    org_areas: np.ndarray            # uint8[n_orgs, area bitset bytes]
+    area_org_ptr: np.ndarray         # int64[n_areas + 1], inverted index offsets
+    area_org_idx: np.ndarray         # int32[n_org_areas], organizations grouped by area
+    org_location: np.ndarray         # int32[n_orgs], location column, -1 = unknown
+    org_work: np.ndarray             # uint8[n_orgs, work mode bitset bytes]
+    org_positions: np.ndarray        # int32[n_orgs], available positions
+    org_filled: np.ndarray           # int32[n_orgs]
+    org_capacity: np.ndarray         # int32[n_orgs], open positions
+
+    @property
+    def n_students(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def n_orgs(self) -> int:
+        return len(self.org_ids)
+
+    def freeze(self) -> 'CohortSnapshot':
+        """Make every array read-only, as shared snapshots must be"""
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+        return self
+
+    def save(self, directory: str):
+        """
+        Write each field to ``<directory>/<field>.npy`` for load() to
+        memory-map; an .npz archive cannot be mapped. The directory is
+        renamed into place once complete, so readers never see a partial
+        snapshot.
+        """
+        partial = f"{directory}.{os.getpid()}.partial"
+        os.makedirs(partial, exist_ok=True)
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if field.name in ID_FIELDS:
+                value = np.array([str(v) for v in value], dtype=ID_DTYPE)
+            np.save(os.path.join(partial, f"{field.name}.npy"), value, allow_pickle=False)
+        try:
+            os.rename(partial, directory)
+        except OSError:
+            # Another process saved this snapshot first
+            shutil.rmtree(partial, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> 'CohortSnapshot':
+        """Read a saved snapshot, memory-mapping its arrays read-only unless mmap is False"""
+        values = {}
+        for field in fields(cls):
+            path = os.path.join(directory, f"{field.name}.npy")
+            array = np.load(path, allow_pickle=False, mmap_mode='r' if mmap else None)
+            if field.name in ID_FIELDS:
+                array = array.astype(object)
+            values[field.name] = array
+        values['area_ids'] = list(values['area_ids'])
+        return cls(**values).freeze()
+
+
+@dataclass
+class CandidatePairs:
+    """Student/organization pairs sharing at least one ranked area of law"""
+
+    student: np.ndarray              # int32[n_pairs], sorted by (student, org)
+    org: np.ndarray                  # int32[n_pairs]
+    rank: np.ndarray                 # int8[n_pairs], best shared area rank (0 = first)
+    n_students: int
+    n_orgs: int
+
+    def __len__(self) -> int:
+        return len(self.student)
+
+    @property
+    def pruning_ratio(self) -> float:
+        """Share of all student/organization pairs that never get scored"""
+        total = self.n_students * self.n_orgs
+        return 1 - len(self) / total if total else 0.0
+
+    @cached_property
+    def keys(self) -> np.ndarray:
+        return self.student.astype(np.int64) * self.n_orgs + self.org
+
+    def find(self, student_idx: np.ndarray, org_idx: np.ndarray) -> np.ndarray:
+        """Pair positions for (student, org) index arrays, -1 where not a candidate"""
+        query = np.asarray(student_idx, dtype=np.int64) * self.n_orgs + np.asarray(org_idx)
+        if not len(self):
+            return np.full(len(query), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.keys, query), len(self) - 1)
+        return np.where(self.keys[pos] == query, pos, -1)
+
+
+def _split_tokens(values: Optional[Iterable[str]]) -> List[str]:
+    """Flatten preference values that may themselves be ',' or ';' separated"""
+    tokens = []
+    for value in values or []:
+        tokens.extend(part.strip() for part in re.split(r'[;,]', value or '') if part.strip())
+    return tokens
+
+
+def _normalize_location(text: str) -> str:
+    text = text.lower()
+    for alias, city in LOCATION_ALIASES.items():
+        text = text.replace(alias, city)
+    return text
+
+
+def _location_key(location: Optional[str]) -> str:
+    """City part of an organization location, e.g. 'Toronto, ON' -> 'toronto'"""
+    if not location:
+        return ''
+    return _normalize_location(location.split(',')[0]).strip()
+
+
+def _work_mode_key(value: str) -> str:
+    return value.strip().lower().replace(' ', '-')
+
+
+def get_matching_weights() -> Dict[str, float]:
+    """Read the ``weight_*`` matching settings, falling back to the defaults"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for setting in SystemSetting.objects.filter(key__startswith='weight_'):
+        name = setting.key[len('weight_'):]
+        if name not in weights:
+            continue
+        try:
+            value = setting.get_typed_value()
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid matching weight {setting.key}={setting.value!r}")
+            continue
+        if value is not None:
+            weights[name] = float(value)
+    return weights
+
+
+def load_matching_data(students=None, organizations=None) -> CohortSnapshot:
+    """
+    Load students and organizations into arrays with a fixed number of queries.
+
+    Args:
+        students: StudentProfile queryset to match (default: active, unmatched)
+        organizations: OrganizationProfile queryset (default: active, with
+            open positions; full organizations have no capacity to assign)
+    """
+    if students is None:
+        students = StudentProfile.objects.filter(is_active=True, is_matched=False)
+    if organizations is None:
+        organizations = OrganizationProfile.objects.filter(
+            is_active=True, filled_positions__lt=F('available_positions')
+        )
+
+    student_rows = list(students.values_list('id', 'location_preferences', 'work_preferences'))
+    org_rows = list(organizations.values_list(
+        'id', 'location', 'work_modes', 'available_positions', 'filled_positions'
+    ))
+
+    student_ids = np.array([row[0] for row in student_rows], dtype=object)
+    org_ids = np.array([row[0] for row in org_rows], dtype=object)
+    student_index = {sid: i for i, sid in enumerate(student_ids)}
+    org_index = {oid: j for j, oid in enumerate(org_ids)}
+    n_students, n_orgs = len(student_ids), len(org_ids)
+
+    # Areas of law: student rankings and organization offerings share one column space
+    ranking_rows = list(
+        StudentAreaRanking.objects
+        .filter(student_profile__in=students.values('id'), rank__isnull=False)
+        .values_list('student_profile_id', 'area_id', 'rank')
+        .order_by()  # scattered into arrays by index; skip the Meta ordering sort
+    )
+    through = OrganizationProfile.areas_of_law.through
+    org_area_rows = list(
+        through.objects
+        .filter(organizationprofile_id__in=organizations.values('id'))
+        .values_list('organizationprofile_id', 'areaoflaw_id')
+    )
+    area_ids = sorted({row[1] for row in ranking_rows} | {row[1] for row in org_area_rows}, key=str)
+    area_index = {aid: k for k, aid in enumerate(area_ids)}
+
+    ranked_areas = np.full((n_students, MAX_RANKED_AREAS), -1, dtype=np.int16)
+    for student_id, area_id, rank in ranking_rows:
+        if 1 <= rank <= MAX_RANKED_AREAS:
+            ranked_areas[student_index[student_id], rank - 1] = area_index[area_id]
+
+    org_areas = np.zeros((n_orgs, len(area_ids)), dtype=bool)
+    for org_id, area_id in org_area_rows:
+        org_areas[org_index[org_id], area_index[area_id]] = True
+
+    # Inverted index: area column -> organizations offering it, CSR style
+    area_col, org_col = np.nonzero(org_areas.T)
+    area_org_idx = org_col.astype(np.int32)
+    area_org_ptr = np.concatenate(
+        [[0], np.cumsum(np.bincount(area_col, minlength=len(area_ids)))]
+    ).astype(np.int64)
+
+    # Grades: the stored GPA (mean grade points across the graded courses,
+    # scaled to 0-1) and points per course
+    gpa = np.full(n_students, np.nan, dtype=np.float32)
+    course_points = np.full((n_students, len(GRADE_FIELDS)), np.nan, dtype=np.float32)
+    grade_rows = StudentGrade.objects.filter(
+        student_profile__in=students.values('id')
+    ).values_list('student_profile_id', 'gpa', 'course_points')
+    for student_id, student_gpa, points in grade_rows:
+        i = student_index[student_id]
+        if student_gpa is not None:
+            gpa[i] = student_gpa
+        if points:
+            course_points[i] = [np.nan if p is None else p for p in points]
+
+    # Statements: mean statement grade out of 25, scaled to 0-1
+    statement = np.full(n_students, np.nan, dtype=np.float32)
+    statement_rows = (
+        Statement.objects
+        .filter(student_profile__in=students.values('id'), statement_grade__isnull=False)
+        .values('student_profile_id')
+        .annotate(avg_grade=Avg('statement_grade'))
+        .values_list('student_profile_id', 'avg_grade')
+    )
+    for student_id, avg_grade in statement_rows:
+        statement[student_index[student_id]] = min(avg_grade / STATEMENT_MAX_GRADE, 1.0)
+
+    # Locations: columns are the distinct organization cities; a student
+    # preference selects every city it mentions ("Toronto or London")
+    org_location_keys = [_location_key(row[1]) for row in org_rows]
+    location_keys = sorted({key for key in org_location_keys if key})
+    location_index = {key: k for k, key in enumerate(location_keys)}
+    org_location = np.array(
+        [location_index.get(key, -1) for key in org_location_keys], dtype=np.int32
+    )
+    student_locations = np.zeros((n_students, len(location_keys)), dtype=bool)
+    for i, row in enumerate(student_rows):
+        text = _normalize_location(' '.join(_split_tokens(row[1])))
+        if text:
+            for key, k in location_index.items():
+                if key in text:
+                    student_locations[i, k] = True
+
+    # Work modes: shared vocabulary of in-person / hybrid / remote style keys
+    student_modes = [{_work_mode_key(t) for t in _split_tokens(row[2])} for row in student_rows]
+    org_modes = [{_work_mode_key(t) for t in _split_tokens(row[2])} for row in org_rows]
+    work_keys = sorted(set().union(*student_modes, *org_modes))
+    work_index = {key: k for k, key in enumerate(work_keys)}
+    student_work = np.zeros((n_students, len(work_keys)), dtype=bool)
+    for i, modes in enumerate(student_modes):
+        student_work[i, [work_index[m] for m in modes]] = True
+    org_work = np.zeros((n_orgs, len(work_keys)), dtype=bool)
+    for j, modes in enumerate(org_modes):
+        org_work[j, [work_index[m] for m in modes]] = True
+
+    org_positions = np.array([row[3] or 0 for row in org_rows], dtype=np.int32)
+    org_filled = np.array([row[4] or 0 for row in org_rows], dtype=np.int32)
+    org_capacity = np.maximum(org_positions - org_filled, 0)
+
+    return CohortSnapshot(
+        student_ids=student_ids,
+        org_ids=org_ids,
+        area_ids=area_ids,
+        ranked_areas=ranked_areas,
+        gpa=gpa,
+        course_points=course_points,
+        statement=statement,
+        student_locations=np.packbits(student_locations, axis=1),
+        student_work=np.packbits(student_work, axis=1),
+        org_areas=np.packbits(org_areas, axis=1),
+        area_org_ptr=area_org_ptr,
+        area_org_idx=area_org_idx,
+        org_location=org_location,
+        org_work=np.packbits(org_work, axis=1),
+        org_positions=org_positions,
+        org_filled=org_filled,
+        org_capacity=org_capacity,
+    )
+
+
+def cohort_snapshot() -> CohortSnapshot:
+    """
+    Read-only snapshot of the default cohort (active, unmatched students and
+    organizations with open positions) for the current data generation.
+
+    Each process builds it once per generation. With
+    settings.COHORT_SNAPSHOT_DIR set, the first process to build it saves it
+    there and other processes memory-map that copy instead of querying, so
+    workers share one set of pages.
+    """
+    generation = current_generation()
+    snapshot = _snapshots.get(generation)
+    if snapshot is not None:
+        return snapshot
+
+    directory = settings.COHORT_SNAPSHOT_DIR
+    path = os.path.join(directory, f"cohort-{generation}") if directory else None
+    snapshot = None
+    if path and os.path.isdir(path):
+        try:
+            snapshot = CohortSnapshot.load(path)
+        except (OSError, ValueError) as e:
+            # Pruned by another process while being read
+            logger.warning(f"Could not load cohort snapshot {path}, querying instead: {str(e)}")
+    if snapshot is None:
+        snapshot = load_matching_data().freeze()
+        if path and not os.path.isdir(path):
+            os.makedirs(directory, exist_ok=True)
+            snapshot.save(path)
+            prune_snapshots(directory)
+    _snapshots.clear()
+    _snapshots[generation] = snapshot
+    return snapshot
+
+
+def prune_snapshots(directory: str):
+    """
+    Remove saved snapshots beyond the KEPT_SNAPSHOTS most recent, so a
+    process that has just looked up the previous generation can still load
+    it. Processes still mapping removed snapshots keep their pages until
+    they let go.
+    """
+    saved = []
+    for name in os.listdir(directory):
+        if name.startswith('cohort-') and not name.endswith('.partial'):
+            try:
+                saved.append((os.path.getmtime(os.path.join(directory, name)), name))
+            except OSError:
+                continue
+    for _, name in sorted(saved, reverse=True)[KEPT_SNAPSHOTS:]:
+        shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _has_bit(bitsets: np.ndarray, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """Whether each row's bitset has its column's bit set; column -1 never is"""
+    result = np.zeros(len(rows), dtype=bool)
+    known = columns >= 0
+    if bitsets.shape[1] and known.any():
+        c = columns[known].astype(np.int64)
+        result[known] = ((bitsets[rows[known], c >> 3] >> (7 - (c & 7))) & 1).astype(bool)
+    return result
+
+
+def generate_candidates(data: CohortSnapshot, rows: Optional[np.ndarray] = None) -> CandidatePairs:
+    """
+    Expand each student's ranked areas through the area -> organization index.
+
+    A pair reached through several shared areas is kept once, at the best
+    rank it was reached through.
+
+    Args:
+        rows: Student indices to expand (default: all); the pairs keep the
+            full student index space, other students just have none
+    """
+    ptr, idx = data.area_org_ptr, data.area_org_idx
+    if rows is None:
+        rows = np.arange(data.n_students, dtype=np.int32)
+    else:
+        rows = np.unique(np.asarray(rows, dtype=np.int32))
+    students, orgs, ranks = [], [], []
+    for rank in range(MAX_RANKED_AREAS):
+        areas = data.ranked_areas[rows, rank].astype(np.int64)
+        has_area = areas >= 0
+        areas = areas[has_area]
+        counts = ptr[areas + 1] - ptr[areas]
+        total = int(counts.sum())
+        # Position of every (student, organization) entry inside the index
+        offsets = np.repeat(ptr[areas] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        students.append(np.repeat(rows[has_area], counts))
+        orgs.append(idx[offsets])
+        ranks.append(np.full(total, rank, dtype=np.int8))
+
+    student = np.concatenate(students) if students else np.empty(0, dtype=np.int32)
+    org = np.concatenate(orgs) if orgs else np.empty(0, dtype=np.int32)
+    rank = np.concatenate(ranks) if ranks else np.empty(0, dtype=np.int8)
+
+    order = np.lexsort((rank, org, student))
+    student, org, rank = student[order], org[order], rank[order]
+    first = np.ones(len(student), dtype=bool)
+    first[1:] = (student[1:] != student[:-1]) | (org[1:] != org[:-1])
+    return CandidatePairs(
+        student=student[first].astype(np.int32),
+        org=org[first].astype(np.int32),
+        rank=rank[first],
+        n_students=data.n_students,
+        n_orgs=data.n_orgs,
+    )
+
+
+def compute_pair_features(data: CohortSnapshot, pairs: CandidatePairs) -> Dict[str, np.ndarray]:
+    """
+    Compute each score component for every candidate pair, all in 0-1.
+
+    Returns float32[n_pairs] arrays: 'gpa', 'statement', 'area', 'location'
+    and 'work_mode'.
+    """
+    s, o = pairs.student, pairs.org
+
+    area = RANK_WEIGHTS[pairs.rank.astype(np.int64)]
+
+    # Location: the bit of the organization's city in the student's location bitset
+    location = _has_bit(data.student_locations, s, data.org_location[o]).astype(np.float32)
+    no_location = ~data.student_locations.any(axis=1)[s] | (data.org_location[o] < 0)
+    location[no_location] = NEUTRAL_SCORE
+
+    # Work mode: any shared mode counts as a match
+    work_mode = (data.student_work[s] & data.org_work[o]).any(axis=1).astype(np.float32)
+    no_work = ~data.student_work.any(axis=1)[s] | ~data.org_work.any(axis=1)[o]
+    work_mode[no_work] = NEUTRAL_SCORE
+
+    return {
+        'gpa': np.nan_to_num(data.gpa, nan=NEUTRAL_SCORE)[s],
+        'statement': np.nan_to_num(data.statement, nan=NEUTRAL_SCORE)[s],
+        'area': area,
+        'location': location,
+        'work_mode': work_mode,
+    }
+
+
+def combine_scores(features: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Weighted fit score per candidate pair"""
+    preferences = (
+        PREFERENCE_SPLIT['area'] * features['area']
+        + PREFERENCE_SPLIT['location'] * features['location']
+        + PREFERENCE_SPLIT['work_mode'] * features['work_mode']
+    )
+    return (
+        weights['preferences'] * preferences
+        + weights['gpa'] * features['gpa']
+        + weights['statement'] * features['statement']
+    ).astype(np.float32)
+
+
+def score_candidates(data: CohortSnapshot, weights: Dict[str, float] = None,
+                     rows: Optional[np.ndarray] = None):
+    """
+    Generate candidate pairs and score them in one vectorized pass.
+
+    Args:
+        rows: Only score these student indices (see generate_candidates)
+
+    Returns:
+        Tuple of (CandidatePairs, float32[n_pairs] scores)
+    """
+    pairs = generate_candidates(data, rows)
+    scores = combine_scores(compute_pair_features(data, pairs), weights or get_matching_weights())
+    return pairs, scores
+
+
+def matched_area_ids(data: CohortSnapshot, pairs: CandidatePairs, pair_idx: np.ndarray) -> List:
+    """Best-ranked area of law shared by each of the given pairs"""
+    columns = data.ranked_areas[pairs.student[pair_idx], pairs.rank[pair_idx]]
+    return [data.area_ids[k] if k >= 0 else None for k in columns.tolist()]
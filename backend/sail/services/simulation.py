@@ -0,0 +1,156 @@
+"""
+File: backend/sail/services/simulation.py
+Purpose: What-if matching runs over alternative score weights
+
+The students and organizations of the next matching run are loaded, their
+candidate pairs generated and each pair's score components computed once
+per data generation. A weight configuration then only recombines those
+components and solves the assignment, so several configurations are
+solved side by side on a thread pool and compared with the
+assignment the current ``weight_*`` settings produce for the same
+students, a fresh solve rather than any stored round: the next run's
+students are the unmatched ones, who hold no Match rows yet. Nothing is
+written to the database.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List
+
+import numpy as np
+
+from ..cache import generation_cached
+from .assignment import SOLVERS, assignment_statistics
+from .matching_engine import (
+    DEFAULT_WEIGHTS, MAX_RANKED_AREAS, cohort_snapshot, combine_scores, compute_pair_features,
+    generate_candidates, get_matching_weights
+)
+from .stable_matching import stable_assignment
+
+# Upper bound on weight configurations per simulation
+MAX_SCENARIOS = 20
+
+
+@generation_cached('matching_features')
+def matching_features():
+    """
+    (CandidatePairs, score components per pair, int32[n_orgs] open capacity)
+    of the students and organizations a matching run would load now
+    """
+    data = cohort_snapshot()
+    pairs = generate_candidates(data)
+    return pairs, compute_pair_features(data, pairs), data.org_capacity
+
+
+def parse_weights(scenario, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Complete a scenario's weights with the defaults, rejecting unknown or negative ones"""
+    if not isinstance(scenario, dict):
+        raise ValueError("Each scenario must be an object of weights")
+    unknown = set(scenario) - set(DEFAULT_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown weights: {', '.join(sorted(unknown))}")
+    weights = dict(defaults)
+    for name, value in scenario.items():
+        try:
+            weights[name] = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Weight {name} must be a number")
+        if weights[name] < 0:
+            raise ValueError(f"Weight {name} must not be negative")
+    return weights
+
+
+def solve_scenario(pairs, features: Dict[str, np.ndarray], capacity: np.ndarray,
+                   algorithm: str, weights: Dict[str, float]):
+    """
+    Score and solve one weight configuration on precomputed features.
+
+    Returns:
+        Tuple of (int32[n_students] assignment, metrics dict)
+    """
+    scores = combine_scores(features, weights)
+    if algorithm == 'stable':
+        assignment = stable_assignment(pairs, scores, capacity)
+    else:
+        assignment = SOLVERS[algorithm](pairs, scores, capacity)
+
+    metrics = assignment_statistics(pairs, scores, assignment, capacity)
+    assigned = np.flatnonzero(assignment >= 0)
+    # Rank the student gave the best shared area of their placement, 1 = first choice
+    ranks = pairs.rank[pairs.find(assigned, assignment[assigned])].astype(np.int64) + 1
+    metrics.update({
+        'match_rate': round(assigned.size / pairs.n_students, 4) if pairs.n_students else 0.0,
+        'mean_rank': round(float(ranks.mean()), 4) if ranks.size else None,
+        'rank_counts': np.bincount(ranks, minlength=MAX_RANKED_AREAS + 1)[1:].tolist(),
+    })
+    return assignment, metrics
+
+
+def assignment_diff(assignment: np.ndarray, current: np.ndarray) -> dict:
+    """How many students a scenario places differently from a fresh solve under the current weights"""
+    placed, placed_now = assignment >= 0, current >= 0
+    return {
+        'changed': int((assignment != current).sum()),
+        'moved': int((placed & placed_now & (assignment != current)).sum()),
+        'newly_placed': int((placed & ~placed_now).sum()),
+        'unplaced': int((~placed & placed_now).sum()),
+    }
+
+
+def check_scenarios(scenarios: List[dict], algorithm: str, current_weights: Dict[str, float]) -> List[Dict[str, float]]:
+    """
+    Validate a simulation request before any work is queued.
+
+    Returns:
+        Each scenario's complete weights
+    """
+    if algorithm not in SOLVERS and algorithm != 'stable':
+        raise ValueError(f"Unknown matching algorithm: {algorithm}")
+    if not scenarios:
+        raise ValueError("No scenarios to simulate")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios can be simulated at once")
+    return [parse_weights(s, current_weights) for s in scenarios]
+
+
+def simulate_weights(scenarios: List[dict], algorithm: str = 'greedy', workers: int = None) -> dict:
+    """
+    Solve the next matching run under each weight configuration.
+
+    Args:
+        scenarios: Weight configurations; weights left out keep their
+            current setting
+        algorithm: 'greedy', 'optimal' or 'stable', as for a matching round
+        workers: Thread pool size (default: one per CPU, at most one per
+            configuration). Threads rather than processes, so simulations
+            can run inside Celery's prefork workers, which are daemonic and
+            cannot start child processes; the solvers spend most of their
+            time in NumPy and SciPy.
+
+    Returns:
+        The current weights' metrics and, per scenario, its weights, metrics
+        and ``diff_vs_current_weights``: how its assignment differs from
+        the one solved here under the current weights (not from stored
+        Match rows)
+    """
+    current_weights = get_matching_weights()
+    configurations = [current_weights] + check_scenarios(scenarios, algorithm, current_weights)
+
+    pairs, features, capacity = matching_features()
+    workers = min(workers or os.cpu_count() or 1, len(configurations))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(partial(solve_scenario, pairs, features, capacity, algorithm), configurations))
+
+    (current, current_metrics), solved = results[0], results[1:]
+    return {
+        'algorithm': algorithm,
+        'students': pairs.n_students,
+        'organizations': pairs.n_orgs,
+        'candidate_pairs': len(pairs),
+        'current': {'weights': current_weights, **current_metrics},
+        'scenarios': [
+            {'weights': weights, **metrics, 'diff_vs_current_weights': assignment_diff(assignment, current)}
+            for weights, (assignment, metrics) in zip(configurations[1:], solved)
+        ],
+    }
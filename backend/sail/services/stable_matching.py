@@ -0,0 +1,123 @@
+"""
+File: backend/sail/services/stable_matching.py
+Purpose: Student-proposing deferred acceptance with organization capacities
+
+Students propose down a preference list ordered by their StudentAreaRanking
+(best-ranked shared area first, fit score within an area); organizations
+hold the best students by fit score up to their open capacity. Everything
+runs on the scored candidate pairs, with no ORM access per proposal.
+"""
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+
+def student_preferences(pairs, scores: np.ndarray):
+    """
+    Order candidate pairs into per-student preference lists.
+
+    Returns:
+        Tuple of (int64[n_pairs] pair indices grouped by student, most
+                  preferred first; int64[n_students + 1] list offsets)
+    """
+    order = np.lexsort((-scores, pairs.rank, pairs.student))
+    ptr = np.concatenate([[0], np.cumsum(np.bincount(pairs.student, minlength=pairs.n_students))])
+    return order, ptr
+
+
+def stable_assignment(pairs, scores: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """
+    Student-optimal stable assignment via deferred acceptance.
+
+    Each organization's held students live in an array-backed min-heap of
+    (score, -student) keys, so the weakest held student is always at the top
+    and a proposal is accepted or rejected in O(log capacity). Ties on score
+    are broken towards the lower student index. Total work is bounded by the
+    number of candidate pairs, i.e. students x preference list length.
+
+    Returns:
+        int32[n_students] organization index per student, -1 when unassigned
+    """
+    order, ptr = student_preferences(pairs, scores)
+    list_orgs = pairs.org[order].tolist()
+    list_scores = scores[order].tolist()
+    ptr = ptr.tolist()
+    capacity = capacity.tolist()
+
+    assignment = [-1] * pairs.n_students
+    next_choice = ptr[:-1]
+    held = [[] for _ in capacity]
+    free = deque(s for s in range(pairs.n_students) if ptr[s] < ptr[s + 1])
+
+    while free:
+        s = free.popleft()
+        p = next_choice[s]
+        if p >= ptr[s + 1]:
+            continue
+        next_choice[s] = p + 1
+        o = list_orgs[p]
+
+        key = (list_scores[p], -s)
+        heap = held[o]
+        if len(heap) < capacity[o]:
+            heapq.heappush(heap, key)
+            assignment[s] = o
+        elif heap and key > heap[0]:
+            rejected = -heapq.heapreplace(heap, key)[1]
+            assignment[rejected] = -1
+            assignment[s] = o
+            free.append(rejected)
+        else:
+            free.append(s)
+
+    return np.array(assignment, dtype=np.int32)
+
+
+def stability_certificate(pairs, scores: np.ndarray, capacity: np.ndarray,
+                          assignment: np.ndarray) -> dict:
+    """
+    Check an assignment for blocking pairs in one vectorized pass.
+
+    A candidate pair (s, o) blocks when s prefers o to its current placement
+    (or is unplaced) and o has a free position or holds a student it ranks
+    below s.
+    """
+    order, ptr = student_preferences(pairs, scores)
+
+    # position[p] = place of pair p in its student's preference list
+    position = np.empty(len(pairs), dtype=np.int64)
+    position[order] = np.arange(len(pairs)) - ptr[pairs.student[order]]
+
+    students = np.arange(pairs.n_students)
+    placed = students[assignment >= 0]
+    held_pairs = pairs.find(placed, assignment[placed])
+    current = np.full(pairs.n_students, np.iinfo(np.int64).max)
+    current[placed] = position[held_pairs]
+    prefers = position < current[pairs.student]
+
+    # Weakest held student per organization under the (score, -student) order
+    held_count = np.bincount(assignment[placed], minlength=pairs.n_orgs)
+    worst_score = np.full(pairs.n_orgs, np.inf)
+    worst_student = np.full(pairs.n_orgs, -1)
+    if placed.size:
+        held_scores = scores[held_pairs].astype(np.float64)
+        weakest_first = np.lexsort((-placed, held_scores))
+        held_orgs = assignment[placed][weakest_first]
+        _, first = np.unique(held_orgs, return_index=True)
+        worst = weakest_first[first]
+        worst_score[held_orgs[first]] = held_scores[worst]
+        worst_student[held_orgs[first]] = placed[worst]
+
+    o = pairs.org
+    has_room = (held_count < capacity)[o]
+    outranks = (scores > worst_score[o]) | (
+        (scores == worst_score[o]) & (pairs.student < worst_student[o])
+    )
+    blocking = prefers & (has_room | outranks)
+
+    return {
+        'stable': not bool(blocking.any()),
+        'blocking_pairs': int(blocking.sum()),
+    }
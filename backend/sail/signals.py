@@ -0,0 +1,129 @@
+"""
+File: backend/sail/signals.py
+Purpose: Signal receivers keeping the dashboard counters and the
+         generation cache up to date
+"""
+
+from collections import Counter
+
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_generation
+from .counters import (
+    STUDENT_COUNTER_FIELDS, apply_deltas, counters_deferred, created_key, student_counts
+)
+from .models import (
+    StudentProfile, OrganizationProfile, FacultyProfile, StudentAreaRanking, AreaOfLaw, ImportLog,
+    Statement, StudentGrade, SelfProposedExternship, MatchingRound, Match
+)
+
+# Models whose writes change data served from the generation cache or
+# versioned by it in ETags (see conditional.py), including the relations
+# nested in student and organization responses
+CACHED_SOURCES = [
+    StudentProfile, OrganizationProfile, FacultyProfile, StudentAreaRanking, AreaOfLaw, ImportLog,
+    Statement, StudentGrade, SelfProposedExternship, MatchingRound, Match,
+]
+
+
+@receiver(pre_save, sender=StudentProfile)
+def remember_student_counts(sender, instance, raw=False, **kwargs):
+    """Note which counters the stored row contributes to before it changes"""
+    if raw or counters_deferred() or instance._state.adding:
+        return
+    stored = StudentProfile.objects.filter(pk=instance.pk).values(*STUDENT_COUNTER_FIELDS).first()
+    instance._stored_counts = student_counts(stored) if stored else {}
+
+
+@receiver(post_save, sender=StudentProfile)
+def update_student_counts(sender, instance, created, raw=False, **kwargs):
+    if raw or counters_deferred():
+        return
+    values = {field: getattr(instance, field) for field in STUDENT_COUNTER_FIELDS}
+    deltas = Counter(student_counts(values))
+    deltas.subtract(getattr(instance, '_stored_counts', {}))
+    if created:
+        deltas[created_key('students', instance.created_at)] += 1
+    deltas.pop(None, None)
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def remove_student_counts(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    values = {field: getattr(instance, field) for field in STUDENT_COUNTER_FIELDS}
+    deltas = Counter({key: -1 for key in student_counts(values)})
+    deltas[created_key('students', instance.created_at)] -= 1
+    deltas.pop(None, None)
+    apply_deltas(deltas)
+
+
+@receiver(post_save, sender=OrganizationProfile)
+@receiver(post_save, sender=FacultyProfile)
+def add_profile_counts(sender, instance, created, raw=False, **kwargs):
+    if raw or counters_deferred() or not created:
+        return
+    prefix = 'organizations' if sender is OrganizationProfile else 'faculty'
+    deltas = {f"{prefix}.total": 1, created_key(prefix, instance.created_at): 1}
+    deltas.pop(None, None)
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=OrganizationProfile)
+@receiver(post_delete, sender=FacultyProfile)
+def remove_profile_counts(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    prefix = 'organizations' if sender is OrganizationProfile else 'faculty'
+    deltas = {f"{prefix}.total": -1, created_key(prefix, instance.created_at): -1}
+    deltas.pop(None, None)
+    apply_deltas(deltas)
+
+
+@receiver(pre_save, sender=StudentAreaRanking)
+def remember_ranking_area(sender, instance, raw=False, **kwargs):
+    if raw or counters_deferred() or instance._state.adding:
+        return
+    instance._stored_area_id = (
+        StudentAreaRanking.objects.filter(pk=instance.pk).values_list('area_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=StudentAreaRanking)
+def update_ranking_counts(sender, instance, created, raw=False, **kwargs):
+    if raw or counters_deferred():
+        return
+    stored = None if created else getattr(instance, '_stored_area_id', None)
+    if stored == instance.area_id:
+        return
+    deltas = Counter({f"area.{instance.area_id}": 1})
+    if stored:
+        deltas[f"area.{stored}"] -= 1
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=StudentAreaRanking)
+def remove_ranking_counts(sender, instance, **kwargs):
+    if counters_deferred():
+        return
+    apply_deltas({f"area.{instance.area_id}": -1})
+
+
+def invalidate_cached_data(sender, raw=False, **kwargs):
+    # Bulk writes under deferred_counters() invalidate once when the block exits
+    if not raw and not counters_deferred():
+        bump_generation()
+
+
+for model in CACHED_SOURCES:
+    post_save.connect(invalidate_cached_data, sender=model, dispatch_uid=f'invalidate_save_{model.__name__}')
+    post_delete.connect(invalidate_cached_data, sender=model, dispatch_uid=f'invalidate_delete_{model.__name__}')
+
+
+@receiver(m2m_changed, sender=OrganizationProfile.areas_of_law.through)
+def invalidate_organization_areas(sender, action, **kwargs):
+    # The areas organizations offer decide the candidate pairs of matching snapshots
+    if action.startswith('post_'):
+        invalidate_cached_data(sender, **kwargs)
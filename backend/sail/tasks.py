@@ -6,9 +6,15 @@ Celery tasks for background processing of uploads and other operations
 
 import os
 import logging
-from celery import shared_task
+from celery import shared_task, chord
 from django.conf import settings
-from .services import import_students_from_csv, parse_grades_pdf
+from .services import parse_grades_pdf
+from .parsers.student_csv_parser import StudentCSVParser
+from .parsers.pdf_parser import PDFBatchGradeParser, extract_cached_pdf_entry
+from .counters import reconcile_counters
+from .models import MatchingRound
+from .services.matching_algorithm import PHASES, MatchingCancelled, run_matching
+from .services.simulation import simulate_weights
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +42,15 @@ def process_csv_import_task(file_path, user_id=None):
     
     try:
         logger.info(f"Processing CSV import: {file_path}")
-        results = import_students_from_csv(file_path, user)
+        # Stream the file without collecting the saved profiles, so memory
+        # stays flat for large exports
+        parser = StudentCSVParser(file_path, imported_by=user.username if user else None)
+        _, errors = parser.parse(return_objects=False)
+        results = {
+            'success_count': parser.success_count,
+            'error_count': parser.error_count,
+            'errors': errors
+        }
         
         # Clean up the file after import
         if os.path.exists(file_path):
@@ -101,3 +115,126 @@ def process_pdf_grades_task(file_path, student_id=None, user_id=None):
             'student_id': student_id,
             'grades': {}
         }
+
+
+@shared_task
+def extract_pdf_grades_task(zip_path, member):
+    """
+    Extract student info and grades from one PDF of a ZIP batch, served
+    from the extraction cache when the same bytes were seen before
+    (the result feeds save_pdf_batch_task)
+    """
+    return extract_cached_pdf_entry(zip_path, member)
+
+@shared_task
+def save_pdf_batch_task(results, zip_path, imported_by=None):
+    """
+    Chord callback for a ZIP batch: match all extracted PDFs to students,
+    upsert their grades in bulk and write one ImportLog for the archive
+
+    Returns:
+        dict: Results with success/error counts and details
+    """
+    parser = PDFBatchGradeParser(zip_path, imported_by=imported_by)
+    try:
+        grades = parser.save_results(results)
+        parser.create_import_log()
+        return {
+            'success_count': len(grades),
+            'pdf_count': len(results),
+            'cache_hits': parser.cache_hits,
+            'error_count': parser.error_count,
+            'errors': parser.errors
+        }
+    except Exception as e:
+        logger.exception(f"Error in PDF batch task: {str(e)}")
+        return {
+            'success_count': 0,
+            'error_count': 1,
+            'errors': [f"Task error: {str(e)}"]
+        }
+    finally:
+        if os.path.exists(zip_path):
+            try:
+                os.remove(zip_path)
+                logger.info(f"Removed temporary ZIP file: {zip_path}")
+            except Exception as e:
+                logger.error(f"Error removing temporary file {zip_path}: {str(e)}")
+
+def start_pdf_batch(zip_path, members, imported_by=None):
+    """
+    Fan text extraction out as a Celery group, one task per PDF, with
+    save_pdf_batch_task as the chord callback. Returns the callback's result.
+    """
+    header = [extract_pdf_grades_task.s(zip_path, member) for member in members]
+    return chord(header)(save_pdf_batch_task.s(zip_path, imported_by))
+
+@shared_task
+def reconcile_dashboard_counters_task():
+    """
+    Periodic job (see CELERY_BEAT_SCHEDULE) recounting the dashboard counters
+    from the source tables to correct any drift
+
+    Returns:
+        dict: Number of counters that had drifted
+    """
+    drifted = reconcile_counters()
+    if drifted:
+        logger.warning(f"Corrected {drifted} drifted dashboard counters")
+    return {'drifted': drifted}
+
+@shared_task(bind=True)
+def run_matching_task(self, round_number, algorithm=None):
+    """
+    Run a matching round in the background (dispatched by
+    MatchingRoundViewSet.run_algorithm). While running, the task state is
+    PROGRESS with the current phase in its meta, which get_task_status
+    reports; a round cancelled through MatchingRoundViewSet.cancel stops at
+    the next phase boundary.
+
+    Returns:
+        dict: Final status of the round with its matched counts and statistics
+    """
+    def report(phase, **details):
+        # Eager runs (tests, shell) have no result backend entry to update
+        if not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={
+                'round_number': round_number,
+                'phase': phase,
+                'step': PHASES.index(phase) + 1,
+                'steps': len(PHASES),
+                **details,
+            })
+
+    try:
+        matching_round = run_matching(round_number, algorithm=algorithm, progress=report)
+    except MatchingCancelled as e:
+        logger.info(str(e))
+        checkpoint = MatchingRound.objects.filter(round_number=round_number).values_list(
+            'checkpoint', flat=True
+        ).first()
+        return {
+            'status': 'cancelled',
+            'round_number': round_number,
+            'completed_phase': checkpoint['phase'] if checkpoint else None,
+        }
+
+    return {
+        'status': matching_round.status,
+        'round_number': round_number,
+        'algorithm': matching_round.algorithm,
+        'matched_count': matching_round.matched_count,
+        'total_students': matching_round.total_students,
+        'statistics': matching_round.statistics,
+    }
+
+@shared_task
+def simulate_weights_task(scenarios, algorithm='greedy'):
+    """
+    Compare weight scenarios in the background (dispatched by
+    MatchingRoundViewSet.simulate); see simulate_weights()
+
+    Returns:
+        dict: The current weights' metrics and each scenario's metrics and diff
+    """
+    return simulate_weights(scenarios, algorithm)
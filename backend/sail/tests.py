@@ -1,3 +1,1029 @@
-from django.test import TestCase
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from dataclasses import fields
+from functools import partialmethod
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .counters import count_all, reconcile_counters
+from .fuzzy import similar_organizations, similar_students, trigram_enabled
+from .grades import grade_scale
+from .parsers.base import CSVParser
+from .parsers.pdf_parser import cached_extractions, store_extractions
+from .parsers.organization_csv_parser import OrganizationCSVParser
+from .parsers.student_csv_parser import StudentCSVParser
+from .models import (
+    DashboardCounter, StudentProfile, OrganizationProfile, FacultyProfile, AreaOfLaw,
+    StudentAreaRanking, Statement, StudentGrade, SelfProposedExternship, MatchingRound, Match, ImportLog,
+    PDFExtraction
+)
+from .services.dashboard import activity_feed_query, get_dashboard_stats, get_recent_activity
+from .services.assignment import optimal_assignment, repair_assignment
+from .services.stable_matching import stability_certificate, stable_assignment
+from .services.matching_algorithm import STALE_RUN_AFTER, MatchingCancelled, rematch_round, run_matching
+from .cache import current_generation
+from .services.matching_engine import (
+    DEFAULT_WEIGHTS, PREFERENCE_SPLIT, RANK_WEIGHTS, CandidatePairs, CohortSnapshot, cohort_snapshot,
+    compute_pair_features, generate_candidates, load_matching_data, score_candidates
+)
+from .services.simulation import simulate_weights
+from .tasks import extract_pdf_grades_task, run_matching_task, save_pdf_batch_task, simulate_weights_task
+
+
+class DashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        areas = [AreaOfLaw.objects.create(name=f"Area {i}") for i in range(3)]
+        for i, (active, matched, approval) in enumerate([
+            (True, False, False), (True, True, False), (True, True, True),
+            (False, False, True), (False, False, False),
+        ]):
+            student = StudentProfile.objects.create(
+                student_id=f"S{i}", is_active=active, is_matched=matched,
+                admin_approval_needed=approval,
+            )
+            for rank, area in enumerate(areas[:i % 3 + 1], start=1):
+                StudentAreaRanking.objects.create(student_profile=student, area=area, rank=rank)
+        OrganizationProfile.objects.create(name="Org")
+        FacultyProfile.objects.create(full_name="Faculty")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_query_count(self):
+        # The counters plus the names of the charted areas
+        with self.assertNumQueries(2):
+            get_dashboard_stats()
+
+    def test_counts(self):
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['total_students'], 5)
+        self.assertEqual(stats['matched_students'], 2)
+        self.assertEqual(stats['pending_matches'], 1)
+        self.assertEqual(stats['approval_needed'], 2)
+        self.assertEqual(
+            {row['status']: row['count'] for row in stats['match_status_chart']},
+            {'Pending': 1, 'Matched': 2, 'Declined': 2, 'Approved': 1},
+        )
+        self.assertEqual(stats['students']['active'], 3)
+        self.assertEqual(stats['students']['new'], 5)
+        self.assertEqual(stats['organizations']['total'], 1)
+        self.assertEqual(stats['organizations']['new'], 1)
+        self.assertEqual(stats['faculty']['total'], 1)
+        self.assertEqual(stats['area_law_chart'][0], {'area': 'Area 0', 'count': 5})
+
+    def test_signals_track_source_tables(self):
+        student = StudentProfile.objects.get(student_id="S0")
+        student.is_matched = True
+        student.save()
+        StudentProfile.objects.get(student_id="S4").delete()
+        ranking = StudentAreaRanking.objects.filter(student_profile__student_id="S2").first()
+        ranking.area = AreaOfLaw.objects.create(name="Area 3")
+        ranking.save()
+        OrganizationProfile.objects.first().delete()
+
+        counters = dict(DashboardCounter.objects.exclude(value=0).values_list('key', 'value'))
+        self.assertEqual(counters, {key: value for key, value in count_all().items() if value})
+        self.assertEqual(reconcile_counters(), 0)
+
+    def test_reconcile_corrects_bulk_writes(self):
+        StudentProfile.objects.update(is_matched=True)
+        self.assertEqual(get_dashboard_stats()['matched_students'], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertGreater(reconcile_counters(), 0)
+        self.assertEqual(get_dashboard_stats()['matched_students'], 5)
+
+    def test_cached_until_write(self):
+        get_dashboard_stats()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_stats()['total_students'], 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentProfile.objects.create(student_id="S5")
+        self.assertEqual(get_dashboard_stats()['total_students'], 6)
+
+
+    def test_activity_feed_order_and_limit(self):
+        now = timezone.now()
+        StudentProfile.objects.update(updated_at=now - timedelta(days=10))
+        OrganizationProfile.objects.update(updated_at=now - timedelta(days=10))
+        for hours, name in [(1, 'first.csv'), (3, 'second.zip'), (5, 'third.csv')]:
+            log = ImportLog.objects.create(file_name=name, import_type='csv', imported_by='admin')
+            ImportLog.objects.filter(pk=log.pk).update(import_datetime=now - timedelta(hours=hours))
+        StudentProfile.objects.filter(student_id='S0').update(updated_at=now - timedelta(hours=2))
+        OrganizationProfile.objects.update(updated_at=now - timedelta(hours=4))
+
+        feed = [(row['kind'], row['target']) for row in activity_feed_query(limit=4)]
+        self.assertEqual(feed, [
+            ('import', 'first.csv'), ('student', 'Student Profile'),
+            ('import', 'second.zip'), ('org', 'Organization Profile'),
+        ])
+        activity = get_recent_activity(limit=2)
+        self.assertEqual([item['target'] for item in activity], ['first.csv', 'Student Profile'])
+        self.assertEqual([item['date_display'] for item in activity], ['1 hour ago', '2 hours ago'])
+
+class StudentProfileListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        areas = [AreaOfLaw.objects.create(name=f"Area {i}") for i in range(3)]
+        students = StudentProfile.objects.bulk_create(
+            [StudentProfile(student_id=f"S{i}") for i in range(500)]
+        )
+        StudentAreaRanking.objects.bulk_create([
+            StudentAreaRanking(student_profile=student, area=area, rank=rank)
+            for student in students for rank, area in enumerate(areas, start=1)
+        ])
+        Statement.objects.bulk_create(
+            [Statement(student_profile=student, content="Statement") for student in students]
+        )
+        StudentGrade.objects.bulk_create(
+            [StudentGrade(student_profile=student, torts='A') for student in students[::2]]
+        )
+        SelfProposedExternship.objects.bulk_create(
+            [SelfProposedExternship(student_profile=student) for student in students[::5]]
+        )
+
+    def test_list_query_count(self):
+        # ETag version, students with grades and self-proposed externships,
+        # statements, rankings with areas
+        with self.assertNumQueries(4):
+            response = APIClient().get(reverse('studentprofile-list'), {'page_size': 500})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 500)
+        self.assertEqual(response.data['results'][0]['area_rankings'][0]['area_name'], "Area 0")
+
+    def test_sparse_fieldsets(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(reverse('studentprofile-list'), {'fields': 'first_name,is_matched'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'first_name', 'is_matched'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('statements_of_interest', queries[1]['sql'])
+
+        # Relations join a selection when expanded; without ?fields= every field is there
+        with CaptureQueriesContext(connection) as queries:
+            student = APIClient().get(
+                reverse('studentprofile-list'), {'fields': 'first_name', 'expand': 'area_rankings'}
+            ).data['results'][0]
+        self.assertEqual(set(student), {'id', 'first_name', 'area_rankings'})
+        self.assertEqual(len(queries), 3)
+        student = APIClient().get(reverse('studentprofile-list')).data['results'][0]
+        self.assertTrue({'statements', 'grades', 'area_rankings', 'self_proposed_externship'} <= set(student))
+        detail = APIClient().get(reverse('studentprofile-detail', args=[student['id']])).data
+        self.assertEqual(set(detail), set(student))
+
+    def test_cursor_pages(self):
+        client, url, seen = APIClient(), reverse('studentprofile-list') + '?page_size=200', []
+        while url:
+            response = client.get(url)
+            self.assertLessEqual(len(response.data['results']), 200)
+            self.assertNotIn('count', response.data)
+            seen += [student['id'] for student in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(seen), 500)
+        self.assertEqual(len(set(seen)), 500)
+
+    def test_conditional_get(self):
+        client, url = APIClient(), reverse('studentprofile-list')
+        response = client.get(url)
+        etag = response.headers['ETag']
+        self.assertIn('Last-Modified', response.headers)
+
+        # Only the version query runs when nothing changed
+        with self.assertNumQueries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+
+        # Other query strings are other representations
+        self.assertEqual(client.get(url, {'fields': 'first_name'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # Writes to nested relations do not touch the student rows but still count
+        with self.captureOnCommitCallbacks(execute=True):
+            Statement.objects.first().save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+class ExplainHotQueriesTests(TestCase):
+    def test_seeded_run_is_rolled_back(self):
+        out = StringIO()
+        call_command('explain_hot_queries', '--seed', '200', '--min-rows', '1000000', stdout=out)
+        self.assertIn('students to match', out.getvalue())
+        self.assertIn('No sequential scans', out.getvalue())
+        self.assertFalse(StudentProfile.objects.exists())
+
+
+class FullTextSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Bulk inserts bypass save(); the trigger still fills search_vector
+        cls.jones, cls.other = StudentProfile.objects.bulk_create([
+            StudentProfile(student_id='S1', first_name='Ada', last_name='Jones',
+                           statements_of_interest=['Refugee and housing advocacy']),
+            StudentProfile(student_id='S2', first_name='Ben', last_name='Smith',
+                           statements_of_interest=['Corporate securities work']),
+        ])
+        Statement.objects.bulk_create([
+            Statement(student_profile=cls.jones, area_of_law='Immigration',
+                      content="Refugee claims and the housing needs of newcomers"),
+            Statement(student_profile=cls.other, area_of_law='Corporate',
+                      content="Securities filings, with a clinic placement in refugee law"),
+            Statement(student_profile=cls.other, area_of_law='Tax', content="Tax planning"),
+        ])
+
+    def search(self, name, q):
+        response = APIClient().get(reverse(name), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_statements_ranked(self):
+        results = self.search('statement-list', 'refugees')
+        self.assertEqual(len(results), 2)
+        # The essay that also mentions housing ranks first for both terms
+        self.assertEqual(self.search('statement-list', 'refugee or housing')[0]['area_of_law'], 'Immigration')
+        self.assertEqual(self.search('statement-list', '"tax planning"')[0]['area_of_law'], 'Tax')
+        self.assertEqual(self.search('statement-list', 'refugee -clinic')[0]['area_of_law'], 'Immigration')
+
+    def test_students_by_name_and_interest(self):
+        self.assertEqual([s['id'] for s in self.search('studentprofile-list', 'jones')], [str(self.jones.pk)])
+        self.assertEqual([s['id'] for s in self.search('studentprofile-list', 'security')], [str(self.other.pk)])
+
+    def test_vector_follows_updates(self):
+        self.other.last_name = 'Okafor'
+        self.other.save()
+        self.assertEqual(len(self.search('studentprofile-list', 'okafor')), 1)
+        self.assertEqual(len(self.search('studentprofile-list', 'smith')), 0)
+
+
+class FuzzyLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = StudentProfile.objects.create(
+            student_id='S1', first_name='Katherine', last_name='Johnson', email='kjohnson@example.com'
+        )
+        StudentProfile.objects.create(student_id='S2', first_name='Ben', last_name='Smith')
+        cls.org = OrganizationProfile.objects.create(name='Community Legal Clinic of Toronto')
+        OrganizationProfile.objects.create(name='Ontario Securities Commission')
+
+    def test_fuzzy_parameter(self):
+        response = APIClient().get(reverse('organizationprofile-list'), {'fuzzy': 'legal clinic'})
+        self.assertEqual([org['id'] for org in response.data['results']], [str(self.org.pk)])
+        response = APIClient().get(reverse('studentprofile-list'), {'fuzzy': 'johnson'})
+        self.assertEqual([s['id'] for s in response.data['results']], [str(self.student.pk)])
+
+    def test_misspelled_names(self):
+        if not trigram_enabled():
+            self.skipTest("pg_trgm is not installed")
+        with self.assertNumQueries(1):
+            candidates = similar_students('Katharine Jonson')
+        self.assertEqual(candidates[0], self.student)
+        self.assertGreater(candidates[0].similarity, 0.3)
+        self.assertEqual(similar_students('kjohnson@example.org')[0], self.student)
+        self.assertEqual(similar_organizations('Comunity Legal Clinic Toronto')[0], self.org)
+
+
+class CSVImportTests(TestCase):
+    STUDENT_HEADER = ('Student ID,First Name,Last Name,Email,Area 1,Area 2,Location,Work Preference,'
+                      'Self Proposed Organization,Supervisor,Supervisor Email')
+
+    def write_csv(self, lines, encoding='utf-8'):
+        f = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding=encoding, newline='')
+        with f:
+            f.write('\n'.join(lines) + '\n')
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def import_students(self, lines, chunksize=None):
+        parser = StudentCSVParser(self.write_csv([self.STUDENT_HEADER] + lines))
+        if chunksize:
+            with mock.patch.object(CSVParser, 'iter_csv', partialmethod(CSVParser.iter_csv, chunksize=chunksize)):
+                return parser.parse()
+        return parser.parse()
+
+    @staticmethod
+    def row_errors(errors):
+        """Errors against rows, leaving out notices about unmapped optional columns"""
+        return [e for e in errors if e['row_index'] is not None]
+
+    def test_columns_parsed(self):
+        saved, errors = self.import_students([
+            'S1,Ada,Lovelace,ada@example.com,Criminal,Family,Toronto; Ottawa;,remote;hybrid,,,',
+            'S2,Alan,Turing,,Tax,Tax,,,,,',
+            'S3,Grace,Hopper,,,,,,Legal Aid,Dr. Who,not-an-email',
+            ',Nobody,Here,,,,,,,,',
+            'S4,' + 'x' * 101 + ',Long,,,,,,,,',
+        ])
+        self.assertEqual([s.student_id for s in saved], ['S1', 'S3'])
+        ada = StudentProfile.objects.get(student_id='S1')
+        self.assertEqual(ada.location_preferences, ['Toronto', 'Ottawa'])
+        self.assertEqual(ada.location_preferences_text, 'Toronto; Ottawa;')
+        self.assertEqual(ada.work_preferences, ['remote', 'hybrid'])
+        self.assertEqual(
+            list(ada.area_rankings.values_list('area__name', 'rank')), [('Criminal', 1), ('Family', 2)]
+        )
+        proposal = SelfProposedExternship.objects.get(student_profile__student_id='S3')
+        self.assertEqual((proposal.organization, proposal.supervisor, proposal.supervisor_email),
+                         ('Legal Aid', 'Dr. Who', None))
+        self.assertEqual(
+            [(e['row_index'], e['message'].split(':')[0]) for e in self.row_errors(errors)],
+            [(1, 'Duplicate area of law rankings found'), (1, 'Error processing row 1'),
+             (2, 'Invalid supervisor email format'), (4, 'Error processing row 4')],
+        )
+        self.assertIn('max 100 characters', errors[-1]['message'])
+
+    def test_reimport_updates_in_place(self):
+        self.import_students(['S1,Ada,Lovelace,ada@example.com,Criminal,Family,Toronto,,Legal Aid,Dr. Who,'])
+        saved, errors = self.import_students([
+            'S1,Ada,King,ada@example.org,Tax,,Ottawa,,Legal Aid Clinic,,',
+            'S2,Alan,Turing,,Criminal,,,,,,',
+        ])
+        self.assertEqual(self.row_errors(errors), [])
+        self.assertEqual(StudentProfile.objects.count(), 2)
+        ada = StudentProfile.objects.get(student_id='S1')
+        self.assertEqual((ada.last_name, ada.email, ada.location_preferences),
+                         ('King', 'ada@example.org', ['Ottawa']))
+        self.assertEqual(list(ada.area_rankings.values_list('area__name', flat=True)), ['Tax'])
+        proposal = SelfProposedExternship.objects.get()
+        self.assertEqual((proposal.organization, proposal.supervisor), ('Legal Aid Clinic', 'Dr. Who'))
+        log = ImportLog.objects.latest('import_datetime')
+        self.assertEqual(log.success_count, 2)
+
+    def test_failing_row_isolated_within_chunk(self):
+        # The database rejects an over-long student ID only when the batch is written
+        rows = [f'S{i},First{i},Last{i},,Criminal,,,,,,' for i in range(7)]
+        rows[3] = 'S' * 60 + ',Bad,Row,,Criminal,,,,,,'
+        saved, errors = self.import_students(rows)
+        errors = self.row_errors(errors)
+        self.assertEqual(len(saved), 6)
+        self.assertEqual([e['row_index'] for e in errors], [3])
+        self.assertIn('Error processing row 3', errors[0]['message'])
+        self.assertEqual(errors[0]['data']['row']['First Name'], 'Bad')
+        self.assertEqual(StudentProfile.objects.count(), 6)
+        self.assertEqual(StudentAreaRanking.objects.count(), 6)
+
+    def test_rows_beyond_chunksize(self):
+        rows = [f'S{i},First{i},Last{i},,Criminal,,,,,,' for i in range(5)]
+        rows[4] = 'S' * 60 + ',Bad,Row,,Criminal,,,,,,'
+        # A student listed again in a later chunk is updated, not duplicated
+        rows.append('S0,First0,Again,,Tax,,,,,,')
+        saved, errors = self.import_students(rows, chunksize=2)
+        errors = self.row_errors(errors)
+        self.assertEqual(len(saved), 5)
+        self.assertEqual([e['row_index'] for e in errors], [4])
+        self.assertEqual(errors[0]['data']['row']['First Name'], 'Bad')
+        self.assertEqual(StudentProfile.objects.count(), 4)
+        self.assertEqual(StudentProfile.objects.get(student_id='S0').last_name, 'Again')
+        self.assertEqual(AreaOfLaw.objects.filter(name__in=['Criminal', 'Tax']).count(), 2)
+
+    def test_undecodable_bytes_reported(self):
+        path = self.write_csv([self.STUDENT_HEADER, 'S1,Ada,Lovelace,,,,,,,,'])
+        with open(path, 'ab') as f:
+            f.write('S2,Zo\xe9,Keating,,,,,,,,\n'.encode('latin1'))
+        # Only the UTF-8 start of the file is sampled
+        with mock.patch('backend.sail.parsers.base.ENCODING_SAMPLE_BYTES', 64):
+            saved, errors = StudentCSVParser(path).parse()
+        self.assertEqual(len(saved), 2)
+        self.assertEqual(StudentProfile.objects.get(student_id='S2').first_name, 'Zo\ufffd')
+        errors = self.row_errors(errors)
+        self.assertEqual([e['row_index'] for e in errors], [1])
+        self.assertIn('not valid utf-8', errors[0]['message'])
+
+    def test_organization_columns_and_reimport(self):
+        header = 'Name,Areas of Law,Location,Email,Work Mode,Positions,Active'
+        parser = OrganizationCSVParser(self.write_csv([
+            header,
+            'Legal Aid,Criminal; Family,Toronto,info@legalaid.org,remote;hybrid,3,yes',
+            'Tax Clinic,Tax,Ottawa,bad-email,,lots,no',
+            'Half Clinic,Tax,Ottawa,,,2.5,yes',
+            'Minus Clinic,Tax,Ottawa,,,-1,yes',
+            'Round Clinic,Tax,Ottawa,,,4.0,yes',
+        ]))
+        saved, errors = parser.parse()
+        self.assertEqual(len(saved), 5)
+        self.assertEqual([e['message'] for e in self.row_errors(errors)], [
+            'Invalid email format: bad-email', 'Invalid positions value: lots',
+            'Invalid positions value: 2.5', 'Invalid positions value: -1',
+        ])
+        self.assertEqual(OrganizationProfile.objects.get(name='Round Clinic').available_positions, 4)
+        legal_aid = OrganizationProfile.objects.get(name='Legal Aid')
+        self.assertEqual((legal_aid.work_modes, legal_aid.available_positions, legal_aid.is_active),
+                         (['remote', 'hybrid'], 3, True))
+        self.assertEqual(sorted(legal_aid.areas_of_law.values_list('name', flat=True)), ['Criminal', 'Family'])
+        self.assertFalse(OrganizationProfile.objects.get(name='Tax Clinic').is_active)
+
+        saved, errors = OrganizationCSVParser(self.write_csv([header, 'Legal Aid,Tax,Toronto,,,5,yes'])).parse()
+        self.assertEqual(self.row_errors(errors), [])
+        self.assertEqual(OrganizationProfile.objects.count(), 5)
+        legal_aid.refresh_from_db()
+        self.assertEqual(legal_aid.available_positions, 5)
+        self.assertEqual(list(legal_aid.areas_of_law.values_list('name', flat=True)), ['Tax'])
+
+
+    def test_fuzzy_merge_recorded(self):
+        org = OrganizationProfile.objects.create(name='Community Legal Clinic of Toronto')
+        org.similarity = 0.86
+        path = self.write_csv(['Name,Location', 'Comunity Legal Clinic of Toronto,Toronto'])
+        with mock.patch('backend.sail.parsers.organization_csv_parser.similar_organizations', return_value=[org]):
+            saved, errors = OrganizationCSVParser(path).parse()
+        self.assertEqual(saved, [org])
+        self.assertEqual(OrganizationProfile.objects.count(), 1)
+        warning = [e for e in json.loads(ImportLog.objects.get().errors) if e.get('level') == 'warning']
+        self.assertEqual(len(warning), 1)
+        self.assertEqual(warning[0]['row_index'], 0)
+        self.assertEqual(warning[0]['data'], {
+            'organization': 'Comunity Legal Clinic of Toronto', 'matched_id': str(org.pk),
+            'matched_name': org.name, 'similarity': 0.86,
+        })
+        self.assertEqual(ImportLog.objects.get().error_count, len(errors) - 1)
+
+def text_pdf(lines):
+    """A one-page PDF showing each line of text"""
+    stream = 'BT /F1 12 Tf 72 720 Td 14 TL ' + ' '.join(f"({line}) '" for line in lines) + ' ET'
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        '/Resources << /Font << /F1 5 0 R >> >> >>',
+        f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf, offsets = '%PDF-1.4\n', []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += f'{number} 0 obj\n{body}\nendobj\n'
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'
+    pdf += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets)
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'
+    return pdf.encode('latin1')
+
+
+class PDFImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = StudentProfile.objects.create(student_id='S100', first_name='Ada', last_name='Lovelace')
+        cls.transcript = text_pdf(['ID: S100', 'Torts: A', 'Contracts: B+', 'Name: Ada Lovelace'])
+
+    def write_zip(self, members):
+        f = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+        with f, zipfile.ZipFile(f, 'w') as archive:
+            for name, content in members.items():
+                archive.writestr(name, content)
+        self.addCleanup(lambda: os.path.exists(f.name) and os.remove(f.name))
+        return f.name
+
+    def import_zip(self, members):
+        """Run a ZIP batch the way the Celery chord does: one extraction task per PDF, then the callback"""
+        zip_path = self.write_zip(members)
+        results = [extract_pdf_grades_task.apply(args=[zip_path, member]).get() for member in members]
+        return save_pdf_batch_task.apply(args=[results, zip_path]).get()
+
+    def test_cache_hit_by_content(self):
+        summary = self.import_zip({'ada.pdf': self.transcript})
+        self.assertEqual((summary['success_count'], summary['errors']), (1, []))
+        grades = StudentGrade.objects.get(student_profile=self.student)
+        self.assertEqual((grades.torts, grades.contracts), ('A', 'B+'))
+        self.assertEqual(PDFExtraction.objects.count(), 1)
+
+        # The same bytes under another name are not parsed again
+        with mock.patch('backend.sail.parsers.pdf_parser.extract_pdf_entry') as extract_pdf_entry:
+            summary = self.import_zip({'renamed.pdf': self.transcript})
+        extract_pdf_entry.assert_not_called()
+        self.assertEqual((summary['cache_hits'], summary['success_count']), (1, 1))
+        self.assertEqual(ImportLog.objects.latest('import_datetime').cache_hits, 1)
+        self.assertEqual(PDFExtraction.objects.get().hit_count, 1)
+
+    @override_settings(PDF_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_evicted(self):
+        def entry(digest):
+            return {'sha256': digest, 'text': digest, 'student_info': None, 'grades': {}}
+
+        store_extractions([entry('a'), entry('b')])
+        PDFExtraction.objects.filter(sha256='a').update(last_used_at=timezone.now() - timedelta(hours=2))
+        PDFExtraction.objects.filter(sha256='b').update(last_used_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(list(cached_extractions(['a'])), ['a'])
+
+        store_extractions([entry('c')])
+        self.assertEqual(sorted(PDFExtraction.objects.values_list('sha256', flat=True)), ['a', 'c'])
+
+    def test_unreadable_pdf_in_archive(self):
+        zip_path = self.write_zip({'ada.pdf': self.transcript, 'broken.pdf': b'%PDF-1.4 truncated'})
+        # The Celery chord's header tasks, then its callback
+        results = [extract_pdf_grades_task.apply(args=[zip_path, member]).get()
+                   for member in ['ada.pdf', 'broken.pdf']]
+        summary = save_pdf_batch_task.apply(args=[results, zip_path]).get()
+
+        self.assertEqual((summary['success_count'], summary['pdf_count']), (1, 2))
+        self.assertEqual([e['data'] for e in summary['errors']], [{'file_name': 'broken.pdf'}])
+        self.assertIn('Failed to extract text from PDF', summary['errors'][0]['message'])
+        self.assertEqual(StudentGrade.objects.get(student_profile=self.student).torts, 'A')
+        # Only the readable PDF is cached
+        self.assertEqual(PDFExtraction.objects.count(), 1)
+        self.assertFalse(os.path.exists(zip_path))
+
+
+class MatchingScoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(11)
+        areas = [AreaOfLaw.objects.create(name=f"Area {i}") for i in range(4)]
+        modes = ['remote', 'hybrid', 'in-person']
+        for i, city in enumerate(['Toronto', 'Ottawa, ON', 'Windsor', None, 'Toronto']):
+            org = OrganizationProfile.objects.create(
+                name=f"Org {i}", location=city, available_positions=1,
+                work_modes=list(rng.choice(modes, size=rng.integers(0, 3), replace=False)),
+            )
+            org.areas_of_law.set(rng.choice(areas, size=rng.integers(1, 3), replace=False))
+        for i in range(8):
+            student = StudentProfile.objects.create(
+                student_id=f"S{i}",
+                location_preferences=list(rng.choice(['Toronto', 'Ottawa', 'Windsor'], size=rng.integers(0, 3),
+                                                     replace=False)),
+                work_preferences=list(rng.choice(modes, size=rng.integers(0, 3), replace=False)),
+            )
+            for rank, area in enumerate(rng.permutation(areas)[:rng.integers(0, 4)], start=1):
+                StudentAreaRanking.objects.create(student_profile=student, area=area, rank=rank)
+            if i % 3:
+                StudentGrade.objects.create(student_profile=student, torts=rng.choice(['A+', 'B', 'C']))
+            if i % 2:
+                Statement.objects.create(student_profile=student, statement_grade=int(rng.integers(5, 26)))
+
+    @staticmethod
+    def baseline_score(student, org, weights):
+        """The score formula written out for one student/organization pair"""
+        ranks = {r.area_id: r.rank for r in student.area_rankings.all()}
+        shared = [ranks[area.pk] for area in org.areas_of_law.all() if area.pk in ranks]
+        if not shared:
+            return None
+        area = RANK_WEIGHTS[min(shared) - 1]
+        city = (org.location or '').split(',')[0].strip().lower()
+        wanted = ' '.join(student.location_preferences or []).lower()
+        location = 0.5 if not city or not wanted else float(city in wanted)
+        student_modes, org_modes = set(student.work_preferences or []), set(org.work_modes or [])
+        work_mode = 0.5 if not student_modes or not org_modes else float(bool(student_modes & org_modes))
+        grades = StudentGrade.objects.filter(student_profile=student).first()
+        gpa = grades.gpa if grades and grades.gpa is not None else 0.5
+        statements = [st.statement_grade for st in student.statements.all() if st.statement_grade is not None]
+        statement = min(sum(statements) / len(statements) / 25, 1.0) if statements else 0.5
+        preferences = (PREFERENCE_SPLIT['area'] * area + PREFERENCE_SPLIT['location'] * location
+                       + PREFERENCE_SPLIT['work_mode'] * work_mode)
+        return weights['preferences'] * preferences + weights['gpa'] * gpa + weights['statement'] * statement
+
+    def baseline_matrix(self, data):
+        """Every student x organization score, None where no area of law is shared"""
+        students = StudentProfile.objects.in_bulk(list(data.student_ids))
+        orgs = OrganizationProfile.objects.in_bulk(list(data.org_ids))
+        return [[self.baseline_score(students[sid], orgs[oid], DEFAULT_WEIGHTS) for oid in data.org_ids]
+                for sid in data.student_ids]
+
+    def test_scores_match_baseline_formula(self):
+        data = load_matching_data()
+        pairs, scores = score_candidates(data, DEFAULT_WEIGHTS)
+        matrix = self.baseline_matrix(data)
+        self.assertEqual(
+            sorted(zip(pairs.student.tolist(), pairs.org.tolist())),
+            sorted((s, o) for s, row in enumerate(matrix) for o, score in enumerate(row) if score is not None),
+        )
+        for s, o, score in zip(pairs.student, pairs.org, scores):
+            self.assertAlmostEqual(float(score), matrix[s][o], places=5)
+
+    def test_pruned_top_k_matches_unpruned(self):
+        data = load_matching_data()
+        pairs, scores = score_candidates(data, DEFAULT_WEIGHTS)
+        matrix = self.baseline_matrix(data)
+        k = 2
+        for s, row in enumerate(matrix):
+            unpruned = sorted((score for score in row if score is not None), reverse=True)[:k]
+            pruned = sorted(scores[pairs.student == s].tolist(), reverse=True)[:k]
+            np.testing.assert_allclose(pruned, unpruned, rtol=1e-5)
+
+
+class AssignmentSolverTests(SimpleTestCase):
+    @staticmethod
+    def candidate_pairs(mask):
+        student, org = np.nonzero(mask)
+        return CandidatePairs(
+            student=student.astype(np.int32), org=org.astype(np.int32),
+            rank=np.zeros(len(student), dtype=np.int8), n_students=mask.shape[0], n_orgs=mask.shape[1],
+        )
+
+    @staticmethod
+    def best_total(pairs, scores, capacity):
+        """Highest total score over every capacity-feasible assignment"""
+        options = [[(-1, 0.0)] for _ in range(pairs.n_students)]
+        for p in range(len(pairs)):
+            options[pairs.student[p]].append((pairs.org[p], float(scores[p])))
+        best = 0.0
+
+        def place(s, used, total):
+            nonlocal best
+            if s == len(options):
+                best = max(best, total)
+                return
+            for o, score in options[s]:
+                if o < 0 or used[o] < capacity[o]:
+                    if o >= 0:
+                        used[o] += 1
+                    place(s + 1, used, total + score)
+                    if o >= 0:
+                        used[o] -= 1
+
+        place(0, [0] * pairs.n_orgs, 0.0)
+        return best
+
+    def test_optimal_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        for _ in range(25):
+            mask = rng.random((6, 4)) < 0.5
+            mask[0] = False  # a student with no candidate organization
+            pairs = self.candidate_pairs(mask)
+            scores = rng.choice([0.2, 0.4, 0.6, 0.8], size=len(pairs)).astype(np.float32)
+            capacity = np.array([2, 2, 1, 0])  # two organizations of the same size, one full
+            assignment = optimal_assignment(pairs, scores, capacity)
+
+            placed = np.flatnonzero(assignment >= 0)
+            held = pairs.find(placed, assignment[placed])
+            self.assertTrue((held >= 0).all())
+            self.assertEqual(assignment[0], -1)
+            self.assertTrue((np.bincount(assignment[placed], minlength=4) <= capacity).all())
+            self.assertAlmostEqual(float(scores[held].sum()), self.best_total(pairs, scores, capacity), places=5)
+
+
+    def test_stability_certificate(self):
+        # Students 0 and 1 both want organization 0, which prefers student 0;
+        # student 2 only fits organization 1
+        pairs = self.candidate_pairs(np.array([[1, 1], [1, 1], [0, 1]], dtype=bool))
+        scores = np.array([0.9, 0.5, 0.8, 0.7, 0.6], dtype=np.float32)
+        capacity = np.array([1, 1])
+        assignment = stable_assignment(pairs, scores, capacity)
+        self.assertEqual(assignment.tolist(), [0, 1, -1])
+        self.assertEqual(stability_certificate(pairs, scores, capacity, assignment),
+                         {'stable': True, 'blocking_pairs': 0})
+
+    def test_certificate_detects_blocking_pairs(self):
+        pairs = self.candidate_pairs(np.array([[1, 1], [1, 1], [0, 1]], dtype=bool))
+        scores = np.array([0.9, 0.5, 0.8, 0.7, 0.6], dtype=np.float32)
+        capacity = np.array([1, 1])
+        # Swapped placements: student 0 and organization 0 prefer each other,
+        # as do student 2 and organization 1
+        tampered = np.array([1, 0, -1], dtype=np.int32)
+        self.assertEqual(stability_certificate(pairs, scores, capacity, tampered),
+                         {'stable': False, 'blocking_pairs': 2})
+        # A position left open blocks with any student who wants it
+        self.assertEqual(stability_certificate(pairs, scores, capacity, np.array([0, -1, -1], dtype=np.int32)),
+                         {'stable': False, 'blocking_pairs': 2})
+
+class MatchingRunTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        area = AreaOfLaw.objects.create(name="Criminal")
+        for i in range(2):
+            org = OrganizationProfile.objects.create(name=f"Org {i}", location='Toronto', available_positions=2)
+            org.areas_of_law.add(area)
+        for i in range(3):
+            student = StudentProfile.objects.create(student_id=f"S{i}", location_preferences=['Toronto'])
+            StudentAreaRanking.objects.create(student_profile=student, area=area, rank=1)
+        cls.round = MatchingRound.objects.create(round_number=1)
+        cls.admin = get_user_model().objects.create_user('admin', password='pw', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_run_is_queued(self):
+        url = reverse('matchinground-run-algorithm', args=[self.round.pk])
+        with mock.patch.object(run_matching_task, 'delay', return_value=mock.Mock(id='task-1')) as delay:
+            response = self.client.post(url, {'algorithm': 'optimal'})
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data['status_url'], reverse('task-status', args=['task-1']))
+            delay.assert_called_once_with(1, 'optimal')
+            # One active run per round
+            self.assertEqual(self.client.post(url).status_code, 409)
+        self.round.refresh_from_db()
+        self.assertEqual((self.round.status, self.round.task_id), ('queued', 'task-1'))
+
+        cancel = reverse('matchinground-cancel', args=[self.round.pk])
+        self.assertEqual(self.client.post(cancel).status_code, 202)
+        self.assertEqual(self.client.post(cancel).status_code, 409)
+        self.assertEqual(run_matching_task.apply(args=[1]).get()['status'], 'cancelled')
+        self.assertFalse(Match.objects.exists())
+
+    def test_failed_dispatch_releases_round(self):
+        MatchingRound.objects.filter(pk=self.round.pk).update(status='completed')
+        url = reverse('matchinground-run-algorithm', args=[self.round.pk])
+        with mock.patch.object(run_matching_task, 'delay', side_effect=ConnectionError("broker down")):
+            self.assertEqual(self.client.post(url).status_code, 503)
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'completed')
+        with mock.patch.object(run_matching_task, 'delay', return_value=mock.Mock(id='task-2')):
+            self.assertEqual(self.client.post(url).status_code, 202)
+
+    def test_stale_run_is_reclaimed(self):
+        url = reverse('matchinground-run-algorithm', args=[self.round.pk])
+        MatchingRound.objects.filter(pk=self.round.pk).update(status='running', updated_at=timezone.now())
+        self.assertEqual(self.client.post(url).status_code, 409)
+
+        # The worker died with the round 'running'
+        lost = timezone.now() - STALE_RUN_AFTER - timedelta(minutes=1)
+        MatchingRound.objects.filter(pk=self.round.pk).update(status='running', updated_at=lost)
+        with mock.patch.object(run_matching_task, 'delay', return_value=mock.Mock(id='task-3')):
+            self.assertEqual(self.client.post(url).status_code, 202)
+        self.round.refresh_from_db()
+        self.assertEqual((self.round.status, self.round.task_id), ('queued', 'task-3'))
+
+        MatchingRound.objects.filter(pk=self.round.pk).update(status='cancelling', updated_at=lost)
+        cancel = reverse('matchinground-cancel', args=[self.round.pk])
+        self.assertEqual(self.client.post(cancel).status_code, 200)
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.status, 'cancelled')
+
+    def test_phases_and_cancellation(self):
+        phases = []
+
+        def cancel_after_scoring(phase, **details):
+            phases.append(phase)
+            if phase == 'score':
+                MatchingRound.objects.filter(pk=self.round.pk).update(status='cancelling')
+
+        with self.assertRaises(MatchingCancelled):
+            run_matching(1, progress=cancel_after_scoring)
+        self.round.refresh_from_db()
+        self.assertEqual(phases, ['load', 'score'])
+        self.assertEqual(self.round.status, 'cancelled')
+        self.assertEqual(self.round.checkpoint['phase'], 'score')
+        self.assertEqual(self.round.checkpoint['statistics']['students'], 3)
+
+        result = run_matching_task.apply(args=[1]).get()
+        self.assertEqual(result['status'], 'completed')
+        self.assertEqual(result['matched_count'], 3)
+        self.round.refresh_from_db()
+        self.assertIsNone(self.round.checkpoint)
+
+
+class RematchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        area = AreaOfLaw.objects.create(name="Criminal")
+        cls.orgs = []
+        for i in range(2):
+            org = OrganizationProfile.objects.create(name=f"Org {i}", location='Toronto', available_positions=1)
+            org.areas_of_law.add(area)
+            cls.orgs.append(org)
+        cls.students = []
+        for i in range(3):
+            student = StudentProfile.objects.create(student_id=f"S{i}", location_preferences=['Toronto'])
+            StudentAreaRanking.objects.create(student_profile=student, area=area, rank=1)
+            cls.students.append(student)
+        cls.admin = get_user_model().objects.create_user('admin', password='pw', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        self.round = run_matching(1)
+        self.waiting = StudentProfile.objects.get(is_matched=False)
+
+    def test_augmenting_path(self):
+        # Student 0 holds org 0 and can move to org 1, which opens org 0 for student 1
+        pairs = CandidatePairs(
+            student=np.array([0, 0, 1], dtype=np.int32), org=np.array([0, 1, 0], dtype=np.int32),
+            rank=np.zeros(3, dtype=np.int8), n_students=2, n_orgs=2,
+        )
+        scores = np.array([0.9, 0.5, 0.8], dtype=np.float32)
+        capacity = np.array([1, 1])
+        assignment = np.array([0, -1], dtype=np.int32)
+        self.assertEqual(repair_assignment(pairs, scores, capacity, assignment, [1]).tolist(), [1, 0])
+        pinned = np.array([True, False])
+        self.assertEqual(repair_assignment(pairs, scores, capacity, assignment, [1], pinned).tolist(), [0, -1])
+
+    def test_withdrawal_frees_position(self):
+        withdrawn, kept = Match.objects.order_by('match_score', 'id')
+        StudentProfile.objects.filter(pk=withdrawn.student_profile_id).update(is_active=False)
+
+        summary = rematch_round(1, students=[withdrawn.student_profile_id])
+        self.assertEqual((summary['placed'], summary['moved'], summary['removed']), (1, 0, 1))
+        # The untouched match is the same row, and the waiting student took the free position
+        self.assertEqual(Match.objects.get(pk=kept.pk).organization_profile_id, kept.organization_profile_id)
+        placed = Match.objects.get(student_profile=self.waiting)
+        self.assertEqual(placed.organization_profile_id, withdrawn.organization_profile_id)
+        self.assertTrue(StudentProfile.objects.get(pk=self.waiting.pk).is_matched)
+        self.assertEqual(
+            sorted(OrganizationProfile.objects.values_list('filled_positions', flat=True)), [1, 1]
+        )
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.matched_count, 2)
+
+    def test_fully_placed_round(self):
+        # Nobody waiting and nothing changed: there are no candidate pairs to score
+        StudentProfile.objects.filter(pk=self.waiting.pk).update(is_active=False)
+        matches = sorted(Match.objects.values_list('id', 'organization_profile_id', 'match_score'))
+
+        summary = rematch_round(1)
+        self.assertEqual((summary['placed'], summary['moved'], summary['removed']), (0, 0, 0))
+        self.assertEqual(sorted(Match.objects.values_list('id', 'organization_profile_id', 'match_score')), matches)
+
+    def test_added_position_and_api(self):
+        org = self.orgs[0]
+        OrganizationProfile.objects.filter(pk=org.pk).update(available_positions=2)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = reverse('matchinground-rematch', args=[self.round.pk])
+
+        self.assertEqual(client.post(url, {'students': ['nope']}, format='json').status_code, 400)
+        response = client.post(url, {'organizations': [str(org.pk)]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['placed'], response.data['moved']), (1, 0))
+        self.assertEqual(Match.objects.get(student_profile=self.waiting).organization_profile_id, org.pk)
+        self.assertEqual(OrganizationProfile.objects.get(pk=org.pk).filled_positions, 2)
+
+        MatchingRound.objects.filter(pk=self.round.pk).update(status='running')
+        self.assertEqual(client.post(url, {}, format='json').status_code, 409)
+
+
+class SimulationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        criminal, family = AreaOfLaw.objects.create(name="Criminal"), AreaOfLaw.objects.create(name="Family")
+        for area in (criminal, family):
+            org = OrganizationProfile.objects.create(name=f"{area.name} clinic", available_positions=1)
+            org.areas_of_law.add(area)
+        # A strong student and a weaker one whose preferences fit the criminal clinic better
+        for i, (first, second, grade) in enumerate([(family, criminal, 'A+'), (criminal, family, 'C')]):
+            student = StudentProfile.objects.create(student_id=f"S{i}")
+            StudentAreaRanking.objects.create(student_profile=student, area=first, rank=1)
+            StudentAreaRanking.objects.create(student_profile=student, area=second, rank=2)
+            StudentGrade.objects.create(student_profile=student, torts=grade)
+        cls.admin = get_user_model().objects.create_user('admin', password='pw', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scenarios_compared_without_writes(self):
+        result = simulate_weights(
+            [{'preferences': 1.0, 'gpa': 0.0, 'statement': 0.0}, {'gpa': 1.0}, {}], workers=2
+        )
+        self.assertEqual(result['current']['weights'], {'gpa': 0.3, 'statement': 0.4, 'preferences': 0.3})
+        preferences, gpa_heavy, unchanged = result['scenarios']
+        # The baseline is a solve under the current weights, so repeating them changes nobody
+        self.assertEqual(unchanged['diff_vs_current_weights']['changed'], 0)
+        self.assertEqual((preferences['match_rate'], preferences['mean_rank']), (1.0, 1.0))
+        self.assertEqual(preferences['rank_counts'], [2, 0, 0, 0, 0])
+        self.assertEqual(gpa_heavy['weights']['statement'], 0.4)
+        self.assertEqual(gpa_heavy['capacity_utilization'], 1.0)
+        diff = gpa_heavy['diff_vs_current_weights']
+        self.assertEqual(diff['moved'] + diff['newly_placed'] + diff['unplaced'], diff['changed'])
+        self.assertFalse(Match.objects.exists())
+        self.assertFalse(StudentProfile.objects.filter(is_matched=True).exists())
+
+    def test_runs_in_daemonic_process(self):
+        # Celery's prefork pool runs tasks in daemonic processes, which cannot start children.
+        # The child inherits the cached features and must not touch the parent's connection.
+        simulate_weights([{'gpa': 1.0}])
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+
+        def simulate():
+            try:
+                sender.send(simulate_weights([{'gpa': 1.0}], workers=2)['students'])
+            except Exception as e:
+                sender.send(repr(e))
+
+        with mock.patch('backend.sail.services.simulation.get_matching_weights', return_value=dict(DEFAULT_WEIGHTS)):
+            process = context.Process(target=simulate, daemon=True)
+            process.start()
+            process.join(60)
+        self.assertTrue(receiver.poll(0))
+        self.assertEqual(receiver.recv(), 2)
+
+    def test_api_validation(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = reverse('matchinground-simulate')
+        self.assertEqual(client.post(url, {'scenarios': [{'speed': 1}]}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'scenarios': [{'gpa': -1}]}, format='json').status_code, 400)
+        self.assertEqual(client.post(url, {'scenarios': [{}], 'algorithm': 'fastest'}, format='json').status_code, 400)
+
+        with mock.patch.object(simulate_weights_task, 'delay', return_value=mock.Mock(id='task-1')) as delay:
+            response = client.post(url, {'scenarios': [{'gpa': 0.5}], 'algorithm': 'optimal'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status_url'], reverse('task-status', args=['task-1']))
+        delay.assert_called_once_with([{'gpa': 0.5}], 'optimal')
+        with mock.patch.object(simulate_weights_task, 'delay', side_effect=ConnectionError("broker down")):
+            response = client.post(url, {'scenarios': [{'gpa': 0.5}]}, format='json')
+        self.assertEqual(response.status_code, 503)
+
+        result = simulate_weights_task.apply(args=[[{'gpa': 0.5}], 'optimal']).get()
+        self.assertEqual(result['students'], 2)
+
+
+class GradePointsTests(TestCase):
+    def tearDown(self):
+        grade_scale.cache_clear()
+
+    def test_scale_from_csv(self):
+        scale = grade_scale()
+        self.assertEqual((scale['A+'], scale['C'], scale['C-']), (5.0, 3.0, 2.75))
+        self.assertNotIn('F', scale)
+        # The frontend copy starts with a byte order mark
+        grade_scale.cache_clear()
+        with override_settings(GRADESCORE_CSV=str(settings.BASE_DIR / 'frontend' / 'gradescore.csv')):
+            self.assertEqual(grade_scale(), scale)
+
+    def test_gpa_kept_with_letters(self):
+        student = StudentProfile.objects.create(student_id="S1")
+        # Letters missing from the scale have no points
+        grades = StudentGrade.objects.create(student_profile=student, torts='A+', contracts='b', criminal_law='F')
+        self.assertEqual(grades.course_points, [None, 3.75, None, None, 5.0, None, None, None])
+        self.assertAlmostEqual(grades.gpa, 4.375 / 5)
+
+        grades.torts = 'C'
+        grades.save(update_fields=['torts'])
+        grades.refresh_from_db()
+        self.assertAlmostEqual(grades.gpa, 3.375 / 5)
+        self.assertAlmostEqual(float(load_matching_data().gpa[0]), 3.375 / 5, places=6)
+
+        StudentGrade.objects.filter(pk=grades.pk).update(torts=None, contracts=None)
+        grades.refresh_from_db()
+        grades.save()
+        self.assertIsNone(grades.gpa)
+
+
+class CohortSnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        area = AreaOfLaw.objects.create(name="Criminal")
+        org = OrganizationProfile.objects.create(
+            name="Clinic", location='Toronto, ON', work_modes=['Remote'], available_positions=2
+        )
+        org.areas_of_law.add(area)
+        for i, (locations, work) in enumerate([(['GTA'], ['Remote']), ([], [])]):
+            student = StudentProfile.objects.create(
+                student_id=f"S{i}", location_preferences=locations, work_preferences=work
+            )
+            StudentAreaRanking.objects.create(student_profile=student, area=area, rank=1)
+            StudentGrade.objects.create(student_profile=student, torts='A')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bitset_features(self):
+        data = load_matching_data()
+        self.assertEqual(data.student_locations.dtype, np.uint8)
+        self.assertEqual(data.course_points.shape, (2, 8))
+        pairs = generate_candidates(data)
+        features = compute_pair_features(data, pairs)
+        student_ids = [str(data.student_ids[s]) for s in pairs.student]
+        located = student_ids.index(str(StudentProfile.objects.get(student_id='S0').pk))
+        no_preference = student_ids.index(str(StudentProfile.objects.get(student_id='S1').pk))
+        self.assertEqual((features['location'][located], features['work_mode'][located]), (1.0, 1.0))
+        self.assertEqual((features['location'][no_preference], features['work_mode'][no_preference]), (0.5, 0.5))
+
+    def test_snapshot_cached_and_shared(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(COHORT_SNAPSHOT_DIR=directory):
+            snapshot = cohort_snapshot()
+            with self.assertNumQueries(0):
+                self.assertIs(cohort_snapshot(), snapshot)
+            self.assertFalse(snapshot.ranked_areas.flags.writeable)
+
+            # What another worker process maps instead of querying
+            shared = CohortSnapshot.load(os.path.join(directory, f"cohort-{current_generation()}"))
+            self.assertIsInstance(shared.ranked_areas, np.memmap)
+            for field in fields(CohortSnapshot):
+                original, loaded = getattr(snapshot, field.name), getattr(shared, field.name)
+                if field.name in ('student_ids', 'org_ids', 'area_ids'):
+                    self.assertEqual([str(v) for v in original], list(loaded))
+                else:
+                    np.testing.assert_array_equal(original, loaded)
+
+    def test_previous_generation_kept(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(COHORT_SNAPSHOT_DIR=directory):
+            for age, name in enumerate(['cohort-2', 'cohort-1'], start=1):
+                os.makedirs(os.path.join(directory, name))
+                os.utime(os.path.join(directory, name), (0, 1000 - age))
+            cohort_snapshot()
+            self.assertEqual(set(os.listdir(directory)), {'cohort-2', f"cohort-{current_generation()}"})
+
+    def test_unreadable_snapshot_falls_back_to_queries(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(COHORT_SNAPSHOT_DIR=directory):
+            # Another process pruned the files while this one was loading them
+            os.makedirs(os.path.join(directory, f"cohort-{current_generation()}"))
+            with self.assertLogs('backend.sail.services.matching_engine', 'WARNING'):
+                snapshot = cohort_snapshot()
+            self.assertEqual(snapshot.n_students, 2)
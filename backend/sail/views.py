@@ -6,6 +6,7 @@ Implements API endpoints and request handling logic
 
 import os
 import uuid
+import zipfile
 import json
 import logging
 from rest_framework import viewsets, status, generics
@@ -16,6 +17,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate, get_user_model
 from django.conf import settings
 from django.core.files.storage import default_storage
+from django.urls import reverse
 from django.utils import timezone
 from celery.result import AsyncResult
 
@@ -33,10 +35,24 @@ from .serializers import (
     SystemSettingSerializer
 )
 from .permissions import IsAdminOrReadOnly
-from .services import import_students_from_csv, parse_grades_pdf, run_matching
-from .tasks import process_csv_import_task, process_pdf_grades_task
+from .conditional import ConditionalGetMixin, generation_conditional
+from .fieldsets import SparseFieldsetViewMixin
+from .fuzzy import organization_matches, student_matches
+from .search import FuzzySearchFilter, RankedSearchFilter
+from .services import import_students_from_csv, parse_grades_pdf
+from .services.matching_algorithm import (
+    ACTIVE_ROUND_STATUSES, claim_round, rematch_round, stale_runs, update_round
+)
+from .services.matching_engine import DEFAULT_WEIGHTS
+from .services.simulation import check_scenarios
+from .tasks import (
+    process_csv_import_task, process_pdf_grades_task, run_matching_task, simulate_weights_task, start_pdf_batch
+)
+from .parsers.pdf_parser import PDFBatchGradeParser
 from .services.dashboard import get_dashboard_stats, get_recent_activity
 
+logger = logging.getLogger(__name__)
+
 # Test connection endpoint
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -120,13 +136,19 @@ def get_task_status(request, task_id):
         response_data['result'] = result.get()
     elif result.failed():
         response_data['error'] = str(result.result)
+    elif result.status == 'PROGRESS':
+        # Phase-level progress reported by long tasks such as run_matching_task
+        response_data['progress'] = result.info
         
     return Response(response_data)
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
-    queryset = StudentProfile.objects.select_related('grades').prefetch_related('statements')
+class StudentProfileViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
+    # Narrowed per request to the requested fields (see fieldsets.py)
+    queryset = StudentProfile.objects.all()
     serializer_class = StudentProfileSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [RankedSearchFilter, FuzzySearchFilter]
+    fuzzy_matches = staticmethod(student_matches)
 
     @action(detail=False, methods=['post'])
     def import_csv(self, request):
@@ -183,27 +205,167 @@ class StudentProfileViewSet(viewsets.ModelViewSet):
             'detail': 'PDF processing started. Check task status for results.'
         }, status=status.HTTP_202_ACCEPTED)
 
+    @action(detail=False, methods=['post'])
+    def import_grades_zip(self, request):
+        """Import grade PDFs for many students from one ZIP archive"""
+        zip_file = request.FILES.get('grades_zip')
+        if not zip_file:
+            return Response({'error': 'No ZIP file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Generate unique filename to prevent collisions
+        unique_filename = f"{uuid.uuid4()}_{zip_file.name}"
+        temp_path = os.path.join(settings.MEDIA_ROOT, 'uploads', unique_filename)
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+
+        # Save file temporarily
+        with open(temp_path, 'wb+') as destination:
+            for chunk in zip_file.chunks():
+                destination.write(chunk)
 
-class MatchingRoundViewSet(viewsets.ModelViewSet):
+        try:
+            members = PDFBatchGradeParser(temp_path).pdf_members()
+        except zipfile.BadZipFile:
+            members = None
+        if not members:
+            os.remove(temp_path)
+            return Response({'error': 'Upload must be a ZIP archive of PDF files'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # One extraction task per PDF, saved together by the chord callback
+        imported_by = request.user.username if request.user.is_authenticated else None
+        task = start_pdf_batch(temp_path, members, imported_by)
+
+        return Response({
+            'task_id': task.id,
+            'pdf_count': len(members),
+            'detail': 'PDF batch processing started. Check task status for results.'
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class MatchingRoundViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = MatchingRound.objects.all()
     serializer_class = MatchingRoundSerializer
     permission_classes = [IsAdminOrReadOnly]
 
     @action(detail=True, methods=['post'])
     def run_algorithm(self, request, pk=None):
+        """
+        Queue a matching run for this round and return 202 with the task to
+        poll at /tasks/<task_id>/. Only one run per round can be active.
+        """
         instance = self.get_object()
-        run_matching(instance.round_number)
-        instance.refresh_from_db()
+        algorithm = request.data.get('algorithm')
+        if algorithm and algorithm not in dict(MatchingRound.ALGORITHM_CHOICES):
+            return Response({'error': f"Unknown matching algorithm: {algorithm}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not claim_round(instance):
+            return Response({'error': f"Matching round {instance.round_number} is already {instance.status}"},
+                            status=status.HTTP_409_CONFLICT)
+
+        try:
+            task = run_matching_task.delay(instance.round_number, algorithm)
+        except Exception as e:
+            # Nothing will run the round; give it back (a stale run ends 'failed')
+            logger.error(f"Error queueing matching round {instance.round_number}: {str(e)}")
+            previous = 'failed' if instance.status in ACTIVE_ROUND_STATUSES else instance.status
+            update_round(instance, status=previous)
+            return Response({'error': "Could not queue the matching run, try again later"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        MatchingRound.objects.filter(pk=instance.pk).update(task_id=task.id)
         return Response({
-            'detail': f"Matching round {instance.round_number} completed",
-            'matched_count': instance.matched_count,
-            'total_students': instance.total_students
-        }, status=status.HTTP_200_OK)
+            'detail': f"Matching round {instance.round_number} queued",
+            'task_id': task.id,
+            'status_url': reverse('task-status', args=[task.id]),
+        }, status=status.HTTP_202_ACCEPTED)
 
-class OrganizationProfileViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Ask the active run of this round to stop. It stops before its next
+        phase and keeps the checkpoint of the phases it completed; a run
+        already saving its matches finishes. A stale run, whose worker is
+        gone, is cancelled at once.
+        """
+        instance = self.get_object()
+        if MatchingRound.objects.filter(stale_runs(), pk=instance.pk).update(
+                status='cancelled', updated_at=timezone.now()):
+            return Response({
+                'detail': f"Matching round {instance.round_number} cancelled",
+                'task_id': instance.task_id,
+            })
+        cancelled = MatchingRound.objects.filter(
+            pk=instance.pk, status__in=['queued', 'running']
+        ).update(status='cancelling', updated_at=timezone.now())
+        if not cancelled:
+            return Response({'error': f"Matching round {instance.round_number} has no active run"},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({
+            'detail': f"Cancelling matching round {instance.round_number}",
+            'task_id': instance.task_id,
+        }, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def rematch(self, request, pk=None):
+        """
+        Repair this round's completed assignment after late changes to the
+        ``students`` and ``organizations`` (lists of profile ids) without
+        running the round again; see rematch_round()
+        """
+        instance = self.get_object()
+        changed = {}
+        for field in ('students', 'organizations'):
+            ids = request.data.get(field) or []
+            try:
+                changed[field] = [str(uuid.UUID(str(value))) for value in ids]
+            except (TypeError, ValueError):
+                return Response({'error': f"{field} must be a list of profile ids"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            summary = rematch_round(instance.round_number, changed['students'], changed['organizations'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(summary)
+
+    @action(detail=False, methods=['post'])
+    def simulate(self, request):
+        """
+        Queue a comparison of the next matching run under alternative
+        ``scenarios`` of score weights with the current settings, without
+        saving anything, and return 202 with the task to poll at
+        /tasks/<task_id>/ for the result
+        """
+        scenarios = request.data.get('scenarios')
+        if not isinstance(scenarios, list):
+            return Response({'error': 'scenarios must be a list of weight objects'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        algorithm = request.data.get('algorithm') or 'greedy'
+        try:
+            check_scenarios(scenarios, algorithm, DEFAULT_WEIGHTS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            task = simulate_weights_task.delay(scenarios, algorithm)
+        except Exception as e:
+            logger.error(f"Error queueing weight simulation: {str(e)}")
+            return Response({'error': "Could not queue the simulation, try again later"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            'detail': f"Simulation of {len(scenarios)} scenarios queued",
+            'task_id': task.id,
+            'status_url': reverse('task-status', args=[task.id]),
+        }, status=status.HTTP_202_ACCEPTED)
+
+class OrganizationProfileViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = OrganizationProfile.objects.all()
     serializer_class = OrganizationProfileSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [FuzzySearchFilter]
+    fuzzy_matches = staticmethod(organization_matches)
     
     @action(detail=False, methods=['post'])
     def import_csv(self, request):
@@ -219,30 +381,34 @@ class OrganizationProfileViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Organizations CSV import is not yet implemented'}, 
                         status=status.HTTP_501_NOT_IMPLEMENTED)
 
-class FacultyProfileViewSet(viewsets.ModelViewSet):
+class FacultyProfileViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = FacultyProfile.objects.all()
     serializer_class = FacultyProfileSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class StatementViewSet(viewsets.ModelViewSet):
-    queryset = Statement.objects.select_related('student_profile')
+class StatementViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Statement.objects.select_related('student_profile').defer(
+        'search_vector', 'student_profile__search_vector'
+    )
     serializer_class = StatementSerializer
     permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [RankedSearchFilter]
 
-class StudentGradeViewSet(viewsets.ModelViewSet):
+class StudentGradeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = StudentGrade.objects.select_related('student_profile')
     serializer_class = StudentGradeSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class ImportLogViewSet(viewsets.ReadOnlyModelViewSet):
+class ImportLogViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for importing logs - readonly to prevent manual editing
     """
     queryset = ImportLog.objects.all().order_by('-import_datetime')
     serializer_class = ImportLogSerializer
+    cursor_ordering = ('-import_datetime', '-id')
     permission_classes = [IsAdminOrReadOnly]
 
-class SystemSettingViewSet(viewsets.ModelViewSet):
+class SystemSettingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API endpoint for managing system settings.
     Regular users can only view public settings.
@@ -264,7 +430,9 @@ class SystemSettingViewSet(viewsets.ModelViewSet):
         """Get settings grouped by category"""
         # Get filtered queryset based on permissions
         queryset = self.get_queryset()
-        
+        return self.conditional_response(queryset, lambda: Response(self.group_by_category(queryset)))
+
+    def group_by_category(self, queryset):
         # Group settings by category
         categories = {}
         for setting in queryset:
@@ -274,7 +442,7 @@ class SystemSettingViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(setting)
             categories[setting.category].append(serializer.data)
         
-        return Response(categories)
+        return categories
     
     @action(detail=False, methods=['post'])
     def bulk_update(self, request):
@@ -491,6 +659,7 @@ def test_dashboard(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@generation_conditional
 def dashboard_stats(request):
     """
     Get real-time statistics for the admin dashboard
@@ -511,6 +680,7 @@ def dashboard_stats(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@generation_conditional
 def dashboard_activity(request):
     """
     Get recent activity for the admin dashboard
@@ -578,17 +748,20 @@ def student_profile_detail(request, student_id):
     """
     Get detailed student profile including grades, area rankings, and externship information
     """
-    student = get_object_or_404(StudentProfile, id=student_id)
+    student = get_object_or_404(
+        StudentProfileSerializer.setup_eager_loading(StudentProfile.objects.all()), id=student_id
+    )
     
+    # Related rows come from the caches filled by setup_eager_loading
     try:
-        grades = StudentGrade.objects.get(student_profile=student)
+        grades = student.grades
     except StudentGrade.DoesNotExist:
         grades = None
         
-    area_rankings = StudentAreaRanking.objects.filter(student_profile=student)
+    area_rankings = student.area_rankings.all()
     
     try:
-        self_proposed = SelfProposedExternship.objects.get(student_profile=student)
+        self_proposed = student.self_proposed
     except SelfProposedExternship.DoesNotExist:
         self_proposed = None
 
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -188,8 +189,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # Keyset pagination on (created_at, id) for every list endpoint
+    'DEFAULT_PAGINATION_CLASS': 'backend.sail.pagination.CreatedAtCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
 }
 
+# Largest page a client can request with ?page_size=
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
     SECURE_SSL_REDIRECT = True
@@ -197,6 +204,23 @@ if not DEBUG:
     CSRF_COOKIE_SECURE = True
 # ... rest of your settings ... 
 
+# Cache: Redis when available, shared by web and Celery processes so that
+# generation bumps from imports and matching runs reach every reader.
+# Local memory is per process and only suitable for a single process.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
@@ -206,4 +230,25 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
-CELERY_RESULT_EXTENDED = True 
+CELERY_RESULT_EXTENDED = True
+CELERY_BEAT_SCHEDULE = {
+    # Correct any drift in the incrementally maintained dashboard counters
+    'reconcile-dashboard-counters': {
+        'task': 'backend.sail.tasks.reconcile_dashboard_counters_task',
+        'schedule': int(os.environ.get('DASHBOARD_RECONCILE_SECONDS', 15 * 60)),
+    },
+}
+
+# Number of extracted PDFs kept in the content-hash cache (least recently used are evicted)
+PDF_CACHE_MAX_ENTRIES = int(os.environ.get('PDF_CACHE_MAX_ENTRIES', 5000))
+
+# Trigram similarity (0-1) at which importers treat a near-identical student
+# or organization name as the same record
+FUZZY_MATCH_MIN_SCORE = float(os.environ.get('FUZZY_MATCH_MIN_SCORE', 0.8))
+
+# Letter grade -> points scale used for GPAs (Grade,Score columns)
+GRADESCORE_CSV = os.environ.get('GRADESCORE_CSV', os.path.join(BASE_DIR, 'gradescore.csv'))
+
+# Directory where the matching cohort snapshot of each data generation is
+# saved for worker processes to memory-map (unset: each process builds its own)
+COHORT_SNAPSHOT_DIR = os.environ.get('COHORT_SNAPSHOT_DIR') or None
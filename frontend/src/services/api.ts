@@ -48,6 +48,27 @@ async function fetchApi<T>(
   return response.json();
 }
 
+// Largest page the API serves (API_MAX_PAGE_SIZE)
+const MAX_PAGE_SIZE = 1000;
+
+// Collects every page of a cursor-paginated list endpoint by following `next`
+export async function fetchAllPages<T>(
+  client: { get: (url: string, config?: object) => Promise<{ data: any }> },
+  url: string
+): Promise<T[]> {
+  const results: T[] = [];
+  let next: string | null = url;
+  // Later `next` links already carry the cursor and page size
+  let params: object | undefined = { page_size: MAX_PAGE_SIZE };
+  while (next) {
+    const response = await client.get(next, { params });
+    results.push(...response.data.results);
+    next = response.data.next;
+    params = undefined;
+  }
+  return results;
+}
+
 // Type-safe API hooks
 export function useStudent(studentId: string) {
   return useQuery({
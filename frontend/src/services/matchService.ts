@@ -3,7 +3,7 @@
  * Purpose: Service for handling matching algorithm operations
  */
 
-import { api } from './api'
+import { api, fetchAllPages } from './api'
 
 export interface Match {
   id: string;
@@ -29,20 +29,42 @@ export interface MatchingRound {
 }
 
 export async function fetchMatches() {
-  const response = await apiClient.get('/matches/');
-  return response.data;
+  return fetchAllPages<Match>(apiClient, '/matches/');
 }
 
 export async function fetchMatchingRounds() {
-  const response = await apiClient.get('/matching-rounds/');
-  return response.data;
+  return fetchAllPages<MatchingRound>(apiClient, '/matching-rounds/');
 }
 
+// Queues the run; poll fetchTaskStatus(task_id) for phase progress and the result
 export async function runMatchingAlgorithm(roundId: string) {
   const response = await apiClient.post(`/matching-rounds/${roundId}/run_algorithm/`);
   return response.data;
 }
 
+export async function cancelMatchingRun(roundId: string) {
+  const response = await apiClient.post(`/matching-rounds/${roundId}/cancel/`);
+  return response.data;
+}
+
+// Repairs a completed round after late changes to the given profile ids
+export async function rematchRound(roundId: string, students: string[], organizations: string[]) {
+  const response = await apiClient.post(`/matching-rounds/${roundId}/rematch/`, { students, organizations });
+  return response.data;
+}
+
+// Queues a comparison of weight configurations against the current settings (nothing
+// is saved); poll fetchTaskStatus(task_id) for the result
+export async function simulateWeights(scenarios: Record<string, number>[], algorithm = 'greedy') {
+  const response = await apiClient.post('/matching-rounds/simulate/', { scenarios, algorithm });
+  return response.data;
+}
+
+export async function fetchTaskStatus(taskId: string) {
+  const response = await apiClient.get(`/tasks/${taskId}/`);
+  return response.data;
+}
+
 export async function updateMatchStatus(matchId: string, status: string) {
   const response = await apiClient.patch(`/matches/${matchId}/`, { status });
   return response.data;
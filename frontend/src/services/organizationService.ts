@@ -3,7 +3,7 @@
  * Purpose: API service for organization-related operations
  */
 
-import { api } from './api'
+import { api, fetchAllPages } from './api'
 
 export interface Organization {
   id: string;
@@ -20,8 +20,7 @@ export interface Organization {
 
 export const fetchOrganizations = async (): Promise<Organization[]> => {
   try {
-    const response = await apiClient.get('/organizations/');
-    return response.data;
+    return await fetchAllPages<Organization>(apiClient, '/organizations/');
   } catch (error) {
     console.error('Error fetching organizations:', error);
     throw error;
@@ -3,7 +3,7 @@
  * Purpose: API service for student-related operations
  */
 
-import { api } from './api'
+import { api, fetchAllPages } from './api'
 
 export interface Student {
   id: number;
@@ -47,8 +47,7 @@ const handleApiError = (error: any, context: string): never => {
 
 export const fetchStudents = async (): Promise<Student[]> => {
   try {
-    const response = await apiClient.get('/students/');
-    return response.data;
+    return await fetchAllPages<Student>(apiClient, '/students/');
   } catch (error) {
     console.error('Error fetching students:', error);
     throw error;